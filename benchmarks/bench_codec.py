@@ -0,0 +1,81 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Compare the codec registry against a branch chain of ``struct.unpack`` calls.
+
+Run with ``python3 benchmarks/bench_codec.py``.
+"""
+
+import struct
+import timeit
+
+from pybravo.protocol import DeviceID, ModeID, Packet, PacketID
+from pybravo.protocol.codec import decode_value
+
+ITERATIONS = 200_000
+
+
+def parse_data(packet: Packet):
+    """Parse the packet data using a chain of conditionals.
+
+    Args:
+        packet: The packet to parse.
+
+    Returns:
+        The parsed value.
+    """
+    if packet.packet_id == PacketID.SOFTWARE_VERSION:
+        return f"{packet.data[0]}.{packet.data[1]}.{packet.data[2]}"
+    elif packet.packet_id == PacketID.MODE:
+        return ModeID(packet.data[0])
+    elif packet.packet_id in (
+        PacketID.POSITION_LIMITS,
+        PacketID.VELOCITY_LIMITS,
+        PacketID.CURRENT_LIMITS,
+    ):
+        return struct.unpack("<ff", packet.data)
+    return struct.unpack("<f", packet.data)[0]
+
+
+def main() -> None:
+    """Time decoding the value of common packets."""
+    packets = [
+        Packet(DeviceID.BEND_ELBOW, PacketID.POSITION, bytes(4)),
+        Packet(DeviceID.BEND_ELBOW, PacketID.MODE, bytes([ModeID.POSITION.value])),
+        Packet(DeviceID.BEND_ELBOW, PacketID.VELOCITY_LIMITS, bytes(8)),
+    ]
+
+    print(f"{'packet':>16} {'branches (ns)':>14} {'registry (ns)':>14}")
+
+    for packet in packets:
+        branches = min(timeit.repeat(lambda p=packet: parse_data(p), number=ITERATIONS))
+        registry = min(
+            timeit.repeat(
+                lambda p=packet: decode_value(p.packet_id, p.data), number=ITERATIONS
+            )
+        )
+        print(
+            f"{packet.packet_id.name:>16} {branches / ITERATIONS * 1e9:>14.1f}"
+            f" {registry / ITERATIONS * 1e9:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
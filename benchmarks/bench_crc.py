@@ -0,0 +1,68 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Compare the table-driven CRC-8 against the generic CRC calculator.
+
+Run with ``python3 benchmarks/bench_crc.py``.
+"""
+
+import random
+import timeit
+
+from crc import Calculator, Configuration
+
+from pybravo.protocol import crc8
+
+PAYLOAD_SIZES = (4, 8, 16, 32)
+ITERATIONS = 20_000
+
+
+def main() -> None:
+    """Time both CRC implementations across typical packet sizes."""
+    calculator = Calculator(
+        Configuration(
+            width=8,
+            polynomial=0x4D,
+            init_value=0x00,
+            final_xor_value=0xFF,
+            reverse_input=True,
+            reverse_output=True,
+        )
+    )
+    rng = random.Random(0)
+
+    print(f"{'size':>6} {'calculator (us)':>16} {'table (us)':>12} {'speedup':>9}")
+
+    for size in PAYLOAD_SIZES:
+        data = bytes(rng.getrandbits(8) for _ in range(size))
+
+        reference = min(
+            timeit.repeat(lambda d=data: calculator.checksum(d), number=ITERATIONS)
+        )
+        table = min(timeit.repeat(lambda d=data: crc8.checksum(d), number=ITERATIONS))
+
+        print(
+            f"{size:>6} {reference / ITERATIONS * 1e6:>16.3f}"
+            f" {table / ITERATIONS * 1e6:>12.3f} {reference / table:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Measure the decode throughput of multi-frame datagrams.
+
+Run with ``python3 benchmarks/bench_decode.py``.
+"""
+
+import time
+
+from pybravo.protocol import DeviceID, FrameDecoder, Packet, PacketID
+
+FRAMES_PER_DATAGRAM = (1, 7, 14, 28)
+DURATION = 1.0
+
+
+def make_datagram(frames: int) -> bytes:
+    """Create a datagram containing position responses from each joint.
+
+    Args:
+        frames: The number of frames to include in the datagram.
+
+    Returns:
+        The encoded datagram.
+    """
+    joints = [d for d in DeviceID if d is not DeviceID.ALL_JOINTS]
+    return b"".join(
+        Packet(joints[i % len(joints)], PacketID.POSITION, bytes(4)).encode()
+        for i in range(frames)
+    )
+
+
+def frames_per_second(decode, datagram: bytes) -> float:
+    """Measure the number of frames decoded per second.
+
+    Args:
+        decode: A function that decodes a datagram and returns the packets.
+        datagram: The datagram to decode.
+
+    Returns:
+        The number of frames decoded per second.
+    """
+    view = memoryview(datagram)
+    frames = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < DURATION:
+        for _ in range(100):
+            frames += len(decode(view))
+    return frames / elapsed
+
+
+def main() -> None:
+    """Measure the decode throughput for increasing numbers of frames per datagram."""
+    decoder = FrameDecoder()
+
+    print(
+        f"{'frames':>7} {'iter_decode (frames/s)':>23} {'FrameDecoder (frames/s)':>24}"
+    )
+
+    for frames in FRAMES_PER_DATAGRAM:
+        datagram = make_datagram(frames)
+        iter_rate = frames_per_second(lambda d: list(Packet.iter_decode(d)), datagram)
+        feed_rate = frames_per_second(decoder.feed, datagram)
+        print(f"{frames:>7} {iter_rate:>23,.0f} {feed_rate:>24,.0f}")
+
+
+if __name__ == "__main__":
+    main()
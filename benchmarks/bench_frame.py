@@ -0,0 +1,118 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Compare the frame codec against encoding the trailer and CRC separately.
+
+Both codecs use the ``cobs`` extension for byte stuffing; the frame codec folds the
+trailer into the CRC and checks received frames against the CRC residue. Run with
+``python3 benchmarks/bench_frame.py``.
+"""
+
+import random
+import struct
+import timeit
+
+from cobs import cobs
+
+from pybravo.protocol import crc8, frame
+
+PAYLOAD_SIZES = (4, 8, 16, 32)
+ITERATIONS = 50_000
+
+
+def reference_encode(device_id: int, packet_id: int, data: bytes) -> bytes:
+    """Encode a frame by concatenating the trailer and running COBS separately.
+
+    Args:
+        device_id: The raw device ID.
+        packet_id: The raw packet ID.
+        data: The packet data.
+
+    Returns:
+        The encoded frame.
+    """
+    data += struct.pack(">BBB", packet_id, device_id, len(data) + 4)
+    data += struct.pack(">B", crc8.checksum(data))
+    return cobs.encode(data) + b"\x00"
+
+
+def reference_decode(data: bytes) -> tuple[int, int, bytes]:
+    """Decode a frame by running COBS and the CRC separately.
+
+    Args:
+        data: The encoded frame.
+
+    Raises:
+        ValueError: The CRC or length of the frame is invalid.
+
+    Returns:
+        The raw device ID, raw packet ID, and packet data.
+    """
+    decoded = bytearray(cobs.decode(data[:-1]))
+    actual_crc = decoded.pop()
+    if not crc8.verify(decoded, actual_crc):
+        raise ValueError("The expected and actual CRC values do not match.")
+    length = decoded.pop()
+    if len(decoded) + 2 != length:
+        raise ValueError("Invalid length")
+    device_id = decoded.pop()
+    packet_id = decoded.pop()
+    return device_id, packet_id, bytes(decoded)
+
+
+def _time(stmt) -> float:
+    """Time a statement in microseconds per call.
+
+    Args:
+        stmt: The callable to time.
+
+    Returns:
+        The best time per call, in microseconds.
+    """
+    return min(timeit.repeat(stmt, number=ITERATIONS)) / ITERATIONS * 1e6
+
+
+def main() -> None:
+    """Time both frame codecs across typical packet sizes."""
+    rng = random.Random(0)
+    buf = bytearray(frame.max_frame_size(max(PAYLOAD_SIZES)))
+
+    print(
+        f"{'size':>6} {'ref enc (us)':>13} {'encode (us)':>12}"
+        f" {'encode_into (us)':>17} {'ref dec (us)':>13} {'decode_from (us)':>17}"
+    )
+
+    for size in PAYLOAD_SIZES:
+        data = bytes(rng.getrandbits(8) for _ in range(size))
+        encoded = frame.encode(0x01, 0x03, data)
+        view = memoryview(encoded)
+
+        print(
+            f"{size:>6}"
+            f" {_time(lambda d=data: reference_encode(0x01, 0x03, d)):>13.3f}"
+            f" {_time(lambda d=data: frame.encode(0x01, 0x03, d)):>12.3f}"
+            f" {_time(lambda d=data: frame.encode_into(buf, 0, 0x01, 0x03, d)):>17.3f}"
+            f" {_time(lambda e=encoded: reference_decode(e)):>13.3f}"
+            f" {_time(lambda v=view: frame.decode_from(v)):>17.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Compare the loopback request latency of the threaded and asyncio drivers.
+
+A minimal fake arm answers every request with a single packet over the loopback
+interface. Run with ``python3 benchmarks/bench_latency.py``.
+"""
+
+import asyncio
+import socket
+import statistics
+import threading
+import time
+
+from pybravo import AsyncBravoDriver, BravoDriver, DeviceID, Packet, PacketID
+from pybravo.protocol import REQUESTS
+
+ROUND_TRIPS = 2_000
+
+
+class EchoArm:
+    """A fake arm that answers each request with a position packet."""
+
+    def __init__(self) -> None:
+        """Create a new fake arm bound to an ephemeral loopback port."""
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(0.1)
+        self.port = self.sock.getsockname()[1]
+        self.response = Packet(
+            DeviceID.BEND_ELBOW, PacketID.POSITION, bytes(4)
+        ).encode()
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self) -> None:
+        """Answer requests until the arm is closed."""
+        while self._running:
+            try:
+                _, address = self.sock.recvfrom(256)
+            except socket.timeout:
+                continue
+            self.sock.sendto(self.response, address)
+
+    def close(self) -> None:
+        """Stop answering requests."""
+        self._running = False
+        self._thread.join()
+        self.sock.close()
+
+
+def summarize(name: str, samples: list[float]) -> None:
+    """Print the latency distribution of a driver.
+
+    Args:
+        name: The name of the driver.
+        samples: The round trip times (s).
+    """
+    samples.sort()
+    print(
+        f"{name:>9}: median {statistics.median(samples) * 1e6:8.1f} us,"
+        f" p99 {samples[int(len(samples) * 0.99)] * 1e6:8.1f} us"
+    )
+
+
+def threaded_latency(port: int) -> list[float]:
+    """Measure the round trip times of the threaded driver.
+
+    Args:
+        port: The port of the fake arm.
+
+    Returns:
+        The round trip times (s).
+    """
+    received = threading.Event()
+    driver = BravoDriver()
+    driver._logger.disabled = True
+    driver.attach_callback(PacketID.POSITION, lambda _: received.set())
+    driver.connect("127.0.0.1", port)
+
+    request = REQUESTS[DeviceID.BEND_ELBOW, PacketID.POSITION]
+    samples = []
+
+    for _ in range(ROUND_TRIPS):
+        received.clear()
+        start = time.perf_counter()
+        driver.send(request)
+        received.wait(1.0)
+        samples.append(time.perf_counter() - start)
+
+    driver.disconnect()
+
+    return samples
+
+
+async def async_latency(port: int) -> list[float]:
+    """Measure the round trip times of the asyncio driver.
+
+    Args:
+        port: The port of the fake arm.
+
+    Returns:
+        The round trip times (s).
+    """
+    driver = AsyncBravoDriver()
+    driver._logger.disabled = True
+    await driver.connect("127.0.0.1", port)
+
+    request = REQUESTS[DeviceID.BEND_ELBOW, PacketID.POSITION]
+    stream = driver.packets(PacketID.POSITION)
+    samples = []
+
+    for _ in range(ROUND_TRIPS):
+        start = time.perf_counter()
+        await driver.send(request)
+        await anext(stream)
+        samples.append(time.perf_counter() - start)
+
+    await stream.aclose()
+    await driver.disconnect()
+
+    return samples
+
+
+def main() -> None:
+    """Measure the loopback latency of both drivers."""
+    arm = EchoArm()
+
+    try:
+        summarize("threaded", threaded_latency(arm.port))
+        summarize("asyncio", asyncio.run(async_latency(arm.port)))
+    finally:
+        arm.close()
+
+
+if __name__ == "__main__":
+    main()
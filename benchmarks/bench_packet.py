@@ -0,0 +1,116 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Measure the cost of creating and decoding packets.
+
+Run with ``python3 benchmarks/bench_packet.py``.
+"""
+
+import timeit
+import tracemalloc
+
+from pybravo.protocol import REQUESTS, DeviceID, Packet, PacketID
+from pybravo.protocol.device_id import DEVICE_IDS
+from pybravo.protocol.packet_id import PACKET_IDS
+
+ITERATIONS = 200_000
+INSTANCES = 10_000
+
+
+class DictPacket:
+    """A packet that stores its attributes in a ``__dict__`` for comparison."""
+
+    def __init__(self, device_id: DeviceID, packet_id: PacketID, data: bytes) -> None:
+        """Create a new packet.
+
+        Args:
+            device_id: The device ID that the packet is targeting.
+            packet_id: The ID of the packet.
+            data: The packet data.
+        """
+        self.device_id = device_id
+        self.packet_id = packet_id
+        self.data = data
+        self.value = None
+
+
+def _time(stmt) -> float:
+    """Time a statement in nanoseconds per call.
+
+    Args:
+        stmt: The callable to time.
+
+    Returns:
+        The best time per call, in nanoseconds.
+    """
+    return min(timeit.repeat(stmt, number=ITERATIONS)) / ITERATIONS * 1e9
+
+
+def _memory(cls) -> float:
+    """Measure the memory used per packet instance.
+
+    Args:
+        cls: The packet class to instantiate.
+
+    Returns:
+        The number of bytes allocated per instance.
+    """
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    packets = [  # noqa: F841
+        cls(DeviceID.BEND_ELBOW, PacketID.POSITION, b"") for _ in range(INSTANCES)
+    ]
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (end - start) / INSTANCES
+
+
+def main() -> None:
+    """Compare packet construction, ID lookups, encoding, and decoding."""
+    data = bytes(4)
+    encoded = Packet(DeviceID.BEND_ELBOW, PacketID.POSITION, data).encode()
+
+    print("construction (ns):")
+    dict_time = _time(lambda: DictPacket(DeviceID.BEND_ELBOW, PacketID.POSITION, data))
+    slots_time = _time(lambda: Packet(DeviceID.BEND_ELBOW, PacketID.POSITION, data))
+    print(f"  __dict__ packet  {dict_time:8.1f}")
+    print(f"  __slots__ packet {slots_time:8.1f}")
+
+    print("memory per packet (bytes):")
+    print(f"  __dict__ packet  {_memory(DictPacket):8.1f}")
+    print(f"  __slots__ packet {_memory(Packet):8.1f}")
+
+    print("ID lookup (ns):")
+    print(f"  enum call        {_time(lambda: (DeviceID(5), PacketID(3))):8.1f}")
+    print("  lookup table     " f"{_time(lambda: (DEVICE_IDS[5], PACKET_IDS[3])):8.1f}")
+
+    request = Packet(DeviceID.ALL_JOINTS, PacketID.REQUEST, bytes([0x03]))
+    frozen = REQUESTS[DeviceID.ALL_JOINTS, PacketID.POSITION]
+
+    print("request encode (ns):")
+    print(f"  Packet           {_time(request.encode):8.1f}")
+    print(f"  FrozenPacket     {_time(frozen.encode):8.1f}")
+
+    print("decode (ns):")
+    print(f"  Packet.decode    {_time(lambda: Packet.decode(encoded)):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Measure the decode and dispatch throughput of the driver by replaying a capture.
+
+Run with ``python3 benchmarks/bench_replay.py [capture]``. If no capture is provided, a
+synthetic capture of ALL_JOINTS position responses is replayed.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+from pybravo import BravoDriver, PacketID
+from pybravo.capture import CaptureReader, CaptureReplay, CaptureWriter, Direction
+from pybravo.protocol import JOINTS, Packet
+
+DATAGRAMS = 20000
+
+
+def write_capture(path: Path) -> None:
+    """Write a synthetic capture of joint position responses at 1 kHz.
+
+    Args:
+        path: The path to write the capture to.
+    """
+    datagram = b"".join(
+        Packet.from_value(joint, PacketID.POSITION, 0.0).encode() for joint in JOINTS
+    )
+
+    with CaptureWriter(path) as writer:
+        for i in range(DATAGRAMS):
+            writer.write(Direction.RECEIVED, datagram, timestamp_ns=i * 1_000_000)
+
+
+def main() -> None:
+    """Replay a capture as fast as possible and report the throughput."""
+    driver = BravoDriver()
+    for packet_id in PacketID:
+        driver.attach_callback(packet_id, lambda _: None)
+
+    with tempfile.TemporaryDirectory() as directory:
+        if len(sys.argv) > 1:
+            path = Path(sys.argv[1])
+        else:
+            path = Path(directory) / "capture.bravo"
+            write_capture(path)
+
+        with CaptureReader(path) as capture:
+            stats = CaptureReplay(driver, speed=None).run(capture)
+
+    print(f"{'datagrams':>10} {'packets':>10} {'datagrams/s':>12} {'packets/s':>12}")
+    print(
+        f"{stats.datagrams:>10} {stats.packets:>10} "
+        f"{stats.datagrams_per_second:>12,.0f} {stats.packets_per_second:>12,.0f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Microbenchmarks for the protocol and dispatch hot paths, with stored baselines.
+
+Each benchmark measures the best-case time of a single operation (ns) over several
+repeats. Save a baseline before making a change, then compare against it afterward to
+flag regressions:
+
+    python3 benchmarks/suite.py run --save benchmarks/baselines/main.json
+    python3 benchmarks/suite.py compare benchmarks/baselines/main.json
+
+The committed ``benchmarks/baselines/main.json`` holds the results for the main branch
+and is used when ``compare`` isn't given a baseline. Timings depend on the machine, so
+regenerate it locally before relying on small differences.
+
+``compare`` exits with a non-zero status if any benchmark is slower than the baseline
+by more than the threshold. Use ``--filter`` to run only the benchmarks whose names
+contain a substring.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, ContextManager, Iterator
+
+from pybravo import BravoDriver, DeviceID, Packet, PacketID
+from pybravo.driver.receive import ReceiveRing
+from pybravo.protocol import JOINTS, JointCommandEncoder, crc8
+from pybravo.protocol.device_id import DEVICE_IDS
+from pybravo.protocol.packet_id import PACKET_IDS
+from pybravo.sim import BravoSimulator
+
+PAYLOAD_SIZES = (0, 4, 24, 251)
+FRAMES_PER_DATAGRAM = (7, 28)
+SUBSCRIBERS = (1, 10, 100)
+REPEAT = 5
+
+# The committed baseline that is compared against by default
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "main.json"
+
+# Each benchmark is a context manager that yields the operation to time
+BENCHMARKS: dict[str, Callable[[], ContextManager[Callable[[], object]]]] = {}
+
+
+def benchmark(name: str) -> Callable:
+    """Register a benchmark.
+
+    Args:
+        name: The name of the benchmark.
+
+    Returns:
+        A decorator that registers a generator function yielding the operation to time.
+    """
+
+    def register(setup: Callable[[], Iterator[Callable[[], object]]]) -> Callable:
+        BENCHMARKS[name] = contextmanager(setup)
+        return setup
+
+    return register
+
+
+for size in PAYLOAD_SIZES:
+    packet = Packet(DeviceID.BEND_ELBOW, PacketID.POSITION, bytes(range(1, size + 1)))
+    encoded = packet.encode()
+
+    @benchmark(f"encode[{size}]")
+    def _encode(packet: Packet = packet) -> Iterator[Callable[[], object]]:
+        yield packet.encode
+
+    @benchmark(f"decode[{size}]")
+    def _decode(encoded: bytes = encoded) -> Iterator[Callable[[], object]]:
+        yield lambda: Packet.decode(encoded)
+
+    @benchmark(f"crc[{size}]")
+    def _crc(data: bytes = encoded[:-2]) -> Iterator[Callable[[], object]]:
+        yield lambda: crc8.checksum(data)
+
+
+@benchmark("lookup[DeviceID]")
+def _lookup_device_id() -> Iterator[Callable[[], object]]:
+    yield lambda: DEVICE_IDS[0x05]
+
+
+@benchmark("lookup[PacketID]")
+def _lookup_packet_id() -> Iterator[Callable[[], object]]:
+    yield lambda: PACKET_IDS[0x03]
+
+
+for frames in FRAMES_PER_DATAGRAM:
+    datagram = b"".join(
+        Packet(JOINTS[i % len(JOINTS)], PacketID.POSITION, bytes(4)).encode()
+        for i in range(frames)
+    )
+
+    @benchmark(f"split[{frames}]")
+    def _split(datagram: bytes = datagram) -> Iterator[Callable[[], object]]:
+        yield lambda: list(Packet.iter_decode(datagram))
+
+    @benchmark(f"receive[{frames}]")
+    def _receive(datagram: bytes = datagram) -> Iterator[Callable[[], object]]:
+        # Decode from a receive ring slot, as the polling thread does
+        buffer = ReceiveRing(slots=1).next()
+        buffer[: len(datagram)] = datagram
+        yield lambda: list(Packet.iter_decode(buffer, None, len(datagram)))
+
+
+@benchmark("command[packets]")
+def _command_packets() -> Iterator[Callable[[], object]]:
+    positions = [0.5 * (i + 1) for i in range(len(JOINTS))]
+    yield lambda: Packet.encode_many(
+        [
+            Packet.from_value(device_id, PacketID.POSITION, position)
+            for device_id, position in zip(JOINTS, positions, strict=True)
+        ]
+    )
+
+
+@benchmark("command[encoder]")
+def _command_encoder() -> Iterator[Callable[[], object]]:
+    encoder = JointCommandEncoder(PacketID.POSITION)
+    positions = [0.5 * (i + 1) for i in range(len(JOINTS))]
+    yield lambda: encoder.encode(positions)
+
+
+for subscribers in SUBSCRIBERS:
+
+    @benchmark(f"dispatch[{subscribers}]")
+    def _dispatch(subscribers: int = subscribers) -> Iterator[Callable[[], object]]:
+        driver = BravoDriver()
+
+        # Distinct callbacks, since duplicates are only attached once
+        for _ in range(subscribers):
+            driver.attach_callback(PacketID.POSITION, lambda _: None)
+
+        data = Packet(DeviceID.BEND_ELBOW, PacketID.POSITION, bytes(4)).encode()
+        yield lambda: driver._handle_datagram(data)
+
+
+@benchmark("roundtrip[loopback]")
+def _roundtrip() -> Iterator[Callable[[], object]]:
+    with BravoSimulator() as sim:
+        driver = BravoDriver()
+        driver.connect(*sim.address)
+
+        try:
+            yield lambda: driver.request(
+                DeviceID.BEND_ELBOW, PacketID.POSITION, 1.0
+            ).result(1.0)
+        finally:
+            driver.disconnect()
+
+
+def measure(name: str) -> float:
+    """Measure the time taken by a single operation of a benchmark.
+
+    Args:
+        name: The name of the benchmark.
+
+    Returns:
+        The best time per operation across the repeats (ns).
+    """
+    with BENCHMARKS[name]() as operation:
+        timer = timeit.Timer(operation)
+        number, _ = timer.autorange()
+        return min(timer.repeat(REPEAT, number)) / number * 1e9
+
+
+def run(pattern: str = "") -> dict[str, float]:
+    """Run the benchmarks and print the results.
+
+    Args:
+        pattern: Only run the benchmarks whose names contain this substring.
+
+    Returns:
+        The time per operation of each benchmark (ns).
+    """
+    results = {}
+
+    for name in BENCHMARKS:
+        if pattern in name:
+            results[name] = measure(name)
+            print(f"{name:<24} {results[name]:>12,.1f} ns")
+
+    return results
+
+
+def compare(
+    baseline: dict[str, float], current: dict[str, float], threshold: float
+) -> bool:
+    """Print the change in each benchmark relative to a baseline.
+
+    Args:
+        baseline: The baseline time per operation of each benchmark (ns).
+        current: The current time per operation of each benchmark (ns).
+        threshold: The largest acceptable slowdown, as a fraction of the baseline.
+
+    Returns:
+        Whether or not any benchmark regressed by more than the threshold.
+    """
+    regressed = False
+
+    print(f"{'benchmark':<24} {'baseline':>12} {'current':>12} {'change':>8}")
+
+    for name, time in current.items():
+        if name not in baseline:
+            print(f"{name:<24} {'-':>12} {time:>12,.1f}")
+            continue
+
+        change = time / baseline[name] - 1
+        flag = ""
+
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressed = True
+
+        print(
+            f"{name:<24} {baseline[name]:>12,.1f} {time:>12,.1f} {change:>+8.1%}{flag}"
+        )
+
+    return regressed
+
+
+def load(path: Path) -> dict[str, float]:
+    """Load the results saved by a previous run.
+
+    Args:
+        path: The path to the saved results.
+
+    Returns:
+        The time per operation of each benchmark (ns).
+    """
+    return json.loads(path.read_text())["results"]
+
+
+def save(path: Path, results: dict[str, float]) -> None:
+    """Save the results of a run so that they can be used as a baseline.
+
+    Args:
+        path: The path to save the results to.
+        results: The time per operation of each benchmark (ns).
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps(
+            {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            },
+            indent=2,
+        )
+        + "\n"
+    )
+
+
+def main() -> None:
+    """Run the benchmarks or compare them against a baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--filter", default="", help="substring of the names")
+    run_parser.add_argument("--save", type=Path, help="save the results to a file")
+
+    compare_parser = commands.add_parser("compare", help="compare against a baseline")
+    compare_parser.add_argument(
+        "baseline",
+        type=Path,
+        nargs="?",
+        default=DEFAULT_BASELINE,
+        help="the baseline results (default: benchmarks/baselines/main.json)",
+    )
+    compare_parser.add_argument(
+        "current", type=Path, nargs="?", help="saved results (default: run now)"
+    )
+    compare_parser.add_argument("--filter", default="", help="substring of the names")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=0.1, help="allowed slowdown (default: 0.1)"
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run(args.filter)
+        if args.save is not None:
+            save(args.save, results)
+        return
+
+    baseline = load(args.baseline)
+    if args.current is not None:
+        current = {k: v for k, v in load(args.current).items() if args.filter in k}
+    else:
+        current = run(args.filter)
+        print()
+
+    if compare(baseline, current, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,12 @@
-import struct
-import time
-import threading
 import atexit
+import concurrent.futures
 import yaml
 
 import numpy as np
 
 from pybravo import BravoDriver, PacketID, DeviceID, Packet, ModeID
-from utils import parse_data, requests, axis_map, bcolors
+from pybravo.protocol import JOINTS
+from utils import axis_map, bcolors
 
 
 class BravoStatus:
@@ -18,7 +17,6 @@ class BravoStatus:
         self._bravo = BravoDriver()
         self._bravo.connect()
 
-        self.requests = requests
         self.realtime_packets = realtime_packets
         self.startup_packets = startup_packets
         self._running = False
@@ -42,45 +40,41 @@ class BravoStatus:
         # Make sure that we shutdown the interface when we exit
         # atexit.register(self.stop)
 
-    def poll_startup_status(self) -> None:
-        """blah"""
-        for packet in self.startup_packets:
-            self._bravo.send(self.requests[packet])
-            time.sleep(0.01)
+    def poll_startup_status(self, timeout: float = 2.0) -> None:
+        """Request the start-up status of every joint and wait for the responses.
 
-    def poll_realtime_status(self) -> None:
+        Args:
+            timeout: The maximum amount of time to wait for each response (s).
+        """
+        futures = self._bravo.request_many(
+            [(joint, packet) for joint in JOINTS for packet in self.startup_packets],
+            timeout,
+        )
+
+        # The responses are stored by packet_callback, so wait for every response to
+        # arrive (or time out) before the status is read
+        concurrent.futures.wait(futures)
+
+    def poll_realtime_status(self, rate: float = 100.0) -> None:
         """request status at high rate"""
         if self._realtime_status is False:
-            # Create a new thread to poll everything we care about real-time
-            self.poll_t = threading.Thread(target=self.poll_realtime_status)
-            self.poll_t.daemon = True
-            self._realtime_status = True
-
-        while self._running:
+            # The driver's scheduler requests every realtime packet at the same rate
+            # and sends the requests that are due together in one datagram
             for packet in self.realtime_packets:
-                self._bravo.send(self.requests[packet])
-                time.sleep(0.01)
+                self._bravo.scheduler.subscribe(packet, DeviceID.ALL_JOINTS, rate)
+            self._realtime_status = True
 
     def start(self) -> None:
         """Start the reader."""
-        # Start a connection to the Bravo
-        # self._bravo.connect()
-
-        # Start the polling thread
         self._running = True
-        self.poll_t.start()
+        self.poll_realtime_status()
 
     def stop(self) -> None:
         """Stop the reader."""
-        # Stop the poll thread loop
         self._running = False
-        time.sleep(0.01)
+
         # Disconnect the bravo driver
-        try:
-            self._bravo.disconnect()
-            self.poll_t.join()
-        except AttributeError:
-            ...
+        self._bravo.disconnect()
 
     def packet_callback(self, packet: Packet) -> None:
         """
@@ -88,7 +82,7 @@ class BravoStatus:
             packet: The joint position packet.
         """
         try:
-            self.properties[packet.device_id][packet.packet_id] = parse_data(packet)
+            self.properties[packet.device_id][packet.packet_id] = packet.value
         except KeyError:
             pass
 
@@ -147,8 +141,8 @@ class BravoStatus:
     def print_rt_status(self) -> None:
         pass
 
-    def set_parameter(self, device_id, packet_id, packed_data) -> None:
-        packet = Packet(device_id, packet_id, packed_data)
+    def set_parameter(self, device_id, packet_id, value) -> None:
+        packet = Packet.from_value(device_id, packet_id, value)
         self._bravo.send(packet)
 
     def print_comparison(self, equal, print_vals, desired, actual, limit_name):
@@ -206,7 +200,7 @@ class BravoStatus:
                             self.set_parameter(
                                 axis_map[k],
                                 PacketID.POSITION_LIMITS,
-                                struct.pack("ff", *desired),
+                                desired,
                             )
                             all_equal = False
                         self.print_comparison(
@@ -221,7 +215,7 @@ class BravoStatus:
                             self.set_parameter(
                                 axis_map[k],
                                 PacketID.CURRENT_LIMITS,
-                                struct.pack("ff", *desired),
+                                desired,
                             )
                             all_equal = False
                         self.print_comparison(
@@ -236,7 +230,7 @@ class BravoStatus:
                             self.set_parameter(
                                 axis_map[k],
                                 PacketID.VELOCITY_LIMITS,
-                                struct.pack("ff", *desired),
+                                desired,
                             )
                             all_equal = False
                         self.print_comparison(
@@ -21,17 +21,18 @@
 """Demonstrates how to poll the Bravo joint positions.
 
 This example demonstrates how to implement an asynchronous interface for interacting
-with the Bravo. An example callback function is implemented to demonstrate how
-to design and register callbacks.
+with the Bravo. The joint positions are read from the driver's ``JointStateCache``,
+which is updated as packets are received.
 """
 
 import atexit
-import struct
 import sys
-import threading
 import time
 
-from pybravo import BravoDriver, DeviceID, Packet, PacketID
+import numpy as np
+
+from pybravo import BravoDriver, DeviceID, PacketID
+from pybravo.state import JointStateCache
 
 
 class JointReader:
@@ -40,14 +41,9 @@ class JointReader:
     def __init__(self) -> None:
         """Create a new joint position interface."""
         self._bravo = BravoDriver()
-        self._running = False
-        self.joint_positions = [0.0] * 7
-
-        self._bravo.attach_callback(PacketID.POSITION, self.read_joint_position_cb)
 
-        # Create a new thread to poll the joint angles
-        self.poll_t = threading.Thread(target=self.poll_joint_angles)
-        self.poll_t.daemon = True
+        # Request the joint positions at 100 Hz while the driver is connected
+        self._bravo.scheduler.subscribe(PacketID.POSITION, DeviceID.ALL_JOINTS, 100.0)
 
         # Make sure that we shutdown the interface when we exit
         atexit.register(self.stop)
@@ -57,45 +53,24 @@ class JointReader:
         # Start a connection to the Bravo
         self._bravo.connect()
 
-        # Start the polling thread
-        self._running = True
-        self.poll_t.start()
-
     def stop(self) -> None:
         """Stop the joint position reader."""
-        # Stop the poll thread loop
-        self._running = False
-
         # Disconnect the bravo driver
         self._bravo.disconnect()
 
-        self.poll_t.join()
-
-    def poll_joint_angles(self) -> None:
-        """Request the current joint positions at a rate of 100 Hz."""
-        while self._running:
-            request = Packet(
-                DeviceID.ALL_JOINTS, PacketID.REQUEST, bytes([PacketID.POSITION.value])
-            )
-            self._bravo.send(request)
-            time.sleep(0.01)
-
-    def read_joint_position_cb(self, packet: Packet) -> None:
-        """Handle the joint position reading.
+    @property
+    def joint_positions(self) -> np.ndarray:
+        """Get the most recent joint positions.
 
-        Args:
-            packet: A packet with a joint position measurement.
+        Returns:
+            The joint positions, ordered by device ID.
         """
-        # The unpacking order will need to change according to the system on which the
-        # data is received (i.e., Windows vs Linux)
-        position: float = struct.unpack("<f", packet.data)[0]
+        positions = self._bravo.state.snapshot().position
 
         # The jaws are a linear joint; convert from mm to m
-        if packet.device_id == DeviceID.LINEAR_JAWS:
-            position *= 0.001
+        positions[JointStateCache.index(DeviceID.LINEAR_JAWS)] *= 0.001
 
-        # Save the joint positions at the same index as their ID
-        self.joint_positions[packet.device_id.value - 1] = position
+        return positions
 
 
 if __name__ == "__main__":
@@ -27,9 +27,9 @@ usability of the official interface.
 .. _joint_control_eth.py: https://github.com/Reach-Robotics/reach_robotics_sdk/blob/master/bplprotocol/examples/joint_control_eth.py
 """  # noqa
 
-import struct
+import numpy as np
 
-from pybravo import BravoDriver, DeviceID, Packet, PacketID
+from pybravo import BravoDriver, ModeID
 
 if __name__ == "__main__":
     bravo = BravoDriver()
@@ -37,13 +37,14 @@ if __name__ == "__main__":
     # Start the bravo connection
     bravo.connect()
 
-    # Specify the desird positions
-    desired_positions = [10.0, 0.5, 1.5707, 1.5707, 1.5707, 2.8, 3.14159]
+    # Read the joint limits so that the commands can be checked against them
+    bravo.load_joint_limits()
 
-    # Create the packets and send them to the Bravo
-    for i, position in enumerate(desired_positions):
-        packet = Packet(DeviceID(i), PacketID.POSITION, struct.pack(">f", position))
-        bravo.send(packet)
+    # Specify the desired positions, ordered by device ID (starting with the jaws)
+    desired_positions = np.array([10.0, 0.5, 1.5707, 1.5707, 1.5707, 2.8, 3.14159])
+
+    # Send the positions to the Bravo in a single datagram
+    bravo.command_joints(ModeID.POSITION, desired_positions)
 
     # Shutdown the connection
     bravo.disconnect()
@@ -3,7 +3,6 @@ utility fxns for parsing bravo data
 """
 
 
-import struct
 import yaml
 
 import numpy as np
@@ -11,8 +10,7 @@ import xml.etree.ElementTree as ET
 
 from pybravo.protocol.packet_id import PacketID
 from pybravo.protocol.device_id import DeviceID
-from pybravo.protocol.packet import Packet
-from pybravo.protocol.mode_id import ModeID
+from pybravo.protocol.requests import REQUESTS
 
 
 class bcolors:
@@ -36,80 +34,24 @@ axis_map = {
     "bravo_axis_f": DeviceID.BEND_SHOULDER,
     "bravo_axis_g": DeviceID.ROTATE_BASE,
 }
-_position = Packet(
-    DeviceID.ALL_JOINTS, PacketID.REQUEST, bytes([PacketID.POSITION.value])
-)
-_velocity = Packet(
-    DeviceID.ALL_JOINTS, PacketID.REQUEST, bytes([PacketID.VELOCITY.value])
-)
-_current = Packet(
-    DeviceID.ALL_JOINTS, PacketID.REQUEST, bytes([PacketID.CURRENT.value])
-)
-_temperature = Packet(
-    DeviceID.ALL_JOINTS, PacketID.REQUEST, bytes([PacketID.TEMPERATURE.value])
-)
-_serial_number = Packet(
-    DeviceID.ALL_JOINTS, PacketID.REQUEST, bytes([PacketID.SERIAL_NUMBER.value])
-)
-_model_number = Packet(
-    DeviceID.ALL_JOINTS, PacketID.REQUEST, bytes([PacketID.MODEL_NUMBER.value])
-)
-_voltage = Packet(
-    DeviceID.ALL_JOINTS, PacketID.REQUEST, bytes([PacketID.VOLTAGE.value])
-)
-_version = Packet(
-    DeviceID.ALL_JOINTS, PacketID.REQUEST, bytes([PacketID.SOFTWARE_VERSION.value])
-)
-_mode = Packet(DeviceID.ALL_JOINTS, PacketID.REQUEST, bytes([PacketID.MODE.value]))
-_position_limits = Packet(
-    DeviceID.ALL_JOINTS, PacketID.REQUEST, bytes([PacketID.POSITION_LIMITS.value])
-)
-_velocity_limits = Packet(
-    DeviceID.ALL_JOINTS, PacketID.REQUEST, bytes([PacketID.VELOCITY_LIMITS.value])
-)
-_current_limits = Packet(
-    DeviceID.ALL_JOINTS, PacketID.REQUEST, bytes([PacketID.CURRENT_LIMITS.value])
-)
-_heartbeat_frequency = Packet(
-    DeviceID.ALL_JOINTS,
-    PacketID.REQUEST,
-    bytes([PacketID.HEARTBEAT_FREQUENCY.value]),
-)
-
 requests = {
-    PacketID.POSITION: _position,
-    PacketID.VELOCITY: _velocity,
-    PacketID.CURRENT: _current,
-    PacketID.TEMPERATURE: _temperature,
-    PacketID.SERIAL_NUMBER: _serial_number,
-    PacketID.MODEL_NUMBER: _model_number,
-    PacketID.VOLTAGE: _voltage,
-    PacketID.SOFTWARE_VERSION: _version,
-    PacketID.MODE: _mode,
-    PacketID.HEARTBEAT_FREQUENCY: _heartbeat_frequency,
-    PacketID.POSITION_LIMITS: _position_limits,
-    PacketID.VELOCITY_LIMITS: _velocity_limits,
-    PacketID.CURRENT_LIMITS: _current_limits,
-}
-
-
-def parse_data(self):
-    """parses bravo packet data based on protocol"""
-    if self.packet_id == PacketID.SOFTWARE_VERSION:
-        parsed_data = f"{self.data[0]}.{self.data[1]}.{self.data[2]}"
-    elif self.packet_id == PacketID.MODE:
-        parsed_data = ModeID(self.data[0])
-    elif self.packet_id in (
+    packet_id: REQUESTS[DeviceID.ALL_JOINTS, packet_id]
+    for packet_id in (
+        PacketID.POSITION,
+        PacketID.VELOCITY,
+        PacketID.CURRENT,
+        PacketID.TEMPERATURE,
+        PacketID.SERIAL_NUMBER,
+        PacketID.MODEL_NUMBER,
+        PacketID.VOLTAGE,
+        PacketID.SOFTWARE_VERSION,
+        PacketID.MODE,
+        PacketID.HEARTBEAT_FREQUENCY,
         PacketID.POSITION_LIMITS,
         PacketID.VELOCITY_LIMITS,
         PacketID.CURRENT_LIMITS,
-    ):
-        parsed_data = struct.unpack("ff", self.data)
-
-    else:
-        parsed_data = struct.unpack("<f", self.data)[0]
-
-    return parsed_data
+    )
+}
 
 
 def element_to_dict(element):
@@ -18,7 +18,15 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from .driver import BravoDriver
+from .driver import AsyncBravoDriver, BravoDriver, BravoFleet
 from .protocol import DeviceID, Packet, PacketID, ModeID
 
-__all__ = ["BravoDriver", "Packet", "PacketID", "DeviceID", "ModeID"]
+__all__ = [
+    "BravoDriver",
+    "AsyncBravoDriver",
+    "BravoFleet",
+    "Packet",
+    "PacketID",
+    "DeviceID",
+    "ModeID",
+]
@@ -0,0 +1,380 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Records the raw datagrams exchanged with the Bravo 7 to a compact binary file.
+
+A capture file starts with a short header, followed by one record for each datagram.
+Each record holds the monotonic time at which the datagram was sent or received (ns),
+the length of the datagram, its direction, and the raw datagram bytes. Records are
+only ever appended, and the writer buffers them in memory rather than syncing the file
+after every datagram.
+
+Each writer begins a new session with a marker record holding the wall-clock time at
+which it was opened. The monotonic clock has an arbitrary origin (e.g., it restarts
+when the machine reboots), so timestamps are only ordered within a session, and time
+range queries are answered separately for each session.
+
+The ``CaptureReader`` memory-maps the file, so captures can be iterated over or sliced
+by time without loading them into memory.
+
+Examples:
+    >>> with CaptureWriter("session.bravo") as recorder:
+    ...     bravo = BravoDriver(recorder=recorder)
+    ...     bravo.connect()
+    ...     record_session(bravo)
+    ...     bravo.disconnect()
+    >>> with CaptureReader("session.bravo") as capture:
+    ...     for record in capture.between(start, start + 1_000_000_000):
+    ...         print(record.direction, list(record.packets()))
+"""
+
+from __future__ import annotations
+
+import bisect
+import mmap
+import os
+import struct
+import threading
+import time
+from enum import Enum
+from typing import Iterator, NamedTuple
+
+from pybravo.protocol import Packet
+
+# The capture file header: the magic bytes and the format version
+MAGIC = b"BRAVOCAP"
+VERSION = 2
+_FILE_HEADER = struct.Struct("<8sH")
+
+# The record header: the timestamp (ns), the datagram length, and the direction
+_RECORD_HEADER = struct.Struct("<qHB")
+
+# Session markers are stored as records with a reserved direction, whose data is the
+# wall-clock time at which the session started (ns since the epoch)
+_SESSION = 0xFF
+_SESSION_DATA = struct.Struct("<q")
+
+
+class Direction(Enum):
+    """The direction that a datagram travelled in."""
+
+    RECEIVED = 0
+    SENT = 1
+
+
+class CaptureRecord(NamedTuple):
+    """A datagram read from a capture file."""
+
+    timestamp_ns: int
+    direction: Direction
+    data: bytes
+    session: int = 0
+
+    def packets(self) -> Iterator[Packet]:
+        """Decode the packets in the datagram.
+
+        Returns:
+            An iterator over the packets that could be decoded.
+        """
+        return Packet.iter_decode(self.data)
+
+
+class CaptureWriter:
+    """Appends datagrams to a capture file."""
+
+    def __init__(self, path: str | os.PathLike, buffer_size: int = 1024 * 1024) -> None:
+        """Open a capture file for writing.
+
+        New records are appended in a new session if the file already exists.
+
+        Args:
+            path: The path to the capture file.
+            buffer_size: The number of bytes to buffer before writing to the file.
+                Defaults to 1 MiB.
+
+        Raises:
+            ValueError: The file exists but is not a capture file.
+        """
+        self._file = open(path, "ab", buffering=buffer_size)
+        self._lock = threading.Lock()
+
+        if self._file.tell() == 0:
+            self._file.write(_FILE_HEADER.pack(MAGIC, VERSION))
+        else:
+            with open(path, "rb") as f:
+                _check_header(f.read(_FILE_HEADER.size))
+
+        self._file.write(
+            _RECORD_HEADER.pack(time.monotonic_ns(), _SESSION_DATA.size, _SESSION)
+        )
+        self._file.write(_SESSION_DATA.pack(time.time_ns()))
+
+    def __enter__(self) -> CaptureWriter:
+        """Use the writer as a context manager.
+
+        Returns:
+            The writer.
+        """
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Close the writer when leaving the context."""
+        self.close()
+
+    def write(
+        self,
+        direction: Direction,
+        data: bytes | bytearray | memoryview,
+        timestamp_ns: int | None = None,
+    ) -> None:
+        """Append a datagram to the capture.
+
+        Args:
+            direction: Whether the datagram was sent or received.
+            data: The raw datagram.
+            timestamp_ns: The time at which the datagram was sent or received, as
+                reported by ``time.monotonic_ns``. Defaults to the current time.
+        """
+        with self._lock:
+            # Take the timestamp while holding the lock so that the records are in
+            # chronological order
+            if timestamp_ns is None:
+                timestamp_ns = time.monotonic_ns()
+
+            self._file.write(
+                _RECORD_HEADER.pack(timestamp_ns, len(data), direction.value)
+            )
+            self._file.write(data)
+
+    def flush(self) -> None:
+        """Write any buffered records to the file."""
+        with self._lock:
+            self._file.flush()
+
+    def close(self) -> None:
+        """Flush the buffered records and close the file."""
+        with self._lock:
+            self._file.close()
+
+
+class CaptureReader:
+    """Reads the records from a memory-mapped capture file."""
+
+    def __init__(self, path: str | os.PathLike, index_stride: int = 1024) -> None:
+        """Open a capture file for reading.
+
+        Args:
+            path: The path to the capture file.
+            index_stride: The reader indexes the timestamp of every Nth record in each
+                session to support time range queries. Defaults to 1024.
+
+        Raises:
+            ValueError: The index stride is not positive.
+            ValueError: The file is not a capture file.
+        """
+        if index_stride < 1:
+            raise ValueError("The index stride must be at least one record.")
+
+        with open(path, "rb") as f:
+            _check_header(f.read(_FILE_HEADER.size))
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.index_stride = index_stride
+
+        # The sessions and their sparse (timestamp, offset) indexes are found on the
+        # first time range query
+        self._sessions: list[_Session] | None = None
+
+    def __enter__(self) -> CaptureReader:
+        """Use the reader as a context manager.
+
+        Returns:
+            The reader.
+        """
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Close the reader when leaving the context."""
+        self.close()
+
+    def __iter__(self) -> Iterator[CaptureRecord]:
+        """Iterate over every record in the capture.
+
+        Returns:
+            An iterator over the records, in the order that they were written.
+        """
+        return self._records(_FILE_HEADER.size, len(self._map), -1)
+
+    @property
+    def sessions(self) -> list[int | None]:
+        """The wall-clock time at which each session started (ns since the epoch).
+
+        The time is None for records that were written without a session marker.
+        """
+        return [session.started_ns for session in self._build_index()]
+
+    def between(
+        self, start_ns: int | None = None, end_ns: int | None = None
+    ) -> Iterator[CaptureRecord]:
+        """Iterate over the records within a time range.
+
+        Timestamps are only comparable within a session, so the range is applied to
+        each session in turn.
+
+        Args:
+            start_ns: The earliest timestamp to include (ns). If None, the records
+                start at the beginning of each session.
+            end_ns: The latest timestamp to include (ns). If None, the records continue
+                until the end of each session.
+
+        Yields:
+            The records in the time range, in the order that they were written.
+        """
+        for number, session in enumerate(self._build_index()):
+            offset = session.offset
+
+            if start_ns is not None:
+                # Start from the last indexed record before the start of the range
+                i = bisect.bisect_left(session.index_times, start_ns)
+                if i > 0:
+                    offset = session.index_offsets[i - 1]
+
+            for record in self._records(offset, session.end, number):
+                if end_ns is not None and record.timestamp_ns > end_ns:
+                    break
+                if start_ns is None or record.timestamp_ns >= start_ns:
+                    yield record
+
+    def close(self) -> None:
+        """Unmap the capture file."""
+        self._map.close()
+
+    def _records(self, offset: int, end: int, session: int) -> Iterator[CaptureRecord]:
+        """Iterate over the records starting at an offset.
+
+        A truncated record at the end of the file (e.g., from a crash while writing)
+        is ignored.
+
+        Args:
+            offset: The offset of the first record to read.
+            end: The offset at which to stop reading.
+            session: The number of the session that the first record belongs to, or
+                -1 if the first record is a session marker.
+
+        Yields:
+            The records from the offset to the end offset.
+        """
+        data = self._map
+        header_size = _RECORD_HEADER.size
+        unpack_from = _RECORD_HEADER.unpack_from
+
+        while offset + header_size <= end:
+            timestamp_ns, length, direction = unpack_from(data, offset)
+            offset += header_size
+
+            if offset + length > end:
+                return
+
+            if direction == _SESSION:
+                session += 1
+            else:
+                yield CaptureRecord(
+                    timestamp_ns,
+                    Direction(direction),
+                    data[offset : offset + length],
+                    max(session, 0),
+                )
+
+            offset += length
+
+    def _build_index(self) -> list[_Session]:
+        """Find the sessions and index the timestamp of every Nth record in each.
+
+        Returns:
+            The sessions in the capture, in the order that they were written.
+        """
+        if self._sessions is not None:
+            return self._sessions
+
+        sessions: list[_Session] = []
+
+        data = self._map
+        end = len(data)
+        offset = _FILE_HEADER.size
+        header_size = _RECORD_HEADER.size
+        unpack_from = _RECORD_HEADER.unpack_from
+        count = 0
+
+        while offset + header_size <= end:
+            timestamp_ns, length, direction = unpack_from(data, offset)
+            next_offset = offset + header_size + length
+
+            if direction == _SESSION:
+                if sessions:
+                    sessions[-1] = sessions[-1]._replace(end=offset)
+
+                (started_ns,) = _SESSION_DATA.unpack_from(data, offset + header_size)
+                sessions.append(_Session(started_ns, next_offset, end, [], []))
+                count = 0
+            else:
+                if not sessions:
+                    sessions.append(_Session(None, offset, end, [], []))
+
+                if count % self.index_stride == 0:
+                    sessions[-1].index_times.append(timestamp_ns)
+                    sessions[-1].index_offsets.append(offset)
+
+                count += 1
+
+            offset = next_offset
+
+        self._sessions = sessions
+        return sessions
+
+
+class _Session(NamedTuple):
+    """The location and sparse index of a session in a capture file."""
+
+    started_ns: int | None
+    offset: int
+    end: int
+    index_times: list[int]
+    index_offsets: list[int]
+
+
+def _check_header(header: bytes) -> None:
+    """Check that a file header describes a supported capture file.
+
+    Args:
+        header: The first bytes of the file.
+
+    Raises:
+        ValueError: The header is not a supported capture file header.
+    """
+    if len(header) < _FILE_HEADER.size:
+        raise ValueError("The file is not a Bravo capture file.")
+
+    magic, version = _FILE_HEADER.unpack(header)
+
+    if magic != MAGIC:
+        raise ValueError("The file is not a Bravo capture file.")
+
+    if version != VERSION:
+        raise ValueError(f"Unsupported capture file version {version}.")
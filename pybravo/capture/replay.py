@@ -0,0 +1,159 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Replays a capture through the receive path of a ``BravoDriver``.
+
+The ``CaptureReplay`` injects the datagrams that were received during a capture into a
+driver, so they are decoded and dispatched exactly as they were when the capture was
+recorded. Captures can be replayed in real time, at a multiple of real time, or as fast
+as possible to benchmark the decode and dispatch throughput.
+
+Examples:
+    >>> bravo = BravoDriver()
+    >>> bravo.attach_callback(PacketID.POSITION, controller.on_position)
+    >>> with CaptureReader("session.bravo") as capture:
+    ...     stats = CaptureReplay(bravo, speed=10.0).run(capture)
+    >>> stats.packets_per_second
+    251234.5
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING, NamedTuple
+
+from pybravo.capture.log import CaptureReader, Direction
+
+if TYPE_CHECKING:
+    from pybravo.driver import BravoDriver
+
+
+class ReplayStats(NamedTuple):
+    """The amount of traffic replayed and the time that it took."""
+
+    datagrams: int
+    packets: int
+    elapsed: float
+
+    @property
+    def datagrams_per_second(self) -> float:
+        """The mean number of datagrams replayed per second."""
+        return self.datagrams / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def packets_per_second(self) -> float:
+        """The mean number of packets replayed per second."""
+        return self.packets / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class CaptureReplay:
+    """Feeds the datagrams received during a capture into a driver."""
+
+    def __init__(self, driver: BravoDriver, speed: float | None = 1.0) -> None:
+        """Create a new replay.
+
+        Args:
+            driver: The driver to replay the capture through. The driver must not be
+                connected to a Bravo 7.
+            speed: The rate at which to replay the capture, relative to the rate at
+                which it was recorded. If None, the capture is replayed as fast as
+                possible. Defaults to 1.0 (real time).
+        """
+        if speed is not None and speed <= 0:
+            raise ValueError("The replay speed must be positive.")
+
+        self.driver = driver
+        self.speed = speed
+        self._stopped = threading.Event()
+
+    def run(
+        self,
+        capture: CaptureReader,
+        start_ns: int | None = None,
+        end_ns: int | None = None,
+    ) -> ReplayStats:
+        """Replay a capture, blocking until it finishes or the replay is stopped.
+
+        If the driver has a dispatcher, it is started for the duration of the replay
+        and every dispatched callback has finished when this returns.
+
+        Args:
+            capture: The capture to replay.
+            start_ns: The capture time to start replaying from (ns). If None, the
+                replay starts at the beginning of the capture.
+            end_ns: The capture time to stop replaying at (ns). If None, the replay
+                continues until the end of the capture.
+
+        Raises:
+            RuntimeError: The driver is connected to a Bravo 7.
+
+        Returns:
+            The number of datagrams and packets replayed and the time that it took.
+        """
+        if self.driver.address is not None:
+            raise RuntimeError("Captures can't be replayed into a connected driver!")
+
+        dispatcher = self.driver.dispatcher
+        self.driver._start_dispatcher()
+
+        self._stopped.clear()
+        handle_datagram = self.driver._handle_datagram
+        datagrams = 0
+        packets = 0
+        first_ns = 0
+        session = -1
+        start = paced_from = time.perf_counter()
+
+        try:
+            for record in capture.between(start_ns, end_ns):
+                if record.direction is not Direction.RECEIVED:
+                    continue
+
+                if self._stopped.is_set():
+                    break
+
+                if self.speed is not None:
+                    # Timestamps are only comparable within a session, so pace each
+                    # session relative to its first replayed record
+                    if record.session != session:
+                        session = record.session
+                        first_ns = record.timestamp_ns
+                        paced_from = time.perf_counter()
+
+                    due = (
+                        paced_from + (record.timestamp_ns - first_ns) / 1e9 / self.speed
+                    )
+                    delay = due - time.perf_counter()
+
+                    if delay > 0 and self._stopped.wait(delay):
+                        break
+
+                datagrams += 1
+                packets += handle_datagram(record.data)
+        finally:
+            if dispatcher is not None:
+                dispatcher.stop()
+
+        return ReplayStats(datagrams, packets, time.perf_counter() - start)
+
+    def stop(self) -> None:
+        """Stop a replay that is running on another thread."""
+        self._stopped.set()
@@ -18,6 +18,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+from .async_driver import AsyncBravoDriver
 from .driver import BravoDriver
+from .fleet import BravoFleet
 
-__all__ = ["BravoDriver"]
+__all__ = ["BravoDriver", "AsyncBravoDriver", "BravoFleet"]
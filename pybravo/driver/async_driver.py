@@ -0,0 +1,293 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Provides an asyncio interface to the Reach Bravo 7 manipulator.
+
+The ``AsyncBravoDriver`` provides the same functionality as the ``BravoDriver``, but
+receives packets on the running event loop instead of in a separate polling thread.
+Received packets can be consumed either by attaching callbacks or by iterating over an
+asynchronous packet stream.
+
+Examples:
+    >>> async with AsyncBravoDriver() as bravo:
+    ...     await bravo.send(REQUESTS[DeviceID.ALL_JOINTS, PacketID.POSITION])
+    ...     async for packet in bravo.packets(PacketID.POSITION):
+    ...         print(packet.value)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import AsyncIterator, Callable, Iterable
+
+from pybravo.protocol import Packet, PacketID
+from pybravo.protocol.packet import DEFAULT_MAX_DATAGRAM_SIZE
+
+# Signals to packet streams that the driver has been disconnected
+_CLOSED = object()
+
+
+class _BravoProtocol(asyncio.DatagramProtocol):
+    """Forwards the datagrams received from the Bravo to the driver."""
+
+    def __init__(self, driver: AsyncBravoDriver) -> None:
+        """Create a new datagram protocol.
+
+        Args:
+            driver: The driver to forward received datagrams to.
+        """
+        self._driver = driver
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        """Handle a datagram received from the Bravo.
+
+        Args:
+            data: The received datagram.
+            addr: The address that the datagram was received from.
+        """
+        self._driver._handle_datagram(data)
+
+    def error_received(self, exc: Exception) -> None:
+        """Handle an error reported by the transport.
+
+        Args:
+            exc: The error raised by the transport.
+        """
+        self._driver._logger.debug("An error occurred on the connection: %s", exc)
+
+
+class AsyncBravoDriver:
+    """Asynchronous interface for sending and receiving serial data from the Bravo 7."""
+
+    def __init__(self, max_queue_size: int = 1024) -> None:
+        """Create a new asynchronous driver.
+
+        Args:
+            max_queue_size: The maximum number of packets buffered for each packet
+                stream. When a stream falls behind, the oldest packets are dropped.
+                Defaults to 1024.
+        """
+        self.callbacks: dict[PacketID, list[Callable]] = {}
+        self.address: tuple[str, int] | None = None
+        self.max_datagram_size = DEFAULT_MAX_DATAGRAM_SIZE
+        self.max_queue_size = max_queue_size
+
+        self._transport: asyncio.DatagramTransport | None = None
+        self._streams: dict[PacketID | None, set[asyncio.Queue]] = {}
+        self._display_connected_status = True
+
+        logging.basicConfig()
+        self._logger = logging.getLogger("AsyncBravoDriver")
+        self._logger.setLevel(logging.INFO)
+
+    async def __aenter__(self) -> AsyncBravoDriver:
+        """Connect to the Bravo 7 with the default address.
+
+        Returns:
+            The connected driver.
+        """
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        """Disconnect from the Bravo 7.
+
+        Args:
+            args: The exception information, if any.
+        """
+        await self.disconnect()
+
+    async def connect(self, ip: str = "192.168.2.3", port: int = 6789) -> None:
+        """Establish a connection between the Bravo 7 and the driver.
+
+        Args:
+            ip: The IP address of the Bravo 7. Defaults to "192.168.2.3".
+            port: The port to connect with the Bravo 7 over. Defaults to 6789.
+        """
+        loop = asyncio.get_running_loop()
+
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _BravoProtocol(self), remote_addr=(ip, port)
+        )
+        self.address = (ip, port)
+
+    async def disconnect(self) -> None:
+        """Disconnect the driver from the Bravo 7 and end all packet streams."""
+        self.address = None
+
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+        for queues in self._streams.values():
+            for queue in queues:
+                self._put(queue, _CLOSED)
+
+        self._logger.info(
+            "Successfully shut down the connection to the Reach Bravo 7 manipulator."
+        )
+
+    async def send(self, packet: Packet) -> None:
+        """Send a packet to the Bravo 7.
+
+        Args:
+            packet: The serial packet to send.
+        """
+        self._get_transport().sendto(packet.encode())
+
+    async def send_many(self, packets: Iterable[Packet]) -> None:
+        """Send multiple packets to the Bravo 7 in as few datagrams as possible.
+
+        Args:
+            packets: The serial packets to send.
+        """
+        transport = self._get_transport()
+
+        for datagram in Packet.encode_many(packets, self.max_datagram_size):
+            transport.sendto(datagram)
+
+    def attach_callback(self, packet_id: PacketID, callback: Callable) -> None:
+        """Bind a callback to the given packet type.
+
+        Callbacks are executed on the event loop, so they should not block.
+
+        Args:
+            packet_id: The ID of the packet that, when received, should signal the
+                callback.
+            callback: The callback to execute when a packet with the given ID is
+                received.
+        """
+        if packet_id not in self.callbacks:
+            self.callbacks[packet_id] = []
+
+        if callback not in self.callbacks[packet_id]:
+            self.callbacks[packet_id].append(callback)
+
+    async def packets(self, *packet_ids: PacketID) -> AsyncIterator[Packet]:
+        """Iterate over the packets received from the Bravo 7.
+
+        The stream ends when the driver is disconnected. Cancelling the task that is
+        iterating over the stream unsubscribes it.
+
+        Args:
+            packet_ids: The IDs of the packets to receive. If no IDs are provided, all
+                packets are received.
+
+        Yields:
+            The received packets, in the order that they were received.
+        """
+        queue: asyncio.Queue = asyncio.Queue(self.max_queue_size)
+        keys: tuple[PacketID | None, ...] = packet_ids if packet_ids else (None,)
+
+        for key in keys:
+            self._streams.setdefault(key, set()).add(queue)
+
+        try:
+            while True:
+                packet = await queue.get()
+
+                if packet is _CLOSED:
+                    return
+
+                yield packet
+        finally:
+            for key in keys:
+                self._streams[key].discard(queue)
+
+    def _get_transport(self) -> asyncio.DatagramTransport:
+        """Get the transport used to communicate with the Bravo 7.
+
+        Raises:
+            RuntimeError: The driver has not been connected.
+
+        Returns:
+            The datagram transport.
+        """
+        if self._transport is None:
+            raise RuntimeError(
+                "Packets can't be sent without first establishing a connection!"
+            )
+
+        return self._transport
+
+    @staticmethod
+    def _put(queue: asyncio.Queue, item: object) -> None:
+        """Add an item to a stream, dropping the oldest item if the stream is full.
+
+        Args:
+            queue: The stream queue.
+            item: The item to add.
+        """
+        if queue.full():
+            queue.get_nowait()
+
+        queue.put_nowait(item)
+
+    def _handle_datagram(self, data: bytes) -> None:
+        """Decode a received datagram and dispatch each of its packets.
+
+        Args:
+            data: The received datagram.
+        """
+        for packet in Packet.iter_decode(data, self._on_decode_error):
+            self._handle_packet(packet)
+
+    def _on_decode_error(
+        self, data: bytes | bytearray | memoryview, ex: Exception
+    ) -> None:
+        """Log a frame that could not be decoded.
+
+        Args:
+            data: The frame that could not be decoded.
+            ex: The exception raised while decoding the frame.
+        """
+        self._logger.debug(
+            "An error occurred while attempting to decode the data: %r, %s",
+            bytes(data),
+            ex,
+        )
+
+    def _handle_packet(self, packet: Packet) -> None:
+        """Deliver a received packet to its streams and callbacks.
+
+        Args:
+            packet: The received packet.
+        """
+        if self._display_connected_status:
+            self._logger.info(
+                "Successfully established a connection to the Reach Bravo 7"
+                " manipulator."
+            )
+            self._display_connected_status = False
+
+        for key in (packet.packet_id, None):
+            for queue in self._streams.get(key, ()):
+                self._put(queue, packet)
+
+        for cb in self.callbacks.get(packet.packet_id, ()):
+            try:
+                cb(packet)
+            except Exception as ex:
+                self._logger.warning(
+                    "An exception occurred while trying to execute a callback for the"
+                    " packet %s.",
+                    ex,
+                )
@@ -0,0 +1,291 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Sends the latest command setpoints to the Bravo 7 at a fixed rate.
+
+``BravoDriver.send`` writes every packet to the socket immediately, so a controller
+that runs faster than the link to the arm queues setpoints that are already stale by
+the time that they arrive. The ``CommandChannel`` owned by each ``BravoDriver`` instead
+holds a single pending packet for each (device ID, packet ID) slot. Writing to a slot
+replaces its pending packet, and a timer thread sends the pending packets of every slot
+together at a fixed rate. Link usage is therefore bounded by the rate, no matter how
+often the controller writes, and the arm always receives the newest setpoints.
+
+Examples:
+    >>> bravo = BravoDriver()
+    >>> bravo.connect()
+    >>> bravo.commands.rate = 200.0
+    >>> for velocity in controller:
+    ...     bravo.commands.write(
+    ...         Packet.from_value(DeviceID.BEND_ELBOW, PacketID.VELOCITY, velocity)
+    ...     )
+    >>> bravo.commands.stats()
+    ChannelStats(written=5000, sent=1000, superseded=4000, discarded=0, flushes=1000,
+    pending=0)
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable, Iterable, NamedTuple
+
+from pybravo.protocol import DeviceID, Packet, PacketID
+
+
+class ChannelStats(NamedTuple):
+    """A snapshot of the command channel counters."""
+
+    written: int
+    sent: int
+
+    # Packets that were replaced by a newer packet for the same slot before being sent
+    superseded: int
+
+    # Packets that were still pending when the channel was stopped
+    discarded: int
+
+    flushes: int
+    pending: int
+
+
+class CommandChannel:
+    """Holds the latest packet for each command slot and sends them at a fixed rate."""
+
+    def __init__(
+        self, send: Callable[[list[Packet]], None], rate: float = 100.0
+    ) -> None:
+        """Create a new command channel.
+
+        Args:
+            send: Sends a batch of packets in as few datagrams as possible.
+            rate: The maximum rate at which the pending packets are sent (Hz). Defaults
+                to 100.
+        """
+        self._send = send
+        self.rate = rate
+
+        self._slots: dict[tuple[DeviceID | int, PacketID | int], Packet] = {}
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread: threading.Thread | None = None
+        self._next_flush = 0.0
+        self._logger = logging.getLogger("BravoDriver")
+
+        self._written = 0
+        self._sent = 0
+        self._superseded = 0
+        self._discarded = 0
+        self._flushes = 0
+
+    @property
+    def rate(self) -> float:
+        """The maximum rate at which the pending packets are sent (Hz)."""
+        return 1 / self._period
+
+    @rate.setter
+    def rate(self, rate: float) -> None:
+        if rate <= 0:
+            raise ValueError("The command rate must be positive.")
+
+        self._period = 1 / rate
+
+    def write(self, packet: Packet) -> None:
+        """Replace the pending packet of a slot.
+
+        Args:
+            packet: The packet to send. Its device and packet ID determine its slot.
+
+        Raises:
+            RuntimeError: The channel is not running (e.g., the driver is disconnected).
+        """
+        self.write_many((packet,))
+
+    def write_many(self, packets: Iterable[Packet]) -> None:
+        """Replace the pending packets of several slots at once.
+
+        The packets are guaranteed to be sent in the same flush.
+
+        Args:
+            packets: The packets to send.
+
+        Raises:
+            RuntimeError: The channel is not running (e.g., the driver is disconnected).
+        """
+        with self._cond:
+            # Setpoints written while stopped would be stale by the time they are sent
+            if not self._running:
+                raise RuntimeError(
+                    "Commands can't be written without first establishing a connection!"
+                )
+
+            idle = not self._slots
+
+            for packet in packets:
+                key = (packet.device_id, packet.packet_id)
+
+                if key in self._slots:
+                    self._superseded += 1
+
+                self._slots[key] = packet
+                self._written += 1
+
+            # The timer only needs to be woken up when it is waiting for a write
+            if idle and self._slots:
+                self._start_thread()
+                self._cond.notify()
+
+    def flush(self) -> int:
+        """Send the pending packets immediately.
+
+        Returns:
+            The number of packets sent.
+        """
+        with self._cond:
+            packets = self._take()
+
+        return self._send_packets(packets)
+
+    def stats(self) -> ChannelStats:
+        """Get a snapshot of the command channel counters.
+
+        Returns:
+            The number of packets written, sent, superseded, and discarded, the number
+            of flushes, and the number of pending packets.
+        """
+        with self._cond:
+            return ChannelStats(
+                self._written,
+                self._sent,
+                self._superseded,
+                self._discarded,
+                self._flushes,
+                len(self._slots),
+            )
+
+    def start(self) -> None:
+        """Start sending the pending packets."""
+        with self._cond:
+            if self._running:
+                return
+
+            self._running = True
+            self._next_flush = time.monotonic()
+
+            # Never send setpoints from before the channel was started
+            self._discarded += len(self._slots)
+            self._slots.clear()
+
+    def stop(self) -> None:
+        """Stop sending the pending packets and discard them.
+
+        Pending setpoints are stale by the time that the channel is started again, so
+        they are never sent on a later connection.
+        """
+        with self._cond:
+            self._running = False
+            self._discarded += len(self._slots)
+            self._slots.clear()
+            self._cond.notify()
+
+            thread = self._thread
+            self._thread = None
+
+        if thread is not None:
+            thread.join()
+
+    def _start_thread(self) -> None:
+        """Start the timer thread if it isn't already running.
+
+        The thread is only started once something has been written, so drivers that
+        never use the channel don't need an extra thread. The caller must hold the
+        channel lock.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        """Send the pending packets at the configured rate until the channel stops."""
+        while True:
+            with self._cond:
+                while self._running:
+                    if self._slots:
+                        timeout = self._next_flush - time.monotonic()
+
+                        if timeout <= 0:
+                            break
+                    else:
+                        timeout = None
+
+                    self._cond.wait(timeout)
+
+                if not self._running:
+                    return
+
+                # Advance by whole periods so the rate doesn't drift. After the channel
+                # has been idle, restart the schedule from now so that a new write is
+                # sent immediately without exceeding the rate.
+                now = time.monotonic()
+                self._next_flush += self._period
+                if self._next_flush <= now:
+                    self._next_flush = now + self._period
+
+                packets = self._take()
+
+            self._send_packets(packets)
+
+    def _take(self) -> list[Packet]:
+        """Remove the pending packets.
+
+        The caller must hold the channel lock.
+
+        Returns:
+            The pending packets, in the order that their slots were first written.
+        """
+        packets = list(self._slots.values())
+        self._slots.clear()
+
+        return packets
+
+    def _send_packets(self, packets: list[Packet]) -> int:
+        """Send a batch of packets and count them.
+
+        Args:
+            packets: The packets to send.
+
+        Returns:
+            The number of packets sent.
+        """
+        if not packets:
+            return 0
+
+        try:
+            self._send(packets)
+        except (OSError, RuntimeError) as ex:
+            self._logger.warning("Failed to send the pending commands: %s", ex)
+            return 0
+
+        with self._cond:
+            self._sent += len(packets)
+            self._flushes += 1
+
+        return len(packets)
@@ -0,0 +1,281 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Runs packet callbacks outside of the thread that receives packets.
+
+By default, the ``BravoDriver`` executes callbacks on its polling thread, so a slow
+callback delays reading from the socket. A ``CallbackDispatcher`` decouples the two: the
+polling thread only decodes packets and places them in a bounded queue, and a pool of
+worker threads (or processes) executes the callbacks. When the queue is full, the
+configured ``DropPolicy`` determines which packets are discarded.
+
+Examples:
+    >>> dispatcher = CallbackDispatcher(max_size=256, policy=DropPolicy.LATEST_PER_KEY)
+    >>> bravo = BravoDriver(dispatcher=dispatcher)
+    >>> bravo.attach_callback(PacketID.POSITION, plot_joint_position)
+    >>> dispatcher.stats()
+    DispatchStats(submitted=1024, dispatched=1020, dropped=4, depth=0, max_depth=12)
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from enum import Enum
+from typing import Callable, Iterable, NamedTuple
+
+from pybravo.protocol import Packet
+
+
+class DropPolicy(Enum):
+    """Determines what happens when a packet is submitted to a full dispatch queue."""
+
+    # Discard the oldest queued packet to make room for the new one
+    DROP_OLDEST = 0
+
+    # Keep only the newest packet for each (device ID, packet ID) pair. Superseded
+    # packets are counted as dropped.
+    LATEST_PER_KEY = 1
+
+    # Block the receiving thread until there is room in the queue
+    BLOCK = 2
+
+
+class DispatchStats(NamedTuple):
+    """A snapshot of the dispatch queue counters."""
+
+    submitted: int
+    dispatched: int
+    dropped: int
+    depth: int
+    max_depth: int
+
+
+class CallbackDispatcher:
+    """Executes packet callbacks on a pool of workers fed by a bounded queue."""
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        policy: DropPolicy = DropPolicy.DROP_OLDEST,
+        workers: int = 1,
+        use_processes: bool = False,
+    ) -> None:
+        """Create a new callback dispatcher.
+
+        Args:
+            max_size: The maximum number of packets to hold in the queue. Defaults to
+                1024.
+            policy: The policy used when the queue is full. Defaults to DROP_OLDEST.
+            workers: The number of worker threads executing callbacks. Defaults to 1,
+                which preserves the order in which packets were received.
+            use_processes: Execute the callbacks in a pool of ``workers`` processes
+                instead of in the worker threads. Callbacks must then be picklable
+                (e.g., module-level functions). Defaults to False.
+        """
+        if max_size < 1:
+            raise ValueError("The dispatch queue must hold at least one packet.")
+
+        if workers < 1:
+            raise ValueError("At least one worker is required to execute callbacks.")
+
+        self.max_size = max_size
+        self.policy = policy
+        self.workers = workers
+        self.use_processes = use_processes
+
+        self._queue: deque[Packet] = deque()
+        self._latest: OrderedDict[tuple, Packet] = OrderedDict()
+        self._cond = threading.Condition()
+        self._running = False
+        self._threads: list[threading.Thread] = []
+        self._executor: Executor | None = None
+
+        self._callbacks_for: Callable[[Packet], Iterable[Callable]] = lambda _: ()
+        self._on_error: Callable[[Packet, Exception], None] = lambda *_: None
+        self._on_executed: Callable[[Packet, Callable, int], None] | None = None
+        self._on_dropped: Callable[[Packet], None] | None = None
+
+        self._submitted = 0
+        self._dispatched = 0
+        self._dropped = 0
+        self._max_depth = 0
+
+    def __len__(self) -> int:
+        """Get the number of packets waiting to be dispatched.
+
+        Returns:
+            The current queue depth.
+        """
+        return len(self._queue) + len(self._latest)
+
+    def start(
+        self,
+        callbacks_for: Callable[[Packet], Iterable[Callable]],
+        on_error: Callable[[Packet, Exception], None],
+        on_executed: Callable[[Packet, Callable, int], None] | None = None,
+        on_dropped: Callable[[Packet], None] | None = None,
+    ) -> None:
+        """Start the workers.
+
+        Args:
+            callbacks_for: Gets the callbacks that should be executed for a packet.
+            on_error: Handles an exception raised by a callback.
+            on_executed: An optional function called after each callback with the
+                packet, the callback, and the time that the callback took (ns).
+                Defaults to None.
+            on_dropped: An optional function called on the submitting thread with each
+                packet that is discarded from the queue. Defaults to None.
+        """
+        self._callbacks_for = callbacks_for
+        self._on_error = on_error
+        self._on_executed = on_executed
+        self._on_dropped = on_dropped
+        self._running = True
+
+        if self.use_processes:
+            self._executor = ProcessPoolExecutor(self.workers)
+
+        self._threads = [
+            threading.Thread(target=self._work, daemon=True)
+            for _ in range(self.workers)
+        ]
+
+        for t in self._threads:
+            t.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop the workers after the queued packets have been dispatched.
+
+        Args:
+            timeout: The maximum amount of time to wait for each worker (s).
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+        for t in self._threads:
+            t.join(timeout)
+
+        self._threads = []
+
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def submit(self, packet: Packet) -> None:
+        """Add a packet to the dispatch queue.
+
+        Args:
+            packet: The packet whose callbacks should be executed.
+        """
+        with self._cond:
+            self._submitted += 1
+
+            dropped: Packet | None = None
+
+            if self.policy is DropPolicy.LATEST_PER_KEY:
+                key = (packet.device_id, packet.packet_id)
+
+                if key in self._latest:
+                    dropped = self._latest[key]
+                elif len(self._latest) >= self.max_size:
+                    _, dropped = self._latest.popitem(last=False)
+
+                self._latest[key] = packet
+            else:
+                if len(self._queue) >= self.max_size:
+                    if self.policy is DropPolicy.BLOCK:
+                        while len(self._queue) >= self.max_size and self._running:
+                            self._cond.wait()
+                    else:
+                        dropped = self._queue.popleft()
+
+                self._queue.append(packet)
+
+            if dropped is not None:
+                self._dropped += 1
+                if self._on_dropped is not None:
+                    self._on_dropped(dropped)
+
+            self._max_depth = max(self._max_depth, len(self._queue) + len(self._latest))
+
+            self._cond.notify_all()
+
+    def stats(self) -> DispatchStats:
+        """Get a snapshot of the dispatch counters.
+
+        Returns:
+            The number of packets submitted, dispatched, and dropped, and the current
+            and maximum queue depth.
+        """
+        with self._cond:
+            return DispatchStats(
+                self._submitted,
+                self._dispatched,
+                self._dropped,
+                len(self._queue) + len(self._latest),
+                self._max_depth,
+            )
+
+    def _next(self) -> Packet | None:
+        """Wait for the next packet to dispatch.
+
+        Returns:
+            The next packet, or None if the dispatcher has stopped and the queue is
+            empty.
+        """
+        with self._cond:
+            while not self._queue and not self._latest:
+                if not self._running:
+                    return None
+                self._cond.wait()
+
+            if self._queue:
+                packet = self._queue.popleft()
+            else:
+                _, packet = self._latest.popitem(last=False)
+
+            # Wake up the receiving thread if it is blocked on a full queue
+            self._cond.notify_all()
+
+            return packet
+
+    def _work(self) -> None:
+        """Execute the callbacks for queued packets until the dispatcher stops."""
+        while (packet := self._next()) is not None:
+            for cb in self._callbacks_for(packet):
+                start = time.perf_counter_ns()
+
+                try:
+                    if self._executor is not None:
+                        self._executor.submit(cb, packet).result()
+                    else:
+                        cb(packet)
+                except Exception as ex:
+                    self._on_error(packet, ex)
+
+                if self._on_executed is not None:
+                    self._on_executed(packet, cb, time.perf_counter_ns() - start)
+
+            with self._cond:
+                self._dispatched += 1
@@ -30,23 +30,92 @@ Examples:
             DeviceID.LINEAR_JAWS, PacketID.REQUEST, bytes([PacketID.POSITION.value])
         )
     >>> bravo.send(packet)
+    >>> bravo.send_many([packet, other_packet])
 """
 
 import atexit
 import logging
+import selectors
 import socket
 import threading
-from typing import Callable
+import time
+from concurrent.futures import Future
+from typing import Callable, Iterable
 
-from pybravo.protocol import Packet, PacketID
+import numpy as np
+from numpy.typing import ArrayLike
+
+from pybravo.capture import CaptureWriter, Direction
+from pybravo.driver.channel import CommandChannel
+from pybravo.driver.dispatch import CallbackDispatcher
+from pybravo.driver.metrics import DriverMetrics, MetricsSnapshot
+from pybravo.driver.receive import ReceiveRing, ReceiveStats
+from pybravo.driver.requests import RequestTracker
+from pybravo.driver.scheduler import PollScheduler
+from pybravo.driver.tracing import DriverTracer
+from pybravo.protocol import (
+    JOINTS,
+    REQUESTS,
+    DeviceID,
+    JointCommandEncoder,
+    ModeID,
+    Packet,
+    PacketID,
+    frame,
+)
+from pybravo.protocol.device_id import DEVICE_IDS
+from pybravo.protocol.packet import DEFAULT_MAX_DATAGRAM_SIZE
+from pybravo.protocol.packet_id import PACKET_IDS
+from pybravo.state import JointStateCache
+
+# The maximum number of packet IDs that can be requested in a single REQUEST packet
+MAX_REQUESTED_PACKETS = 10
+
+# The maximum heartbeat frequency, which is sent as a single byte (Hz)
+MAX_HEARTBEAT_FREQUENCY = 255
+
+# Setpoints are sent as single-precision floats
+_MAX_SETPOINT = float(np.finfo(np.float32).max)
+
+# The packets used to command a setpoint and to report its limits in each mode
+_COMMAND_PACKET_IDS = {
+    ModeID.POSITION: PacketID.POSITION,
+    ModeID.VELOCITY: PacketID.VELOCITY,
+    ModeID.CURRENT: PacketID.CURRENT,
+}
+_NO_LIMITS = ([-_MAX_SETPOINT] * len(JOINTS), [_MAX_SETPOINT] * len(JOINTS))
+_LIMIT_PACKET_IDS = {
+    ModeID.POSITION: PacketID.POSITION_LIMITS,
+    ModeID.VELOCITY: PacketID.VELOCITY_LIMITS,
+    ModeID.CURRENT: PacketID.CURRENT_LIMITS,
+}
 
 
 class BravoDriver:
     """Low-level interface for sending and receiving serial data from the Bravo 7."""
 
-    def __init__(self) -> None:
-        """Create a new driver."""
+    def __init__(
+        self,
+        dispatcher: CallbackDispatcher | None = None,
+        recorder: CaptureWriter | None = None,
+        tracer: DriverTracer | None = None,
+    ) -> None:
+        """Create a new driver.
+
+        Args:
+            dispatcher: An optional dispatcher used to execute the callbacks outside of
+                the thread that receives packets. If None, the callbacks are executed
+                on the receiving thread. Defaults to None.
+            recorder: An optional capture writer that records every datagram sent and
+                received by the driver. Defaults to None.
+            tracer: An optional tracer that times each stage of the receive path and
+                flags slow callbacks. Defaults to None.
+        """
         self.callbacks: dict[PacketID, list[Callable]] = {}
+        self.listeners: list[Callable[[Packet], object]] = []
+        self.dispatcher = dispatcher
+        self.recorder = recorder
+        self.tracer = tracer
 
         # Leave this private because we don't want anyone to accidentally disable the
         # polling thread
@@ -57,14 +126,51 @@ class BravoDriver:
         # when the connection happens
         self.address: tuple[str, int] | None = None
 
+        # The largest datagram to send when batching multiple packets together
+        self.max_datagram_size = DEFAULT_MAX_DATAGRAM_SIZE
+
+        # Count the traffic handled by the driver and measure its latency
+        self.metrics = DriverMetrics()
+
+        # The latest state of each joint, updated on the receiving thread
+        self.state = JointStateCache()
+
+        # Keep track of the requests that are waiting for a response
+        self._requests = RequestTracker(
+            lambda _, rtt_ns: self.metrics.request_rtt.record(rtt_ns)
+        )
+
+        # Whole-arm commands are encoded into preallocated datagrams and checked
+        # against the joint limits once they are known
+        self._command_encoders = {
+            mode: JointCommandEncoder(packet_id)
+            for mode, packet_id in _COMMAND_PACKET_IDS.items()
+        }
+        self._command_lock = threading.Lock()
+        self._joint_limits: dict[ModeID, tuple[list[float], list[float]]] = {}
+
+        # Periodically request the subscribed packets while connected
+        self.scheduler = PollScheduler(self._send_requests)
+
+        # Send the latest setpoint written to each command slot at a fixed rate
+        self.commands = CommandChannel(self.send_many)
+
+        # The selector used by the polling thread while connected
+        self._selector: selectors.BaseSelector | None = None
+
+        # Received datagrams are read into a preallocated ring of buffers
+        self._ring = ReceiveRing()
+        self._wakeups = 0
+        self._datagrams = 0
+        self._max_datagrams_per_wakeup = 0
+
         # Configure the logger
         logging.basicConfig()
         self._logger = logging.getLogger("BravoDriver")
         self._logger.setLevel(logging.INFO)
 
         # Create a thread to poll for incoming packets
-        self._poll_t = threading.Thread(target=self._poll)
-        self._poll_t.setDaemon(True)
+        self._poll_t = threading.Thread(target=self._poll, daemon=True)
 
         # Shutdown the connection on exit
         atexit.register(self.disconnect)
@@ -76,23 +182,51 @@ class BravoDriver:
             ip: The IP address of the Bravo 7. Defaults to "192.168.2.4".
             port: The port to connect with the Bravo 7 over. Defaults to 6789.
         """
-        self.address = (ip, port)
+        self._open(ip, port)
 
-        # Configure a new socket with the Bravo
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.sock.settimeout(1)
+        # The polling thread waits on both the socket and a wakeup channel so that it
+        # can be stopped immediately instead of waiting for a timeout
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.sock, selectors.EVENT_READ)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
 
-        self._running = True
+        # Threads can only be started once, so use a new one for each connection
+        self._poll_t = threading.Thread(target=self._poll, daemon=True)
         self._poll_t.start()
 
     def disconnect(self) -> None:
         """Disconnect the driver from the Bravo 7."""
+        if not self._running:
+            return
+
+        # Stop polling and commanding while the socket is still open
+        self.scheduler.stop()
+        self.commands.stop()
+
         # Reset the address for future connections
         self.address = None
 
-        # Stop the thread
+        # Stop the thread. Drivers managed by a BravoFleet don't have their own.
         self._running = False
-        self._poll_t.join()
+
+        if self._selector is not None:
+            self._wakeup_w.send(b"\x00")
+            self._poll_t.join()
+
+            self._selector.close()
+            self._selector = None
+            self._wakeup_r.close()
+            self._wakeup_w.close()
+
+        self.sock.close()
+
+        # Nothing else will be received, so don't leave anyone waiting on a response
+        self._requests.cancel_all()
+
+        if self.dispatcher is not None:
+            self.dispatcher.stop()
         self._logger.info(
             "Successfully shut down the connection to the Reach Bravo 7 manipulator."
         )
@@ -108,7 +242,317 @@ class BravoDriver:
                 "Packets can't be sent without first establishing a connection!"
             )
 
-        self.sock.sendto(packet.encode(), self.address)
+        self._send_datagram(packet.encode())
+        self.metrics.sent((packet,))
+
+    def send_many(self, packets: Iterable[Packet]) -> None:
+        """Send multiple packets to the Bravo 7 in as few datagrams as possible.
+
+        Args:
+            packets: The serial packets to send.
+        """
+        if self.address is None:
+            raise RuntimeError(
+                "Packets can't be sent without first establishing a connection!"
+            )
+
+        packets = list(packets)
+
+        for datagram in Packet.encode_many(packets, self.max_datagram_size):
+            self._send_datagram(datagram)
+
+        self.metrics.sent(packets)
+
+    def request(
+        self, device_id: DeviceID, packet_id: PacketID, timeout: float | None = None
+    ) -> Future:
+        """Request a packet from a device on the Bravo 7.
+
+        Any number of requests may be outstanding at once. Responses are matched to
+        requests by their device and packet ID.
+
+        Args:
+            device_id: The device to request the packet from. This must be a single
+                device, not ALL_JOINTS.
+            packet_id: The ID of the packet to request.
+            timeout: The maximum amount of time to wait for the response (s). If None,
+                the request never times out.
+
+        Returns:
+            A future that resolves to the response packet, or raises a
+            ``TimeoutError`` if no response is received before the timeout.
+        """
+        return self.request_many([(device_id, packet_id)], timeout)[0]
+
+    def request_many(
+        self,
+        requests: Iterable[tuple[DeviceID, PacketID]],
+        timeout: float | None = None,
+    ) -> list[Future]:
+        """Request multiple packets from the Bravo 7 at once.
+
+        The requests to each device are combined into as few REQUEST packets as
+        possible, and all of the REQUEST packets are sent together so that the full
+        batch completes in a single round trip.
+
+        Args:
+            requests: The (device ID, packet ID) pairs to request.
+            timeout: The maximum amount of time to wait for each response (s). If None,
+                the requests never time out.
+
+        Returns:
+            A future for each request, in the order that they were provided.
+        """
+        if self.address is None:
+            raise RuntimeError(
+                "Packets can't be sent without first establishing a connection!"
+            )
+
+        futures = []
+        packet_ids: dict[DeviceID, list[PacketID]] = {}
+
+        try:
+            for device_id, packet_id in requests:
+                futures.append(self._requests.add(device_id, packet_id, timeout))
+                packet_ids.setdefault(device_id, []).append(packet_id)
+        except ValueError:
+            for future in futures:
+                future.cancel()
+            raise
+
+        try:
+            self.send_many(self._request_packets(packet_ids))
+        except OSError:
+            for future in futures:
+                future.cancel()
+            raise
+
+        return futures
+
+    def command_joints(self, mode: ModeID, values: ArrayLike) -> None:
+        """Send a setpoint to every joint in a single datagram.
+
+        The setpoints are checked against the joint limits set by
+        ``set_joint_limits`` or ``load_joint_limits``. Until the limits of a mode are
+        known, only non-finite setpoints are rejected.
+
+        Args:
+            mode: Whether the values are POSITION, VELOCITY, or CURRENT setpoints.
+            values: The setpoint of each joint, ordered by device ID (i.e., starting
+                with the jaws).
+
+        Raises:
+            RuntimeError: The driver is not connected.
+            ValueError: The mode can't be commanded, the wrong number of values was
+                provided, or a value is outside of the joint limits.
+        """
+        if self.address is None:
+            raise RuntimeError(
+                "Packets can't be sent without first establishing a connection!"
+            )
+
+        encoder = self._command_encoders.get(mode)
+        if encoder is None:
+            raise ValueError(f"Joints can't be commanded in {mode} mode.")
+
+        array = np.asarray(values, dtype=np.float64)
+        if array.shape != (len(JOINTS),):
+            raise ValueError(
+                f"A setpoint is required for each of the {len(JOINTS)} joints, got an"
+                f" array with shape {array.shape}."
+            )
+
+        # Comparing the few values in Python is faster than comparing small arrays.
+        # NaN fails every comparison, so it is always rejected.
+        setpoints = array.tolist()
+        lower, upper = self._joint_limits.get(mode, _NO_LIMITS)
+        bounds = zip(setpoints, lower, upper, strict=True)
+
+        if not all(low <= value <= high for value, low, high in bounds):
+            joints = [
+                JOINTS[i].name
+                for i, (value, low, high) in enumerate(
+                    zip(setpoints, lower, upper, strict=True)
+                )
+                if not low <= value <= high
+            ]
+            raise ValueError(
+                f"The {mode.name.lower()} setpoints of {joints} are outside of the"
+                " joint limits."
+            )
+
+        # The encoder reuses its buffer, so finish sending before the next command
+        with self._command_lock:
+            self._send_datagram(encoder.encode(setpoints))
+
+        self.metrics.sent_command(encoder)
+
+    def set_joint_limits(
+        self, mode: ModeID, lower: ArrayLike, upper: ArrayLike
+    ) -> None:
+        """Set the limits that ``command_joints`` checks the setpoints against.
+
+        Args:
+            mode: The mode that the limits apply to (POSITION, VELOCITY, or CURRENT).
+            lower: The lowest setpoint of each joint, ordered by device ID.
+            upper: The highest setpoint of each joint, ordered by device ID.
+
+        Raises:
+            ValueError: The mode can't be commanded, or the limits are invalid.
+        """
+        if mode not in _COMMAND_PACKET_IDS:
+            raise ValueError(f"Joints can't be commanded in {mode} mode.")
+
+        lower = np.array(lower, dtype=np.float64)
+        upper = np.array(upper, dtype=np.float64)
+
+        if lower.shape != (len(JOINTS),) or upper.shape != (len(JOINTS),):
+            raise ValueError(
+                f"A limit is required for each of the {len(JOINTS)} joints."
+            )
+
+        if not (lower <= upper).all():
+            raise ValueError("The lower limits must not exceed the upper limits.")
+
+        self._joint_limits[mode] = (lower.tolist(), upper.tolist())
+
+    def load_joint_limits(self, timeout: float = 1.0) -> None:
+        """Read the position, velocity, and current limits of every joint.
+
+        The limits are cached and used by ``command_joints`` to check the setpoints.
+
+        Args:
+            timeout: The maximum amount of time to wait for the limits (s). Defaults to
+                1.0.
+
+        Raises:
+            TimeoutError: A joint did not report its limits before the timeout.
+        """
+        futures = self.request_many(
+            [
+                (device_id, packet_id)
+                for packet_id in _LIMIT_PACKET_IDS.values()
+                for device_id in JOINTS
+            ],
+            timeout,
+        )
+
+        for i, mode in enumerate(_LIMIT_PACKET_IDS):
+            # Each joint reports its (maximum, minimum) limits
+            limits = np.array(
+                [
+                    future.result().value
+                    for future in futures[i * len(JOINTS) : (i + 1) * len(JOINTS)]
+                ]
+            )
+            self.set_joint_limits(mode, limits.min(axis=1), limits.max(axis=1))
+
+    def configure_heartbeat(
+        self,
+        packet_ids: Iterable[PacketID],
+        frequency: int,
+        device_id: DeviceID = DeviceID.ALL_JOINTS,
+        timeout: float = 1.0,
+    ) -> None:
+        """Configure the packets that the Bravo 7 streams without being requested.
+
+        Each device sends its heartbeat packets at the given frequency. The streamed
+        packets are handled by the same callbacks and listeners as any other packet,
+        without the request that polling would send for each sample. The configuration
+        is read back from each device to verify that it was applied.
+
+        Args:
+            packet_ids: The IDs of the packets to stream. An empty list (or a frequency
+                of 0) stops the stream.
+            frequency: The rate at which to stream the packets (Hz).
+            device_id: The device to configure. Defaults to ALL_JOINTS.
+            timeout: The maximum amount of time to wait for the read-back of each
+                device (s). Defaults to 1.0.
+
+        Raises:
+            ValueError: The packet IDs or frequency can't be sent to the Bravo 7.
+            RuntimeError: A device reported a different configuration.
+            TimeoutError: A device did not report its configuration before the timeout.
+        """
+        packet_ids = list(packet_ids)
+
+        if len(packet_ids) > MAX_REQUESTED_PACKETS:
+            raise ValueError(
+                f"At most {MAX_REQUESTED_PACKETS} packets can be streamed at once."
+            )
+
+        if not 0 <= frequency <= MAX_HEARTBEAT_FREQUENCY:
+            raise ValueError(
+                f"The heartbeat frequency must be between 0 and"
+                f" {MAX_HEARTBEAT_FREQUENCY} Hz."
+            )
+
+        self.send_many(
+            [
+                Packet.from_value(device_id, PacketID.HEARTBEAT_SET, packet_ids),
+                Packet.from_value(device_id, PacketID.HEARTBEAT_FREQUENCY, frequency),
+            ]
+        )
+
+        devices = JOINTS if device_id is DeviceID.ALL_JOINTS else (device_id,)
+        futures = self.request_many(
+            [
+                (device, packet_id)
+                for device in devices
+                for packet_id in (PacketID.HEARTBEAT_SET, PacketID.HEARTBEAT_FREQUENCY)
+            ],
+            timeout,
+        )
+
+        expected = set(packet_ids)
+
+        for i, device in enumerate(devices):
+            # Unused entries in the heartbeat set may be reported as zeros
+            reported_ids = set(futures[2 * i].result().value) - {0}
+            reported_frequency = futures[2 * i + 1].result().value
+
+            if reported_ids != expected or reported_frequency != frequency:
+                raise RuntimeError(
+                    f"The {device} heartbeat is configured to stream"
+                    f" {sorted(reported_ids, key=str)} at {reported_frequency} Hz"
+                    f" instead of {sorted(expected, key=str)} at {frequency} Hz."
+                )
+
+    def _send_requests(self, requests: list[tuple[DeviceID, PacketID]]) -> None:
+        """Send a batch of requests without waiting on the responses.
+
+        Args:
+            requests: The (device ID, packet ID) pairs to request.
+        """
+        packet_ids: dict[DeviceID, list[PacketID]] = {}
+
+        for device_id, packet_id in requests:
+            packet_ids.setdefault(device_id, []).append(packet_id)
+
+        self.send_many(self._request_packets(packet_ids))
+
+    @staticmethod
+    def _request_packets(packet_ids: dict[DeviceID, list[PacketID]]) -> list[Packet]:
+        """Create the REQUEST packets for the packets requested from each device.
+
+        Args:
+            packet_ids: The IDs of the packets to request from each device.
+
+        Returns:
+            As few REQUEST packets as possible.
+        """
+        packets: list[Packet] = []
+
+        for device_id, ids in packet_ids.items():
+            if len(ids) == 1:
+                packets.append(REQUESTS[device_id, ids[0]])
+                continue
+
+            for i in range(0, len(ids), MAX_REQUESTED_PACKETS):
+                data = bytes(p.value for p in ids[i : i + MAX_REQUESTED_PACKETS])
+                packets.append(Packet(device_id, PacketID.REQUEST, data))
+
+        return packets
 
     def attach_callback(self, packet_id: PacketID, callback: Callable) -> None:
         """Bind a callback to the given packet type.
@@ -128,42 +572,335 @@ class BravoDriver:
         if callback not in self.callbacks[packet_id]:
             self.callbacks[packet_id].append(callback)
 
+    def receive_stats(self) -> ReceiveStats:
+        """Get a snapshot of the receive loop counters.
+
+        Returns:
+            The number of times that the receive loop woke up, the number of datagrams
+            received, and the most datagrams processed in a single wakeup.
+        """
+        return ReceiveStats(
+            self._wakeups, self._datagrams, self._max_datagrams_per_wakeup
+        )
+
+    def stats(self) -> MetricsSnapshot:
+        """Get a snapshot of the driver metrics.
+
+        Returns:
+            The packets sent and received for each packet and device ID, the datagrams
+            and bytes exchanged, the error counters, and summaries of the request round
+            trip times and callback execution times.
+        """
+        return self.metrics.snapshot(self._requests.timeouts)
+
+    def attach_listener(self, listener: Callable[[Packet], object]) -> None:
+        """Bind a listener to every received packet.
+
+        Unlike callbacks, listeners are always executed on the receiving thread, before
+        the callbacks are dispatched, so they must be fast (e.g., storing the latest
+        value of a packet in a ``JointStateCache``).
+
+        Args:
+            listener: The listener to execute when any packet is received.
+        """
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    def detach_listener(self, listener: Callable[[Packet], object]) -> None:
+        """Unbind a listener so that it is no longer executed for received packets.
+
+        Args:
+            listener: The listener to remove. Listeners that aren't attached are
+                ignored.
+        """
+        # Replace the list instead of mutating it, since the receive thread may be
+        # iterating over it
+        self.listeners = [other for other in self.listeners if other != listener]
+
+    def _open(self, ip: str, port: int) -> None:
+        """Open the socket and start everything but the polling thread.
+
+        The caller is responsible for calling ``_drain`` whenever the socket is
+        readable.
+
+        Args:
+            ip: The IP address of the Bravo 7.
+            port: The port to connect with the Bravo 7 over.
+        """
+        self.address = (ip, port)
+
+        # Configure a new socket with the Bravo. Connecting the socket filters out
+        # datagrams from other senders and lets us skip the address on every call.
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.connect(self.address)
+        self.sock.setblocking(False)
+
+        self._start_dispatcher()
+        self._running = True
+        self.scheduler.start()
+        self.commands.start()
+
+    def _send_datagram(self, datagram: bytes) -> None:
+        """Send a datagram to the Bravo 7 and record it.
+
+        Args:
+            datagram: The datagram to send.
+        """
+        self.sock.send(datagram)
+        self.metrics.sent_datagram(len(datagram))
+
+        if self.recorder is not None:
+            self._record(Direction.SENT, datagram)
+
+    def _record(
+        self, direction: Direction, datagram: bytes | bytearray | memoryview
+    ) -> None:
+        """Record a datagram, detaching the recorder if it fails.
+
+        A recorder that raises (e.g., because it was closed while the driver is still
+        connected) must not stop the driver from sending or receiving, so it is
+        detached and the remaining datagrams are not recorded.
+
+        Args:
+            direction: Whether the datagram was sent or received.
+            datagram: The datagram to record.
+        """
+        try:
+            self.recorder.write(direction, datagram)  # type: ignore
+        except Exception as ex:
+            self._logger.warning(
+                "Failed to record a datagram, so recording has stopped: %s", ex
+            )
+            self.recorder = None
+
     def _poll(self) -> None:
         """Poll the socket for new data and call the registered callbacks."""
         while self._running:
-            try:
-                read_data, _ = self.sock.recvfrom(256)
-            except BaseException:
-                ...
-            else:
-                if read_data == b"":
-                    continue
-                try:
-                    packet = Packet.decode(read_data)
-                except Exception as ex:
-                    self._logger.debug(
-                        "An error occurred while attempting to decode the data: %r, %s",
-                        read_data,
-                        ex,
-                    )
+            for key, _ in self._selector.select():
+                if key.fileobj is self._wakeup_r:
+                    self._wakeup_r.recv(64)
                 else:
-                    if self._display_connected_status:
-                        self._logger.info(
-                            "Successfully established a connection to the Reach Bravo 7 manipulator."
-                        )
-                        self._display_connected_status = False
-                    try:
-                        if packet.packet_id in self.callbacks:
-                            for cb in self.callbacks[packet.packet_id]:
-                                cb(packet)
-                        else:
-                            self._logger.warning(
-                                "Received unexpected packet_id %s with no associated callback",
-                                packet.packet_id,
-                            )
-
-                    except Exception as ex:
-                        self._logger.warning(
-                            "An exception occurred while trying to execute a callback for the packet %s.",
-                            ex,
-                        )
+                    self._drain()
+
+    def _drain(self) -> None:
+        """Receive and handle every datagram that is waiting on the socket."""
+        count = 0
+        tracer = self.tracer
+
+        while True:
+            buffer = self._ring.next()
+            start = time.perf_counter_ns() if tracer is not None else 0
+
+            try:
+                size = self.sock.recv_into(buffer)
+            except BlockingIOError:
+                break
+            except ConnectionRefusedError:
+                # The ICMP error from an earlier send to an unreachable arm is
+                # reported on the next read
+                self._logger.debug("The Bravo 7 refused a datagram sent by the driver.")
+                break
+            except OSError as ex:
+                self._logger.warning("Failed to receive data from the Bravo 7: %s", ex)
+                break
+
+            end = time.perf_counter_ns() if tracer is not None else 0
+            count += 1
+
+            if size:
+                self.metrics.received_datagram(size)
+
+                if self.recorder is not None:
+                    self._record(Direction.RECEIVED, memoryview(buffer)[:size])
+
+                # Decode the datagram in place rather than copying it out of the ring
+                self._handle_datagram(buffer, size)
+
+                # The datagram is sampled when it is handled
+                if tracer is not None and tracer.sampled:
+                    tracer.record("recv", "socket", start, end, size=size)
+
+        self._wakeups += 1
+        self._datagrams += count
+        self._max_datagrams_per_wakeup = max(self._max_datagrams_per_wakeup, count)
+
+    def _handle_datagram(
+        self, data: bytes | bytearray | memoryview, size: int | None = None
+    ) -> int:
+        """Decode and handle every packet in a datagram.
+
+        A single datagram may contain multiple frames (e.g., the responses from each
+        joint to an ALL_JOINTS request).
+
+        Args:
+            data: The datagram to handle, or the buffer that it was received into.
+            size: The size of the datagram (bytes). Defaults to the length of the data.
+
+        Returns:
+            The number of packets handled.
+        """
+        tracer = self.tracer
+
+        if tracer is not None:
+            # Decode the whole datagram up front so that decoding and the callbacks
+            # are timed separately
+            start = time.perf_counter_ns()
+            packets = list(Packet.iter_decode(data, self._on_decode_error, size))
+
+            if tracer.sample():
+                end = time.perf_counter_ns()
+                tracer.record("decode", "protocol", start, end, packets=len(packets))
+
+            for packet in packets:
+                self._handle_packet(packet)
+
+            return len(packets)
+
+        count = 0
+
+        for packet in Packet.iter_decode(data, self._on_decode_error, size):
+            self._handle_packet(packet)
+            count += 1
+
+        return count
+
+    def _on_decode_error(
+        self, data: bytes | bytearray | memoryview, ex: Exception
+    ) -> None:
+        """Log a frame that could not be decoded.
+
+        Args:
+            data: The frame that could not be decoded.
+            ex: The exception raised while decoding the frame.
+        """
+        ids = frame.peek_ids(data)
+        self.metrics.decode_error(
+            (DEVICE_IDS[ids[0]], PACKET_IDS[ids[1]]) if ids is not None else None
+        )
+        self._logger.debug(
+            "An error occurred while attempting to decode the data: %r, %s",
+            bytes(data),
+            ex,
+        )
+
+    def _handle_packet(self, packet: Packet) -> None:
+        """Execute the callbacks registered for a received packet.
+
+        Args:
+            packet: The received packet.
+        """
+        if self._display_connected_status and self.address is not None:
+            self._logger.info(
+                "Successfully established a connection to the Reach Bravo 7"
+                " manipulator."
+            )
+            self._display_connected_status = False
+
+        self.metrics.received(packet)
+        resolved = self._requests.resolve(packet)
+        stored = self.state.update(packet)
+
+        for listener in self.listeners:
+            try:
+                listener(packet)
+            except Exception as ex:
+                self._on_callback_error(packet, ex)
+
+        if packet.packet_id not in self.callbacks:
+            if not resolved and not stored and not self.listeners:
+                self._logger.warning(
+                    "Received unexpected packet_id %s with no associated callback",
+                    packet.packet_id,
+                )
+            return
+
+        if self.dispatcher is not None:
+            self.dispatcher.submit(packet)
+            return
+
+        for cb in self.callbacks[packet.packet_id]:
+            start = time.perf_counter_ns()
+
+            try:
+                cb(packet)
+            except Exception as ex:
+                self._on_callback_error(packet, ex)
+
+            end = time.perf_counter_ns()
+            self.metrics.callback_time.record(end - start)
+
+            if self.tracer is not None:
+                self._trace_callback(packet, cb, start, end)
+
+    def _start_dispatcher(self) -> None:
+        """Start the dispatcher, if there is one, with the driver's callbacks."""
+        if self.dispatcher is not None:
+            self.dispatcher.start(
+                self._callbacks_for,
+                self._on_callback_error,
+                self._on_callback_executed,
+                self.metrics.dropped_packet,
+            )
+
+    def _callbacks_for(self, packet: Packet) -> list[Callable]:
+        """Get the callbacks registered for a packet.
+
+        Args:
+            packet: The received packet.
+
+        Returns:
+            The callbacks to execute for the packet.
+        """
+        return self.callbacks.get(packet.packet_id, [])
+
+    def _on_callback_error(self, packet: Packet, ex: Exception) -> None:
+        """Log an exception raised by a callback.
+
+        Args:
+            packet: The packet that the callback was executed for.
+            ex: The exception raised by the callback.
+        """
+        self.metrics.callback_errors += 1
+        self._logger.warning(
+            "An exception occurred while trying to execute a callback for the packet"
+            " %s.",
+            ex,
+        )
+
+    def _on_callback_executed(
+        self, packet: Packet, callback: Callable, elapsed_ns: int
+    ) -> None:
+        """Record the time that a dispatched callback took.
+
+        Args:
+            packet: The packet that the callback was executed for.
+            callback: The callback that was executed.
+            elapsed_ns: The time that the callback took (ns).
+        """
+        self.metrics.callback_time.record(elapsed_ns)
+
+        if self.tracer is not None:
+            end = time.perf_counter_ns()
+            self._trace_callback(packet, callback, end - elapsed_ns, end)
+
+    def _trace_callback(
+        self, packet: Packet, callback: Callable, start_ns: int, end_ns: int
+    ) -> None:
+        """Trace a callback and warn if it exceeded the tracer budget.
+
+        Args:
+            packet: The packet that the callback was executed for.
+            callback: The callback that was executed.
+            start_ns: The ``perf_counter_ns`` time at which the callback started.
+            end_ns: The ``perf_counter_ns`` time at which the callback returned.
+        """
+        slow = self.tracer.executed(packet, callback, start_ns, end_ns)
+
+        if slow is not None:
+            self._logger.warning(
+                "The callback %s took %.3f ms to handle %s from %s.",
+                slow.name,
+                slow.elapsed * 1e3,
+                slow.packet_id,
+                slow.device_id,
+            )
@@ -0,0 +1,396 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Manages the connections to multiple Bravo 7 manipulators.
+
+A ``BravoFleet`` owns a ``BravoDriver`` for each arm, but instead of running a polling
+thread per arm, it waits on the sockets of every arm with one selector and hands each
+readable socket to its driver. The arms can optionally be sharded across a small number
+of threads. Each packet received is passed to the fleet callbacks along with the name
+of the arm that sent it, and the per-arm drivers remain available for sending packets,
+making requests, and attaching arm-specific callbacks.
+
+Examples:
+    >>> fleet = BravoFleet()
+    >>> fleet.add_arm("port", "192.168.2.3")
+    >>> fleet.add_arm("starboard", "192.168.2.4")
+    >>> fleet.attach_callback(PacketID.POSITION, lambda arm, packet: print(arm, packet))
+    >>> fleet.connect()
+    >>> fleet["port"].send(packet)
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import selectors
+import socket
+import threading
+from typing import Callable, Iterator
+
+from pybravo.driver.driver import BravoDriver
+from pybravo.protocol import Packet, PacketID
+
+
+class _Shard:
+    """A thread that receives the datagrams from a subset of the arms."""
+
+    def __init__(self) -> None:
+        """Create a new shard."""
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+
+        # The selector is only modified by the shard thread, so changes are queued
+        self._changes: list[tuple[bool, BravoDriver, threading.Event | None]] = []
+        self._lock = threading.Lock()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __len__(self) -> int:
+        """Get the number of arms handled by the shard.
+
+        Returns:
+            The number of registered sockets, including pending registrations.
+        """
+        with self._lock:
+            pending = sum(1 if add else -1 for add, _, _ in self._changes)
+        return len(self._selector.get_map()) - 1 + pending
+
+    def add(self, driver: BravoDriver) -> None:
+        """Start receiving the datagrams for a driver.
+
+        Args:
+            driver: The driver, whose socket must already be open.
+        """
+        self._change(True, driver)
+
+    def remove(self, driver: BravoDriver, timeout: float = 1.0) -> None:
+        """Stop receiving the datagrams for a driver.
+
+        This waits until the shard is no longer using the socket, so that the socket
+        can be closed.
+
+        Args:
+            driver: The driver to remove.
+            timeout: The maximum amount of time to wait for the shard (s).
+
+        Raises:
+            TimeoutError: The shard thread did not release the socket in time (e.g.,
+                because a callback is blocking it), so the socket is still in use.
+        """
+        # A callback running on the shard thread can't wait for the thread itself
+        if threading.current_thread() is self._thread:
+            self._selector.unregister(driver.sock)
+            return
+
+        removed = threading.Event()
+        self._change(False, driver, removed)
+
+        if not removed.wait(timeout):
+            raise TimeoutError(
+                "The shard thread did not release the socket within"
+                f" {timeout} seconds."
+            )
+
+    def stop(self) -> None:
+        """Stop the shard thread."""
+        self._running = False
+        self._wakeup_w.send(b"\x00")
+        self._thread.join()
+
+        self._selector.close()
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+
+    def _change(
+        self, add: bool, driver: BravoDriver, done: threading.Event | None = None
+    ) -> None:
+        """Queue a change to the sockets waited on by the shard.
+
+        Args:
+            add: Whether to register or unregister the driver's socket.
+            driver: The driver whose socket changed.
+            done: An event to set once the change has been applied.
+        """
+        with self._lock:
+            self._changes.append((add, driver, done))
+        self._wakeup_w.send(b"\x00")
+
+    def _apply_changes(self) -> None:
+        """Register and unregister the queued sockets."""
+        with self._lock:
+            changes, self._changes = self._changes, []
+
+        for add, driver, done in changes:
+            if add:
+                self._selector.register(driver.sock, selectors.EVENT_READ, driver)
+            else:
+                self._selector.unregister(driver.sock)
+
+            if done is not None:
+                done.set()
+
+    def _run(self) -> None:
+        """Hand each readable socket to its driver until the shard is stopped."""
+        while self._running:
+            woken = False
+
+            for key, _ in self._selector.select():
+                if key.fileobj is self._wakeup_r:
+                    woken = True
+                elif key.fileobj in self._selector.get_map():
+                    # Skip the sockets removed by a callback earlier in this wakeup
+                    key.data._drain()
+
+            # Apply the changes after draining so that a removed socket is never used
+            if woken:
+                self._wakeup_r.recv(64)
+                self._apply_changes()
+
+        self._apply_changes()
+
+
+class BravoFleet:
+    """Receives the packets from many Bravo 7 manipulators on a few threads."""
+
+    def __init__(self, threads: int = 1) -> None:
+        """Create a new fleet.
+
+        Args:
+            threads: The number of threads that receive the datagrams from the arms.
+                The arms are distributed evenly across the threads. Defaults to 1.
+        """
+        if threads < 1:
+            raise ValueError("At least one thread is required to receive datagrams.")
+
+        self.threads = threads
+        self.callbacks: dict[PacketID, list[Callable[[str, Packet], object]]] = {}
+
+        self._arms: dict[str, tuple[BravoDriver, tuple[str, int]]] = {}
+        self._shards: list[_Shard] = []
+        self._assignments: dict[str, _Shard] = {}
+        self._listeners: dict[str, Callable[[Packet], object]] = {}
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger("BravoFleet")
+
+    def __getitem__(self, name: str) -> BravoDriver:
+        """Get the driver of an arm.
+
+        Args:
+            name: The name of the arm.
+
+        Raises:
+            KeyError: There is no arm with the given name.
+
+        Returns:
+            The driver used to communicate with the arm.
+        """
+        return self._arms[name][0]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the names of the arms.
+
+        Returns:
+            An iterator over the names of the arms, in the order that they were added.
+        """
+        return iter(list(self._arms))
+
+    def __len__(self) -> int:
+        """Get the number of arms in the fleet.
+
+        Returns:
+            The number of arms.
+        """
+        return len(self._arms)
+
+    @property
+    def connected(self) -> bool:
+        """Whether or not the fleet is receiving datagrams."""
+        return bool(self._shards)
+
+    def add_arm(
+        self,
+        name: str,
+        ip: str = "192.168.2.3",
+        port: int = 6789,
+        driver: BravoDriver | None = None,
+    ) -> BravoDriver:
+        """Add an arm to the fleet.
+
+        If the fleet is already connected, the arm is connected immediately.
+
+        Args:
+            name: A unique name for the arm, which is passed to the fleet callbacks.
+            ip: The IP address of the arm. Defaults to "192.168.2.3".
+            port: The port to connect with the arm over. Defaults to 6789.
+            driver: The driver to use for the arm (e.g., one configured with a
+                dispatcher or recorder). Defaults to a new driver.
+
+        Raises:
+            ValueError: An arm with the same name is already in the fleet.
+
+        Returns:
+            The driver used to communicate with the arm.
+        """
+        with self._lock:
+            if name in self._arms:
+                raise ValueError(f"The fleet already has an arm named {name!r}.")
+
+            driver = driver if driver is not None else BravoDriver()
+            listener = functools.partial(self._handle_packet, name)
+            driver.attach_listener(listener)
+            self._arms[name] = (driver, (ip, port))
+            self._listeners[name] = listener
+
+            if self._shards:
+                self._connect_arm(name)
+
+        return driver
+
+    def remove_arm(self, name: str) -> BravoDriver:
+        """Disconnect an arm and remove it from the fleet.
+
+        The fleet stops handling the packets received by the returned driver.
+
+        Args:
+            name: The name of the arm.
+
+        Raises:
+            KeyError: There is no arm with the given name.
+            TimeoutError: The arm's socket is still in use by its receiving thread, so
+                the arm has been left in the fleet.
+
+        Returns:
+            The driver of the removed arm.
+        """
+        with self._lock:
+            driver, _ = self._arms[name]
+            self._disconnect_arm(name, driver)
+            del self._arms[name]
+            driver.detach_listener(self._listeners.pop(name))
+
+        return driver
+
+    def attach_callback(
+        self, packet_id: PacketID, callback: Callable[[str, Packet], object]
+    ) -> None:
+        """Bind a callback to the given packet type for every arm.
+
+        Fleet callbacks are executed on the receiving thread of the arm that sent the
+        packet, with the name of the arm and the packet.
+
+        Args:
+            packet_id: The ID of the packet that, when received, should signal the
+                callback.
+            callback: The callback to execute when a packet with the given ID is
+                received from any arm.
+        """
+        callbacks = self.callbacks.setdefault(packet_id, [])
+
+        if callback not in callbacks:
+            callbacks.append(callback)
+
+    def connect(self) -> None:
+        """Connect to every arm and start receiving their datagrams."""
+        with self._lock:
+            if self._shards:
+                return
+
+            self._shards = [_Shard() for _ in range(self.threads)]
+
+            for name in self._arms:
+                self._connect_arm(name)
+
+    def disconnect(self) -> None:
+        """Disconnect from every arm and stop the receiving threads."""
+        with self._lock:
+            for name, (driver, _) in self._arms.items():
+                self._disconnect_arm(name, driver)
+
+            for shard in self._shards:
+                shard.stop()
+
+            self._shards = []
+
+    def __enter__(self) -> BravoFleet:
+        """Connect to the fleet when entering a context.
+
+        Returns:
+            The connected fleet.
+        """
+        self.connect()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Disconnect from the fleet when leaving the context."""
+        self.disconnect()
+
+    def _connect_arm(self, name: str) -> None:
+        """Connect to an arm and assign it to the least loaded shard.
+
+        The caller must hold the fleet lock.
+
+        Args:
+            name: The name of the arm.
+        """
+        driver, (ip, port) = self._arms[name]
+        driver._open(ip, port)
+
+        shard = min(self._shards, key=len)
+        shard.add(driver)
+        self._assignments[name] = shard
+
+    def _disconnect_arm(self, name: str, driver: BravoDriver) -> None:
+        """Stop receiving from an arm and disconnect its driver.
+
+        The caller must hold the fleet lock.
+
+        Args:
+            name: The name of the arm.
+            driver: The driver of the arm.
+        """
+        shard = self._assignments.get(name)
+
+        if shard is not None:
+            # Only close the socket once the shard is no longer waiting on it
+            shard.remove(driver)
+            del self._assignments[name]
+            driver.disconnect()
+
+    def _handle_packet(self, name: str, packet: Packet) -> None:
+        """Execute the fleet callbacks registered for a packet.
+
+        Args:
+            name: The name of the arm that sent the packet.
+            packet: The received packet.
+        """
+        for callback in self.callbacks.get(packet.packet_id, ()):
+            try:
+                callback(name, packet)
+            except Exception as ex:
+                self._logger.warning(
+                    "An exception occurred while executing a callback for the arm"
+                    " %s: %s",
+                    name,
+                    ex,
+                )
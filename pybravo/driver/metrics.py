@@ -0,0 +1,545 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Counts the traffic handled by a driver and measures its latency.
+
+Each ``BravoDriver`` owns a ``DriverMetrics`` that counts the packets sent, received,
+dropped, and that could not be decoded for each packet and device ID, and the datagrams
+and bytes exchanged, and records the request round trip times and callback execution
+times in ``LatencyHistogram`` objects. ``BravoDriver.stats`` returns a snapshot of the
+metrics, which ``format_prometheus`` renders in the Prometheus text format and a
+``MetricsExporter`` serves over HTTP.
+
+Examples:
+    >>> bravo = BravoDriver()
+    >>> bravo.stats().request_rtt.p99
+    0.000412
+    >>> exporter = MetricsExporter(bravo.stats, port=9100)
+    >>> exporter.start()
+"""
+
+from __future__ import annotations
+
+import threading
+from enum import Enum
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterable, NamedTuple
+
+from pybravo.protocol import DeviceID, JointCommandEncoder, Packet, PacketID
+
+
+class HistogramSnapshot(NamedTuple):
+    """A summary of the values recorded by a histogram, in seconds."""
+
+    count: int
+    total: float
+    min: float
+    max: float
+    mean: float
+    p50: float
+    p90: float
+    p99: float
+    p999: float
+
+
+class LatencyHistogram:
+    """A log-linear histogram of durations with bounded relative error.
+
+    Like an HDR histogram, each power-of-two range of values is divided into the same
+    number of linear sub-buckets, so recording a value is O(1), the memory used is
+    fixed, and each quantile is reported to within a relative error of
+    ``2 ** -(precision - 1)``.
+    """
+
+    def __init__(self, precision: int = 6, max_exponent: int = 40) -> None:
+        """Create a new latency histogram.
+
+        Args:
+            precision: The number of significant bits kept for each value. Defaults to
+                6, which bounds the relative error to about 3%.
+            max_exponent: Values are clamped to ``2 ** max_exponent`` ns. Defaults to
+                40 (about 18 minutes).
+        """
+        self._precision = precision
+        self._half = 1 << (precision - 1)
+        self._max_value = (1 << max_exponent) - 1
+        self._counts = [0] * self._index(self._max_value) + [0]
+        self._lock = threading.Lock()
+
+        self._count = 0
+        self._total = 0
+        self._min = self._max_value
+        self._max = 0
+
+    def record(self, value_ns: int) -> None:
+        """Record a duration.
+
+        Args:
+            value_ns: The duration (ns).
+        """
+        value_ns = min(max(value_ns, 0), self._max_value)
+        index = self._index(value_ns)
+
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._total += value_ns
+
+            self._min = min(self._min, value_ns)
+            self._max = max(self._max, value_ns)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile of the recorded durations.
+
+        Args:
+            q: The quantile, between 0 and 1.
+
+        Returns:
+            The estimated quantile (s), or 0 if nothing has been recorded.
+        """
+        with self._lock:
+            return self._quantiles([q])[0]
+
+    def snapshot(self) -> HistogramSnapshot:
+        """Summarize the recorded durations.
+
+        Returns:
+            The count, total, minimum, maximum, mean, and common quantiles (s).
+        """
+        with self._lock:
+            if not self._count:
+                return HistogramSnapshot(0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+            return HistogramSnapshot(
+                self._count,
+                self._total / 1e9,
+                self._min / 1e9,
+                self._max / 1e9,
+                self._total / self._count / 1e9,
+                *self._quantiles([0.5, 0.9, 0.99, 0.999]),
+            )
+
+    def _index(self, value: int) -> int:
+        """Get the bucket that a value is counted in.
+
+        Args:
+            value: The value (ns).
+
+        Returns:
+            The index of the bucket.
+        """
+        shift = value.bit_length() - self._precision
+
+        if shift <= 0:
+            return value
+
+        # The top ``precision`` bits select the sub-bucket within the power of two
+        return ((shift + 1) * self._half) + (value >> shift) - self._half
+
+    def _value(self, index: int) -> int:
+        """Get the largest value counted in a bucket.
+
+        Args:
+            index: The index of the bucket.
+
+        Returns:
+            The upper bound of the bucket (ns).
+        """
+        if index < 2 * self._half:
+            return index
+
+        shift = index // self._half - 1
+        return (((index % self._half) + self._half + 1) << shift) - 1
+
+    def _quantiles(self, qs: list[float]) -> list[float]:
+        """Estimate quantiles of the recorded durations.
+
+        The caller must hold the histogram lock.
+
+        Args:
+            qs: The quantiles to estimate, in increasing order.
+
+        Returns:
+            The estimated quantiles (s).
+        """
+        if not self._count:
+            return [0.0] * len(qs)
+
+        results = []
+        seen = 0
+        targets = iter(qs)
+        target = next(targets)
+
+        for index, count in enumerate(self._counts):
+            seen += count
+
+            while target is not None and seen >= max(target * self._count, 1):
+                # Report the bucket bound, but never beyond the largest value recorded
+                results.append(min(self._value(index), self._max) / 1e9)
+                target = next(targets, None)
+
+            if target is None:
+                break
+
+        return results
+
+
+# The device and packet ID of the packets counted by an error counter
+IDs = tuple[DeviceID | int, PacketID | int]
+
+
+class MetricsSnapshot(NamedTuple):
+    """A snapshot of the metrics of a driver."""
+
+    rx_packets: dict[PacketID | int, int]
+    rx_devices: dict[DeviceID | int, int]
+    tx_packets: dict[PacketID | int, int]
+    tx_devices: dict[DeviceID | int, int]
+    rx_datagrams: int
+    rx_bytes: int
+    tx_datagrams: int
+    tx_bytes: int
+
+    # Frames that could not be decoded (e.g., due to a CRC failure), by the IDs read
+    # from the frame, or by (None, None) if the frame was too damaged to read them
+    decode_errors: dict[IDs | tuple[None, None], int]
+
+    # Packets received with a packet or device ID that the library doesn't define
+    unknown_ids: int
+
+    callback_errors: int
+
+    # Packets discarded by the callback dispatcher because its queue was full
+    dropped: dict[IDs, int]
+
+    request_timeouts: int
+    request_rtt: HistogramSnapshot
+    callback_time: HistogramSnapshot
+
+
+class DriverMetrics:
+    """The counters and histograms updated by a driver."""
+
+    def __init__(self) -> None:
+        """Create a new set of driver metrics."""
+        self.rx_packets: dict[PacketID | int, int] = {}
+        self.rx_devices: dict[DeviceID | int, int] = {}
+        self.tx_packets: dict[PacketID | int, int] = {}
+        self.tx_devices: dict[DeviceID | int, int] = {}
+        self.rx_datagrams = 0
+        self.rx_bytes = 0
+        self.tx_datagrams = 0
+        self.tx_bytes = 0
+        self.decode_errors: dict[IDs | tuple[None, None], int] = {}
+        self.dropped: dict[IDs, int] = {}
+        self.unknown_ids = 0
+        self.callback_errors = 0
+        self.request_rtt = LatencyHistogram()
+        self.callback_time = LatencyHistogram()
+
+        # Packets are sent from any thread, but only received on one
+        self._tx_lock = threading.Lock()
+        self._commands: dict[JointCommandEncoder, int] = {}
+
+    def received(self, packet: Packet) -> None:
+        """Count a received packet.
+
+        Args:
+            packet: The received packet.
+        """
+        packet_id = packet.packet_id
+        device_id = packet.device_id
+
+        self.rx_packets[packet_id] = self.rx_packets.get(packet_id, 0) + 1
+        self.rx_devices[device_id] = self.rx_devices.get(device_id, 0) + 1
+
+        if type(packet_id) is int or type(device_id) is int:
+            self.unknown_ids += 1
+
+    def decode_error(self, ids: IDs | None) -> None:
+        """Count a frame that could not be decoded.
+
+        Args:
+            ids: The device and packet ID read from the frame, or None if the frame was
+                too damaged to read them.
+        """
+        key = ids if ids is not None else (None, None)
+        self.decode_errors[key] = self.decode_errors.get(key, 0) + 1
+
+    def dropped_packet(self, packet: Packet) -> None:
+        """Count a packet that was discarded by the callback dispatcher.
+
+        Args:
+            packet: The discarded packet.
+        """
+        key = (packet.device_id, packet.packet_id)
+        self.dropped[key] = self.dropped.get(key, 0) + 1
+
+    def received_datagram(self, size: int) -> None:
+        """Count a received datagram.
+
+        Args:
+            size: The size of the datagram (bytes).
+        """
+        self.rx_datagrams += 1
+        self.rx_bytes += size
+
+    def sent(self, packets: Iterable[Packet]) -> None:
+        """Count sent packets.
+
+        Args:
+            packets: The sent packets.
+        """
+        with self._tx_lock:
+            for packet in packets:
+                packet_id = packet.packet_id
+                device_id = packet.device_id
+                self.tx_packets[packet_id] = self.tx_packets.get(packet_id, 0) + 1
+                self.tx_devices[device_id] = self.tx_devices.get(device_id, 0) + 1
+
+    def sent_command(self, encoder: JointCommandEncoder) -> None:
+        """Count a command sent to several devices at once.
+
+        Counting a packet for each device on every command is comparatively slow, so
+        the commands are counted per encoder and expanded when a snapshot is taken.
+
+        Args:
+            encoder: The encoder that encoded the command.
+        """
+        with self._tx_lock:
+            self._commands[encoder] = self._commands.get(encoder, 0) + 1
+
+    def sent_datagram(self, size: int) -> None:
+        """Count a sent datagram.
+
+        Args:
+            size: The size of the datagram (bytes).
+        """
+        with self._tx_lock:
+            self.tx_datagrams += 1
+            self.tx_bytes += size
+
+    def snapshot(self, request_timeouts: int = 0) -> MetricsSnapshot:
+        """Get a snapshot of the metrics.
+
+        Args:
+            request_timeouts: The number of requests that timed out. Defaults to 0.
+
+        Returns:
+            A copy of the counters and summaries of the histograms.
+        """
+        with self._tx_lock:
+            tx_packets = dict(self.tx_packets)
+            tx_devices = dict(self.tx_devices)
+            tx_datagrams = self.tx_datagrams
+            tx_bytes = self.tx_bytes
+
+            for encoder, count in self._commands.items():
+                packet_id = encoder.packet_id
+                tx_packets[packet_id] = tx_packets.get(packet_id, 0) + count * len(
+                    encoder.device_ids
+                )
+                for device_id in encoder.device_ids:
+                    tx_devices[device_id] = tx_devices.get(device_id, 0) + count
+
+        return MetricsSnapshot(
+            dict(self.rx_packets),
+            dict(self.rx_devices),
+            tx_packets,
+            tx_devices,
+            self.rx_datagrams,
+            self.rx_bytes,
+            tx_datagrams,
+            tx_bytes,
+            dict(self.decode_errors),
+            self.unknown_ids,
+            self.callback_errors,
+            dict(self.dropped),
+            request_timeouts,
+            self.request_rtt.snapshot(),
+            self.callback_time.snapshot(),
+        )
+
+
+def _label(identifier: Enum | int | None) -> str:
+    """Get the label value of a packet or device ID.
+
+    Args:
+        identifier: The ID, or None if it is unknown.
+
+    Returns:
+        The name of the ID, its hexadecimal value if it isn't defined, or "unknown".
+    """
+    if identifier is None:
+        return "unknown"
+
+    return identifier.name if isinstance(identifier, Enum) else f"0x{identifier:02X}"
+
+
+def format_prometheus(snapshot: MetricsSnapshot, prefix: str = "bravo") -> str:
+    """Render a metrics snapshot in the Prometheus text exposition format.
+
+    Args:
+        snapshot: The metrics to render.
+        prefix: The prefix of each metric name. Defaults to "bravo".
+
+    Returns:
+        The rendered metrics.
+    """
+    lines: list[str] = []
+
+    def counter(name: str, help: str, values: dict[str, int]) -> None:
+        lines.append(f"# HELP {prefix}_{name} {help}")
+        lines.append(f"# TYPE {prefix}_{name} counter")
+        lines.extend(
+            f"{prefix}_{name}{labels} {value}" for labels, value in values.items()
+        )
+
+    def by_id(label: str, counts: dict) -> dict[str, int]:
+        return {f'{{{label}="{_label(k)}"}}': v for k, v in counts.items()}
+
+    def by_ids(counts: dict) -> dict[str, int]:
+        return {
+            f'{{device_id="{_label(d)}",packet_id="{_label(p)}"}}': v
+            for (d, p), v in counts.items()
+        }
+
+    counter(
+        "rx_packets_total", "Packets received.", by_id("packet_id", snapshot.rx_packets)
+    )
+    counter(
+        "rx_device_packets_total",
+        "Packets received from each device.",
+        by_id("device_id", snapshot.rx_devices),
+    )
+    counter(
+        "tx_packets_total", "Packets sent.", by_id("packet_id", snapshot.tx_packets)
+    )
+    counter(
+        "tx_device_packets_total",
+        "Packets sent to each device.",
+        by_id("device_id", snapshot.tx_devices),
+    )
+    counter("rx_datagrams_total", "Datagrams received.", {"": snapshot.rx_datagrams})
+    counter("rx_bytes_total", "Bytes received.", {"": snapshot.rx_bytes})
+    counter("tx_datagrams_total", "Datagrams sent.", {"": snapshot.tx_datagrams})
+    counter("tx_bytes_total", "Bytes sent.", {"": snapshot.tx_bytes})
+    counter(
+        "decode_errors_total",
+        "Frames that could not be decoded.",
+        by_ids(snapshot.decode_errors),
+    )
+    counter(
+        "unknown_ids_total",
+        "Packets received with an unknown ID.",
+        {"": snapshot.unknown_ids},
+    )
+    counter(
+        "callback_errors_total",
+        "Exceptions raised by callbacks.",
+        {"": snapshot.callback_errors},
+    )
+    counter(
+        "dropped_packets_total",
+        "Packets dropped by the dispatcher.",
+        by_ids(snapshot.dropped),
+    )
+    counter(
+        "request_timeouts_total",
+        "Requests that timed out.",
+        {"": snapshot.request_timeouts},
+    )
+
+    for name, help, histogram in (
+        ("request_rtt_seconds", "Request round trip time.", snapshot.request_rtt),
+        ("callback_seconds", "Callback execution time.", snapshot.callback_time),
+    ):
+        lines.append(f"# HELP {prefix}_{name} {help}")
+        lines.append(f"# TYPE {prefix}_{name} summary")
+        for quantile, value in (
+            ("0.5", histogram.p50),
+            ("0.9", histogram.p90),
+            ("0.99", histogram.p99),
+            ("0.999", histogram.p999),
+        ):
+            lines.append(f'{prefix}_{name}{{quantile="{quantile}"}} {value!r}')
+        lines.append(f"{prefix}_{name}_sum {histogram.total!r}")
+        lines.append(f"{prefix}_{name}_count {histogram.count}")
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """Serves the metrics of a driver in the Prometheus text format over HTTP."""
+
+    def __init__(
+        self,
+        stats: Callable[[], MetricsSnapshot],
+        port: int = 9100,
+        host: str = "127.0.0.1",
+    ) -> None:
+        """Create a new metrics exporter.
+
+        Args:
+            stats: Gets the snapshot of the metrics to serve (e.g., ``bravo.stats``).
+            port: The port to serve the metrics on. Defaults to 9100.
+            host: The address to serve the metrics on. Defaults to "127.0.0.1".
+        """
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+
+                body = format_prometheus(exporter._stats()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: object) -> None:
+                # Don't write a line to stderr for every scrape
+                ...
+
+        self._stats = stats
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread: threading.Thread | None = None
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """The address that the metrics are served on."""
+        return self._server.server_address[:2]  # type: ignore
+
+    def start(self) -> None:
+        """Start serving the metrics on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving the metrics."""
+        self._server.shutdown()
+        self._server.server_close()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
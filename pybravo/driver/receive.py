@@ -0,0 +1,77 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Preallocated buffers and counters used by the driver's receive loop.
+
+The polling thread reads each datagram into the next slot of a ``ReceiveRing`` with
+``recv_into`` and hands the decoder the slot along with the number of bytes received,
+so the receive path neither allocates nor copies a buffer for every datagram. Because
+the ring has several slots, a slot handed out for one datagram remains valid while the
+next few datagrams are received.
+"""
+
+from typing import NamedTuple
+
+# The largest datagram that the driver expects to receive. This comfortably fits the
+# responses from every joint to an ALL_JOINTS request.
+RECEIVE_BUFFER_SIZE = 2048
+
+
+class ReceiveStats(NamedTuple):
+    """A snapshot of the receive loop counters."""
+
+    wakeups: int
+    datagrams: int
+    max_datagrams_per_wakeup: int
+
+    @property
+    def datagrams_per_wakeup(self) -> float:
+        """The mean number of datagrams processed each time the receive loop woke."""
+        return self.datagrams / self.wakeups if self.wakeups else 0.0
+
+
+class ReceiveRing:
+    """A fixed ring of preallocated receive buffers."""
+
+    def __init__(self, slots: int = 8, size: int = RECEIVE_BUFFER_SIZE) -> None:
+        """Create a new receive ring.
+
+        Args:
+            slots: The number of buffers in the ring. Defaults to 8.
+            size: The size of each buffer (bytes). Defaults to RECEIVE_BUFFER_SIZE.
+        """
+        if slots < 1 or size < 1:
+            raise ValueError("The receive ring must have at least one non-empty slot.")
+
+        # Each slot is a bytearray rather than a view of a shared buffer so that the
+        # decoder can search it for delimiters without copying it first
+        self._slots = [bytearray(size) for _ in range(slots)]
+        self._index = 0
+
+    def next(self) -> bytearray:
+        """Get the next buffer in the ring.
+
+        Returns:
+            The next buffer. The buffer is reused once every other slot in the ring has
+            been handed out.
+        """
+        slot = self._slots[self._index]
+        self._index = (self._index + 1) % len(self._slots)
+        return slot
@@ -0,0 +1,233 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Correlates requests sent to the Bravo 7 with the responses that answer them.
+
+The ``RequestTracker`` creates a future for each outstanding request, keyed by the
+device and packet ID of the response that answers it. Futures are resolved in the order
+that their requests were made, and each request may be given its own timeout.
+
+Examples:
+    >>> tracker = RequestTracker()
+    >>> future = tracker.add(DeviceID.BEND_ELBOW, PacketID.POSITION, timeout=0.1)
+    >>> tracker.resolve(position_packet)
+    True
+    >>> future.result().value
+    1.57
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError, TimeoutError
+from typing import Callable
+
+from pybravo.protocol import DeviceID, Packet, PacketID
+
+
+class RequestTracker:
+    """Tracks the outstanding requests sent to the Bravo 7."""
+
+    def __init__(
+        self, on_resolved: Callable[[Packet, int], object] | None = None
+    ) -> None:
+        """Create a new request tracker.
+
+        Args:
+            on_resolved: An optional function called with each response and the round
+                trip time of its request (ns). Defaults to None.
+        """
+        self.on_resolved = on_resolved
+        self.timeouts = 0
+
+        self._pending: dict[tuple[DeviceID, PacketID], deque[Future]] = {}
+        self._sent: dict[Future, int] = {}
+        self._deadlines: list[tuple[float, int, tuple[DeviceID, PacketID], Future]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Condition()
+        self._timeout_t: threading.Thread | None = None
+
+    def __len__(self) -> int:
+        """Get the number of outstanding requests.
+
+        Returns:
+            The number of requests that have not yet been answered or timed out.
+        """
+        with self._lock:
+            return sum(len(futures) for futures in self._pending.values())
+
+    def add(
+        self, device_id: DeviceID, packet_id: PacketID, timeout: float | None = None
+    ) -> Future:
+        """Create a future for a response from a device.
+
+        Args:
+            device_id: The device that the response is expected from.
+            packet_id: The ID of the packet that answers the request.
+            timeout: The maximum amount of time to wait for the response (s). If None,
+                the request never times out.
+
+        Raises:
+            ValueError: The device ID is ALL_JOINTS, which has no single response.
+
+        Returns:
+            A future that resolves to the response packet. The future raises a
+            ``TimeoutError`` if the response isn't received before the timeout.
+        """
+        if device_id is DeviceID.ALL_JOINTS:
+            raise ValueError(
+                "Each joint answers an ALL_JOINTS request separately; request the"
+                " joints individually instead."
+            )
+
+        key = (device_id, packet_id)
+        future: Future = Future()
+
+        with self._lock:
+            self._pending.setdefault(key, deque()).append(future)
+            self._sent[future] = time.perf_counter_ns()
+
+            if timeout is not None:
+                deadline = time.monotonic() + timeout
+                heapq.heappush(
+                    self._deadlines, (deadline, next(self._counter), key, future)
+                )
+
+                if self._timeout_t is None:
+                    self._timeout_t = threading.Thread(
+                        target=self._expire_requests, daemon=True
+                    )
+                    self._timeout_t.start()
+
+                # Wake the timeout thread if this is now the earliest deadline
+                if self._deadlines[0][3] is future:
+                    self._lock.notify()
+
+        # Forget the request as soon as the caller cancels it, since a response may
+        # never arrive to remove it
+        future.add_done_callback(lambda f: self._discard(key, f))
+
+        return future
+
+    def resolve(self, packet: Packet) -> bool:
+        """Resolve the oldest outstanding request answered by a packet.
+
+        Args:
+            packet: The received packet.
+
+        Returns:
+            True if the packet answered an outstanding request, False otherwise.
+        """
+        # Avoid taking the lock for every received packet when nothing is outstanding
+        if not self._pending:
+            return False
+
+        key = (packet.device_id, packet.packet_id)
+
+        with self._lock:
+            futures = self._pending.get(key)
+
+            while futures:
+                future = futures.popleft()
+                sent = self._sent.pop(future)
+
+                if not futures:
+                    del self._pending[key]
+
+                try:
+                    future.set_result(packet)
+                except InvalidStateError:
+                    # The future was cancelled by the caller; try the next one
+                    continue
+
+                if self.on_resolved is not None:
+                    self.on_resolved(packet, time.perf_counter_ns() - sent)
+
+                return True
+
+        return False
+
+    def cancel_all(self) -> None:
+        """Cancel all outstanding requests."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._sent.clear()
+            self._deadlines.clear()
+            self._lock.notify()
+
+        for futures in pending.values():
+            for future in futures:
+                future.cancel()
+
+    def _discard(self, key: tuple[DeviceID, PacketID], future: Future) -> None:
+        """Remove a cancelled request from the outstanding requests.
+
+        Args:
+            key: The device and packet ID of the response that answers the request.
+            future: The future of the request.
+        """
+        if not future.cancelled():
+            return
+
+        with self._lock:
+            futures = self._pending.get(key)
+
+            if futures is not None and future in futures:
+                futures.remove(future)
+                del self._sent[future]
+                if not futures:
+                    del self._pending[key]
+
+    def _expire_requests(self) -> None:
+        """Fail the requests whose timeouts have elapsed."""
+        with self._lock:
+            while True:
+                if not self._deadlines:
+                    self._lock.wait()
+                    continue
+
+                deadline, _, key, future = self._deadlines[0]
+                remaining = deadline - time.monotonic()
+
+                if remaining > 0:
+                    self._lock.wait(remaining)
+                    continue
+
+                heapq.heappop(self._deadlines)
+
+                futures = self._pending.get(key)
+                if futures is not None and future in futures:
+                    futures.remove(future)
+                    del self._sent[future]
+                    if not futures:
+                        del self._pending[key]
+
+                try:
+                    future.set_exception(
+                        TimeoutError(f"Timed out waiting for {key[1]} from {key[0]}.")
+                    )
+                    self.timeouts += 1
+                except InvalidStateError:
+                    # The request was answered or cancelled before it timed out
+                    ...
@@ -0,0 +1,325 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Requests packets from the Bravo 7 at fixed rates.
+
+The ``PollScheduler`` owned by each ``BravoDriver`` periodically requests the
+subscribed packets from the Bravo 7 on a single thread. Subscriptions are kept in a
+heap ordered by the monotonic time at which they are next due. Each deadline is
+advanced by exactly one period (rather than scheduled relative to the time that the
+request was actually sent), so the rates don't drift with the send latency, and all of
+the requests that are due within the same tick are sent together in one datagram.
+
+Examples:
+    >>> bravo = BravoDriver()
+    >>> bravo.scheduler.subscribe(PacketID.POSITION, DeviceID.ALL_JOINTS, 100.0)
+    >>> bravo.scheduler.subscribe(PacketID.TEMPERATURE, DeviceID.ALL_JOINTS, 1.0)
+    >>> bravo.connect()
+    >>> bravo.scheduler.stats()
+    [PollStats(packet_id=<PacketID.POSITION: 3>, ..., achieved_rate=99.98, ...), ...]
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from typing import Callable, NamedTuple
+
+from pybravo.protocol import DeviceID, PacketID
+
+
+class PollStats(NamedTuple):
+    """The rate at which a subscription has been polled."""
+
+    packet_id: PacketID
+    device_id: DeviceID
+    requested_rate: float
+    achieved_rate: float
+
+    # The standard deviation of the time between consecutive requests (s)
+    jitter: float
+
+    sent: int
+
+    # The number of requests that were skipped because the scheduler fell behind
+    missed: int
+
+
+class Subscription:
+    """A packet that is requested from a device at a fixed rate."""
+
+    __slots__ = (
+        "packet_id",
+        "device_id",
+        "rate",
+        "period",
+        "active",
+        "_sent",
+        "_missed",
+        "_last_sent",
+        "_mean_interval",
+        "_m2_interval",
+    )
+
+    def __init__(self, packet_id: PacketID, device_id: DeviceID, rate: float) -> None:
+        """Create a new subscription.
+
+        Args:
+            packet_id: The ID of the packet to request.
+            device_id: The device to request the packet from.
+            rate: The rate at which to request the packet (Hz).
+        """
+        if rate <= 0:
+            raise ValueError("The polling rate must be positive.")
+
+        self.packet_id = packet_id
+        self.device_id = device_id
+        self.rate = rate
+        self.period = 1 / rate
+        self.active = True
+
+        # The intervals between requests are summarized with Welford's algorithm
+        self._sent = 0
+        self._missed = 0
+        self._last_sent = 0.0
+        self._mean_interval = 0.0
+        self._m2_interval = 0.0
+
+    def stats(self) -> PollStats:
+        """Get the rate at which the subscription has been polled.
+
+        Returns:
+            The requested and achieved rates, the jitter, and the number of requests
+            sent and missed.
+        """
+        intervals = self._sent - 1
+
+        achieved = 1 / self._mean_interval if self._mean_interval > 0 else 0.0
+        jitter = math.sqrt(self._m2_interval / intervals) if intervals > 1 else 0.0
+
+        return PollStats(
+            self.packet_id,
+            self.device_id,
+            self.rate,
+            achieved,
+            jitter,
+            self._sent,
+            self._missed,
+        )
+
+    def _record(self, now: float) -> None:
+        """Record that a request was sent.
+
+        Args:
+            now: The time at which the request was sent.
+        """
+        self._sent += 1
+
+        if self._sent > 1:
+            interval = now - self._last_sent
+            delta = interval - self._mean_interval
+            self._mean_interval += delta / (self._sent - 1)
+            self._m2_interval += delta * (interval - self._mean_interval)
+
+        self._last_sent = now
+
+
+class PollScheduler:
+    """Sends the requests for each subscription when they are due."""
+
+    def __init__(
+        self,
+        send: Callable[[list[tuple[DeviceID, PacketID]]], None],
+        coalesce_window: float = 0.001,
+    ) -> None:
+        """Create a new poll scheduler.
+
+        Args:
+            send: Sends a batch of (device ID, packet ID) requests in one datagram.
+            coalesce_window: Requests that are due within this amount of time of the
+                earliest due request are sent with it (s). Defaults to 1 ms.
+        """
+        self._send = send
+        self.coalesce_window = coalesce_window
+
+        self._heap: list[tuple[float, int, Subscription]] = []
+        self._subscriptions: list[Subscription] = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread: threading.Thread | None = None
+        self._logger = logging.getLogger("BravoDriver")
+
+    def subscribe(
+        self, packet_id: PacketID, device_id: DeviceID, rate: float
+    ) -> Subscription:
+        """Request a packet from a device at a fixed rate.
+
+        Args:
+            packet_id: The ID of the packet to request.
+            device_id: The device to request the packet from. This may be ALL_JOINTS.
+            rate: The rate at which to request the packet (Hz).
+
+        Returns:
+            The subscription, which can be used to unsubscribe.
+        """
+        subscription = Subscription(packet_id, device_id, rate)
+
+        with self._cond:
+            self._subscriptions.append(subscription)
+            heapq.heappush(
+                self._heap, (time.monotonic(), next(self._counter), subscription)
+            )
+            self._cond.notify()
+
+            if self._running:
+                self._start_thread()
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop requesting the packet of a subscription.
+
+        Args:
+            subscription: The subscription to cancel.
+        """
+        with self._cond:
+            subscription.active = False
+
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+            # Cancelled subscriptions are removed from the heap when they are next due
+            self._cond.notify()
+
+    def stats(self) -> list[PollStats]:
+        """Get the rate at which each subscription has been polled.
+
+        Returns:
+            The statistics of each active subscription.
+        """
+        with self._cond:
+            return [subscription.stats() for subscription in self._subscriptions]
+
+    def start(self) -> None:
+        """Start sending the requests."""
+        with self._cond:
+            if self._running:
+                return
+
+            # Start each subscription from now rather than catching up on the time that
+            # the scheduler was stopped
+            now = time.monotonic()
+            self._heap = [(now, i, s) for i, s in enumerate(self._subscriptions)]
+            self._running = True
+
+            if self._subscriptions:
+                self._start_thread()
+
+    def stop(self) -> None:
+        """Stop sending the requests."""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+        with self._cond:
+            thread = self._thread
+            self._thread = None
+
+        if thread is not None:
+            thread.join()
+
+    def _start_thread(self) -> None:
+        """Start the thread that sends the requests if it isn't already running.
+
+        The thread is only started once there is something to poll, so drivers
+        without subscriptions don't need an extra thread. The caller must hold the
+        scheduler lock.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        """Send the requests as they become due until the scheduler is stopped."""
+        while True:
+            with self._cond:
+                while self._running:
+                    timeout = (
+                        self._heap[0][0] - time.monotonic() if self._heap else None
+                    )
+
+                    if timeout is not None and timeout <= 0:
+                        break
+
+                    self._cond.wait(timeout)
+
+                if not self._running:
+                    return
+
+                now = time.monotonic()
+                batch = self._pop_due(now + self.coalesce_window)
+
+            try:
+                self._send([(s.device_id, s.packet_id) for s in batch])
+            except OSError as ex:
+                self._logger.warning("Failed to send the polling requests: %s", ex)
+                continue
+
+            for subscription in batch:
+                subscription._record(now)
+
+    def _pop_due(self, horizon: float) -> list[Subscription]:
+        """Remove the subscriptions that are due and schedule their next request.
+
+        The caller must hold the scheduler lock.
+
+        Args:
+            horizon: The latest due time to include.
+
+        Returns:
+            The active subscriptions that are due.
+        """
+        now = time.monotonic()
+        batch = []
+
+        while self._heap and self._heap[0][0] <= horizon:
+            due, _, subscription = heapq.heappop(self._heap)
+
+            if not subscription.active:
+                continue
+
+            batch.append(subscription)
+
+            # Advance by whole periods so the schedule doesn't drift, skipping any
+            # periods that were missed entirely
+            due += subscription.period
+            if due <= now:
+                missed = math.floor((now - due) / subscription.period) + 1
+                subscription._missed += missed
+                due += missed * subscription.period
+
+            heapq.heappush(self._heap, (due, next(self._counter), subscription))
+
+        return batch
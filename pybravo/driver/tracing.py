@@ -0,0 +1,229 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Times the stages of the receive path to find where a control loop spends its time.
+
+A ``DriverTracer`` attached to a ``BravoDriver`` records how long each ``recv`` call,
+each datagram decode, and each callback takes, flags the callbacks that exceed a time
+budget, and exports the recorded events in the Chrome trace event format, which can be
+opened in ``chrome://tracing`` or Perfetto. When no tracer is attached, the driver only
+pays for a single ``None`` check per datagram.
+
+Examples:
+    >>> tracer = DriverTracer(budget=0.001, sample_every=10)
+    >>> bravo = BravoDriver(tracer=tracer)
+    >>> bravo.connect()
+    >>> tracer.slow_callbacks[0]
+    SlowCallback(name='__main__.plot_joint_position', packet_id=<PacketID.POSITION: 2>,
+    device_id=<DeviceID.BEND_ELBOW: 3>, elapsed=0.0042)
+    >>> tracer.dump("trace.json")
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, NamedTuple
+
+from pybravo.protocol import DeviceID, Packet, PacketID
+
+
+class SlowCallback(NamedTuple):
+    """A callback that took longer than the tracer budget."""
+
+    name: str
+    packet_id: PacketID | int
+    device_id: DeviceID | int
+    elapsed: float
+
+
+def callback_name(callback: Callable) -> str:
+    """Get the qualified name of a callback.
+
+    Args:
+        callback: The callback.
+
+    Returns:
+        The module and qualified name of the callback, or its representation if it
+        doesn't have one (e.g., a ``functools.partial``).
+    """
+    qualname = getattr(callback, "__qualname__", None)
+
+    if qualname is None:
+        return repr(callback)
+
+    return f"{getattr(callback, '__module__', None) or '?'}.{qualname}"
+
+
+class DriverTracer:
+    """Records the time spent in each stage of the driver receive path."""
+
+    def __init__(
+        self,
+        budget: float | None = None,
+        sample_every: int = 1,
+        max_events: int = 100_000,
+    ) -> None:
+        """Create a new driver tracer.
+
+        Args:
+            budget: The longest that a callback may take before it is flagged as slow
+                (s). If None, callbacks are never flagged. Defaults to None.
+            sample_every: Record the events of every n-th datagram. Slow callbacks are
+                flagged regardless. Defaults to 1.
+            max_events: The maximum number of events to keep. Once full, the oldest
+                events are discarded. Defaults to 100,000.
+        """
+        if sample_every < 1:
+            raise ValueError("The tracer must sample at least every datagram.")
+
+        self.budget = budget
+        self.sample_every = sample_every
+
+        # Whether the datagram currently being handled is sampled. Callbacks executed
+        # by a dispatcher are attributed to the most recently sampled datagram.
+        self.sampled = sample_every == 1
+
+        self.slow_callbacks: deque[SlowCallback] = deque(maxlen=1000)
+
+        # Events are kept as tuples and only converted when exported to keep the
+        # overhead of recording them low
+        self._events: deque[tuple[str, str, int, int, int, dict[str, Any]]] = deque(
+            maxlen=max_events
+        )
+        self._datagrams = 0
+        self._budget_ns = None if budget is None else int(budget * 1e9)
+
+    def __len__(self) -> int:
+        """Get the number of recorded events.
+
+        Returns:
+            The number of events.
+        """
+        return len(self._events)
+
+    def sample(self) -> bool:
+        """Decide whether to record the events of the next datagram.
+
+        Returns:
+            Whether the datagram is sampled.
+        """
+        self.sampled = self._datagrams % self.sample_every == 0
+        self._datagrams += 1
+        return self.sampled
+
+    def record(
+        self, name: str, category: str, start_ns: int, end_ns: int, **args: Any
+    ) -> None:
+        """Record a completed event.
+
+        Args:
+            name: The name of the event.
+            category: The category of the event (e.g., "socket").
+            start_ns: The ``perf_counter_ns`` time at which the event started.
+            end_ns: The ``perf_counter_ns`` time at which the event ended.
+            args: Additional values displayed with the event.
+        """
+        self._events.append(
+            (name, category, start_ns, end_ns, threading.get_ident(), args)
+        )
+
+    def executed(
+        self, packet: Packet, callback: Callable, start_ns: int, end_ns: int
+    ) -> SlowCallback | None:
+        """Record a callback execution and check it against the budget.
+
+        Args:
+            packet: The packet that the callback was executed for.
+            callback: The callback that was executed.
+            start_ns: The ``perf_counter_ns`` time at which the callback started.
+            end_ns: The ``perf_counter_ns`` time at which the callback returned.
+
+        Returns:
+            The slow callback if the callback exceeded the budget, otherwise None.
+        """
+        elapsed_ns = end_ns - start_ns
+        slow = self._budget_ns is not None and elapsed_ns > self._budget_ns
+
+        if not slow and not self.sampled:
+            return None
+
+        name = callback_name(callback)
+
+        if self.sampled:
+            self.record(
+                name,
+                "callback",
+                start_ns,
+                end_ns,
+                packet_id=str(packet.packet_id),
+                device_id=str(packet.device_id),
+            )
+
+        if not slow:
+            return None
+
+        slow_callback = SlowCallback(
+            name, packet.packet_id, packet.device_id, elapsed_ns / 1e9
+        )
+        self.slow_callbacks.append(slow_callback)
+
+        return slow_callback
+
+    def clear(self) -> None:
+        """Discard the recorded events and slow callbacks."""
+        self._events.clear()
+        self.slow_callbacks.clear()
+
+    def to_chrome_trace(self) -> dict[str, Any]:
+        """Convert the recorded events to the Chrome trace event format.
+
+        Returns:
+            A JSON-serializable trace with a complete ("X") event for each recorded
+            event, timestamped in microseconds.
+        """
+        pid = os.getpid()
+        events = [
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start_ns / 1e3,
+                "dur": (end_ns - start_ns) / 1e3,
+                "pid": pid,
+                "tid": tid,
+                "args": args,
+            }
+            for name, category, start_ns, end_ns, tid, args in list(self._events)
+        ]
+
+        return {"traceEvents": events, "displayTimeUnit": "ns"}
+
+    def dump(self, path: str | Path) -> None:
+        """Write the recorded events to a Chrome trace file.
+
+        Args:
+            path: The path of the JSON file to write.
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
@@ -18,9 +18,26 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from .device_id import DeviceID
-from .packet import Packet
+from .codec import StructCodec, register_codec
+from .command import JointCommandEncoder
+from .decoder import FrameDecoder
+from .device_id import JOINTS, DeviceID
+from .packet import FrozenPacket, Packet
 from .packet_id import PacketID
 from .mode_id import ModeID
+from .requests import REQUESTS, request_packet
 
-__all__ = ["DeviceID", "PacketID", "Packet", "ModeID"]
+__all__ = [
+    "DeviceID",
+    "JOINTS",
+    "PacketID",
+    "Packet",
+    "FrozenPacket",
+    "ModeID",
+    "FrameDecoder",
+    "JointCommandEncoder",
+    "REQUESTS",
+    "request_packet",
+    "StructCodec",
+    "register_codec",
+]
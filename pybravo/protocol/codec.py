@@ -0,0 +1,336 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+r"""Registry of codecs used to convert packet data to and from typed values.
+
+Each ``PacketID`` that carries a value is associated with a codec that converts the raw
+packet data into a Python value (e.g., a float, a tuple of floats, or a ``ModeID``) and
+back. Most codecs wrap a precompiled ``struct.Struct``, so decoding a packet is a single
+dictionary lookup followed by a single unpack. All multi-byte values are little-endian.
+
+Examples:
+    >>> decode_value(PacketID.POSITION, bytes([0x00, 0x00, 0x80, 0x3F]))
+    1.0
+    >>> encode_value(PacketID.POSITION_LIMITS, (3.0, -3.0))
+    b'\x00\x00@@\x00\x00@\xc0'
+    >>> register_codec(PacketID.SAVE, StructCodec("<B"))
+"""
+
+from __future__ import annotations
+
+import struct
+from enum import Enum
+from typing import Any, Protocol
+
+from pybravo.protocol.mode_id import ModeID
+from pybravo.protocol.packet_id import PACKET_IDS, PacketID
+
+
+class Codec(Protocol):
+    """Converts packet data to and from a typed value."""
+
+    def decode(self, data: bytes) -> Any:
+        """Decode the packet data.
+
+        Args:
+            data: The packet data.
+
+        Returns:
+            The decoded value.
+        """
+        ...
+
+    def encode(self, value: Any) -> bytes:
+        """Encode a value as packet data.
+
+        Args:
+            value: The value to encode.
+
+        Returns:
+            The packet data.
+        """
+        ...
+
+
+class StructCodec:
+    """A codec for fixed-size values described by a ``struct`` format string.
+
+    Formats that contain a single field are decoded to that value; formats with
+    multiple fields are decoded to a tuple.
+    """
+
+    __slots__ = ("_struct", "_scalar")
+
+    def __init__(self, fmt: str) -> None:
+        """Create a new struct codec.
+
+        Args:
+            fmt: The ``struct`` format string of the packet data.
+        """
+        self._struct = struct.Struct(fmt)
+        self._scalar = len(self._struct.unpack(bytes(self._struct.size))) == 1
+
+    @property
+    def size(self) -> int:
+        """Get the size of the packet data.
+
+        Returns:
+            The number of bytes in the encoded value.
+        """
+        return self._struct.size
+
+    def decode(self, data: bytes) -> Any:
+        """Decode the packet data.
+
+        Args:
+            data: The packet data.
+
+        Raises:
+            ValueError: The data does not match the size of the format.
+
+        Returns:
+            The decoded value, or a tuple of values if the format has multiple fields.
+        """
+        try:
+            values = self._struct.unpack(data)
+        except struct.error as ex:
+            raise ValueError(f"Unable to decode the data {data!r}: {ex}") from ex
+
+        return values[0] if self._scalar else values
+
+    def encode(self, value: Any) -> bytes:
+        """Encode a value as packet data.
+
+        Args:
+            value: The value, or sequence of values, to encode.
+
+        Raises:
+            ValueError: The value does not match the format.
+
+        Returns:
+            The packet data.
+        """
+        try:
+            return (
+                self._struct.pack(value) if self._scalar else self._struct.pack(*value)
+            )
+        except struct.error as ex:
+            raise ValueError(f"Unable to encode the value {value!r}: {ex}") from ex
+
+
+class EnumCodec:
+    """A codec for values that are a single byte enumeration."""
+
+    __slots__ = ("_members",)
+
+    def __init__(self, enum: type[Enum]) -> None:
+        """Create a new enum codec.
+
+        Args:
+            enum: The enumeration whose members are encoded as a single byte.
+        """
+        self._members = {member.value: member for member in enum}
+
+    def decode(self, data: bytes) -> Enum | int:
+        """Decode the packet data.
+
+        Args:
+            data: The packet data.
+
+        Raises:
+            ValueError: The data is empty.
+
+        Returns:
+            The enum member, or the raw value if it isn't a member of the enumeration.
+        """
+        if not data:
+            raise ValueError("Unable to decode an empty enum value.")
+
+        return self._members.get(data[0], data[0])
+
+    def encode(self, value: Enum | int) -> bytes:
+        """Encode a value as packet data.
+
+        Args:
+            value: The enum member (or raw value) to encode.
+
+        Returns:
+            The packet data.
+        """
+        return bytes([value if isinstance(value, int) else value.value])
+
+
+class PacketIDListCodec:
+    """A codec for a list of packet IDs (e.g., the packets to request)."""
+
+    __slots__ = ()
+
+    def decode(self, data: bytes) -> tuple[PacketID | int, ...]:
+        """Decode the packet data.
+
+        Args:
+            data: The packet data.
+
+        Returns:
+            The packet IDs.
+        """
+        return tuple(PACKET_IDS[packet_id] for packet_id in data)
+
+    def encode(self, value: Any) -> bytes:
+        """Encode a list of packet IDs as packet data.
+
+        Args:
+            value: The packet IDs to encode.
+
+        Returns:
+            The packet data.
+        """
+        return bytes(
+            packet_id if isinstance(packet_id, int) else packet_id.value
+            for packet_id in value
+        )
+
+
+# A software version is sent as one byte each for the major, submajor, and minor numbers
+_VERSION_SIZE = 3
+
+
+class VersionCodec:
+    """A codec for a software version formatted as ``major.submajor.minor``."""
+
+    __slots__ = ()
+
+    def decode(self, data: bytes) -> str:
+        """Decode the packet data.
+
+        Args:
+            data: The packet data.
+
+        Raises:
+            ValueError: The data does not contain three version numbers.
+
+        Returns:
+            The version string.
+        """
+        if len(data) != _VERSION_SIZE:
+            raise ValueError(f"Unable to decode the software version {data!r}.")
+
+        return f"{data[0]}.{data[1]}.{data[2]}"
+
+    def encode(self, value: str) -> bytes:
+        """Encode a version string as packet data.
+
+        Args:
+            value: The version string.
+
+        Returns:
+            The packet data.
+        """
+        return bytes(int(part) for part in value.split("."))
+
+
+_FLOAT = StructCodec("<f")
+_LIMITS = StructCodec("<2f")
+_POSE = StructCodec("<6f")
+_BOX = StructCodec("<6f")
+_CYLINDER = StructCodec("<7f")
+_PACKET_IDS = PacketIDListCodec()
+
+CODECS: dict[PacketID, Codec] = {
+    PacketID.MODE: EnumCodec(ModeID),
+    PacketID.VELOCITY: _FLOAT,
+    PacketID.POSITION: _FLOAT,
+    PacketID.CURRENT: _FLOAT,
+    PacketID.RELATIVE_POSITION: _FLOAT,
+    PacketID.INDEXED_POSITION: _FLOAT,
+    PacketID.REQUEST: _PACKET_IDS,
+    PacketID.SERIAL_NUMBER: _FLOAT,
+    PacketID.MODEL_NUMBER: _FLOAT,
+    PacketID.TEMPERATURE: _FLOAT,
+    PacketID.SOFTWARE_VERSION: VersionCodec(),
+    PacketID.KM_END_POS: _POSE,
+    PacketID.KM_END_VEL: _POSE,
+    PacketID.KM_END_VEL_LOCAL: _POSE,
+    PacketID.KM_BOX_OBSTACLE_02: _BOX,
+    PacketID.KM_BOX_OBSTACLE_03: _BOX,
+    PacketID.KM_BOX_OBSTACLE_04: _BOX,
+    PacketID.KM_BOX_OBSTACLE_05: _BOX,
+    PacketID.KM_CYLINDER_OBSTACLE_02: _CYLINDER,
+    PacketID.KM_CYLINDER_OBSTACLE_03: _CYLINDER,
+    PacketID.KM_CYLINDER_OBSTACLE_04: _CYLINDER,
+    PacketID.KM_CYLINDER_OBSTACLE_05: _CYLINDER,
+    PacketID.VOLTAGE: _FLOAT,
+    PacketID.HEARTBEAT_FREQUENCY: StructCodec("<B"),
+    PacketID.HEARTBEAT_SET: _PACKET_IDS,
+    PacketID.POSITION_LIMITS: _LIMITS,
+    PacketID.VELOCITY_LIMITS: _LIMITS,
+    PacketID.CURRENT_LIMITS: _LIMITS,
+    PacketID.ATI_FT_READING: _POSE,
+}
+
+
+def register_codec(packet_id: PacketID, codec: Codec) -> None:
+    """Register the codec used for a packet ID, replacing any existing codec.
+
+    Args:
+        packet_id: The ID of the packet.
+        codec: The codec to use for the packet data.
+    """
+    CODECS[packet_id] = codec
+
+
+def decode_value(packet_id: PacketID | int, data: bytes) -> Any:
+    """Decode packet data using the codec registered for the packet ID.
+
+    Args:
+        packet_id: The ID of the packet.
+        data: The packet data.
+
+    Raises:
+        ValueError: The data could not be decoded by the registered codec.
+
+    Returns:
+        The decoded value, or None if no codec is registered for the packet ID.
+    """
+    codec = CODECS.get(packet_id)  # type: ignore
+
+    return None if codec is None else codec.decode(data)
+
+
+def encode_value(packet_id: PacketID, value: Any) -> bytes:
+    """Encode a value using the codec registered for the packet ID.
+
+    Args:
+        packet_id: The ID of the packet.
+        value: The value to encode.
+
+    Raises:
+        ValueError: No codec is registered for the packet ID.
+        ValueError: The value could not be encoded by the registered codec.
+
+    Returns:
+        The packet data.
+    """
+    codec = CODECS.get(packet_id)
+
+    if codec is None:
+        raise ValueError(f"No codec is registered for the packet ID {packet_id}.")
+
+    return codec.encode(value)
@@ -0,0 +1,140 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+r"""Encodes a setpoint for every joint into a single preallocated datagram.
+
+Commanding the whole arm at a high rate through ``Packet`` objects creates and encodes
+seven packets per cycle. A ``JointCommandEncoder`` instead packs the setpoints with one
+precompiled ``struct.Struct`` and frames them into a datagram buffer that is reused for
+every command. The packet and device IDs of each frame are fixed, so the CRC of each
+trailer is precomputed, leaving only the setpoint bytes to checksum and stuff.
+
+Examples:
+    >>> encoder = JointCommandEncoder(PacketID.POSITION)
+    >>> bytes(encoder.encode([0.0, 0.5, 1.57, 1.57, 1.57, 2.8, 3.14]))[:10]
+    b'\x01\x01\x01\x01\x05\x03\x01\x08\xf2\x00'
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import Sequence
+
+from pybravo.protocol.crc8 import CRC8_TABLE, FINAL_XOR_VALUE, INIT_VALUE
+from pybravo.protocol.device_id import JOINTS, DeviceID
+from pybravo.protocol.frame import TRAILER_SIZE
+from pybravo.protocol.packet_id import PacketID
+
+# Each setpoint is a single float
+_VALUE_SIZE = 4
+
+# The length field counts the data and the trailer
+_LENGTH = _VALUE_SIZE + TRAILER_SIZE
+
+# The COBS code, the data, the trailer, and the delimiter
+FRAME_SIZE = _LENGTH + 2
+
+
+class JointCommandEncoder:
+    """Encodes one float setpoint per joint into a reusable datagram buffer."""
+
+    def __init__(
+        self, packet_id: PacketID, device_ids: Sequence[DeviceID] = JOINTS
+    ) -> None:
+        """Create a new joint command encoder.
+
+        Args:
+            packet_id: The ID of the setpoint packets (e.g., POSITION).
+            device_ids: The devices to command, in the order that their setpoints are
+                provided. Defaults to every joint, ordered by device ID.
+        """
+        self.packet_id = packet_id
+        self.device_ids = tuple(device_ids)
+
+        count = len(self.device_ids)
+        self._struct = struct.Struct(f"<{count}f")
+        self._values = bytearray(self._struct.size)
+        self._buf = bytearray(count * FRAME_SIZE)
+        self._view = memoryview(self._buf)
+
+        # The CRC of a frame is the CRC of its data extended by the trailer, so map
+        # every intermediate CRC to the final CRC of each device's frame
+        table = CRC8_TABLE
+        self._trailer_crcs = [
+            bytes(
+                table[table[table[crc ^ packet_id.value] ^ device_id.value] ^ _LENGTH]
+                ^ FINAL_XOR_VALUE
+                for crc in range(256)
+            )
+            for device_id in self.device_ids
+        ]
+
+        # Write the parts of each frame that never change
+        for i, device_id in enumerate(self.device_ids):
+            end = (i + 1) * FRAME_SIZE - 1
+            self._buf[end - 4 : end - 1] = bytes(
+                (packet_id.value, device_id.value, _LENGTH)
+            )
+
+    def encode(self, values: Sequence[float]) -> memoryview:
+        """Encode a setpoint for each device.
+
+        The returned view refers to the internal buffer, so it must be sent (or
+        copied) before the next call.
+
+        Args:
+            values: The setpoint of each device.
+
+        Raises:
+            struct.error: The wrong number of setpoints was provided.
+
+        Returns:
+            The encoded datagram.
+        """
+        self._struct.pack_into(self._values, 0, *values)
+
+        table = CRC8_TABLE
+        buf = self._buf
+        data = self._values
+
+        for i, trailer_crc in enumerate(self._trailer_crcs):
+            offset = i * FRAME_SIZE
+            start = i * _VALUE_SIZE
+            value = data[start : start + _VALUE_SIZE]
+            b0, b1, b2, b3 = value
+            end = offset + _LENGTH + 1
+
+            buf[offset + 1 : offset + 1 + _VALUE_SIZE] = value
+            buf[end - 1] = trailer_crc[
+                table[table[table[table[INIT_VALUE ^ b0] ^ b1] ^ b2] ^ b3]
+            ]
+
+            # COBS-stuff the frame in place: each zero (and the leading code byte)
+            # becomes the distance to the next zero, or to the end of the frame
+            code_index = offset
+            zero = buf.find(0, offset + 1, end)
+            while zero != -1:
+                buf[code_index] = zero - code_index
+                code_index = zero
+                zero = buf.find(0, zero + 1, end)
+
+            buf[code_index] = end - code_index
+
+        return self._view
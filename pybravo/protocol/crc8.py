@@ -0,0 +1,116 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Table-driven implementation of the CRC-8 used by the Reach serial protocol.
+
+The Reach serial protocol protects each packet with a reflected CRC-8 using the
+polynomial 0x4D, an initial value of 0x00, and a final XOR value of 0xFF. Computing the
+checksum bit-by-bit is prohibitively slow in Python at high packet rates, so this module
+precomputes a 256-entry lookup table and processes the data one byte at a time.
+
+Examples:
+    >>> checksum(bytes([0x03, 0x60, 0x01, 0x05]))
+    82
+    >>> verify(bytes([0x03, 0x60, 0x01, 0x05]), 0x52)
+    True
+"""
+
+from __future__ import annotations
+
+POLYNOMIAL = 0x4D
+INIT_VALUE = 0x00
+FINAL_XOR_VALUE = 0xFF
+
+
+def _reflect(value: int, width: int) -> int:
+    """Reverse the order of the bits in a value.
+
+    Args:
+        value: The value whose bits should be reversed.
+        width: The number of bits in the value.
+
+    Returns:
+        The value with its bits reversed.
+    """
+    reflected = 0
+    for _ in range(width):
+        reflected = (reflected << 1) | (value & 1)
+        value >>= 1
+    return reflected
+
+
+def _make_table(polynomial: int) -> tuple[int, ...]:
+    """Generate the lookup table for a reflected CRC-8.
+
+    Args:
+        polynomial: The (non-reflected) generator polynomial.
+
+    Returns:
+        A 256-entry table mapping each byte to its CRC contribution.
+    """
+    reflected_polynomial = _reflect(polynomial, 8)
+    table = []
+
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ reflected_polynomial if crc & 1 else crc >> 1
+        table.append(crc)
+
+    return tuple(table)
+
+
+CRC8_TABLE = _make_table(POLYNOMIAL)
+
+# The value of the CRC register (before the final XOR) after processing a message
+# followed by its own checksum. This is the same for every message, which allows the
+# checksum to be verified in the same pass that reads the data.
+RESIDUE = CRC8_TABLE[FINAL_XOR_VALUE]
+
+
+def checksum(data: bytes | bytearray | memoryview) -> int:
+    """Calculate the CRC-8 checksum of the provided data.
+
+    Args:
+        data: The data to calculate the checksum for.
+
+    Returns:
+        The CRC-8 checksum.
+    """
+    table = CRC8_TABLE
+    crc = INIT_VALUE
+
+    for byte in data:
+        crc = table[crc ^ byte]
+
+    return crc ^ FINAL_XOR_VALUE
+
+
+def verify(data: bytes | bytearray | memoryview, expected: int) -> bool:
+    """Verify that the CRC-8 checksum of the data matches the expected value.
+
+    Args:
+        data: The data to verify.
+        expected: The expected checksum.
+
+    Returns:
+        True if the checksum matches the expected value, False otherwise.
+    """
+    return checksum(data) == expected
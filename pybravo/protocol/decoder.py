@@ -0,0 +1,101 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Incrementally decodes packets from a stream of serial data.
+
+The ``FrameDecoder`` accepts chunks of serial data as they are received and decodes the
+frames that they contain. Frames that are split across chunks are held until the rest
+of the frame is received.
+
+Examples:
+    >>> decoder = FrameDecoder()
+    >>> decoder.feed(bytes([0x06, 0x03, 0x60]))
+    []
+    >>> decoder.feed(bytes([0x01, 0x05, 0x52, 0x00]))
+    [Packet(Packet ID: PacketID.REQUEST, Device ID: DeviceID.LINEAR_JAWS, ...)]
+"""
+
+from __future__ import annotations
+
+from typing import Callable
+
+from pybravo.protocol import frame
+from pybravo.protocol.packet import Packet
+
+
+class FrameDecoder:
+    """Decodes packets from serial data that may be split at arbitrary boundaries."""
+
+    def __init__(
+        self,
+        on_error: Callable[[bytes | bytearray | memoryview, Exception], None]
+        | None = None,
+    ) -> None:
+        """Create a new frame decoder.
+
+        Args:
+            on_error: An optional function to call with the raw frame and the exception
+                raised when a frame cannot be decoded.
+        """
+        self.on_error = on_error
+        self._pending = bytearray()
+
+    @property
+    def pending(self) -> int:
+        """Get the number of bytes held from an incomplete frame.
+
+        Returns:
+            The number of bytes waiting for the rest of their frame.
+        """
+        return len(self._pending)
+
+    def reset(self) -> None:
+        """Discard any incomplete frame."""
+        self._pending.clear()
+
+    def feed(self, chunk: bytes | bytearray | memoryview) -> list[Packet]:
+        """Decode the complete frames available after receiving a chunk of data.
+
+        Args:
+            chunk: The newly received serial data.
+
+        Returns:
+            The packets decoded from every frame completed by the chunk.
+        """
+        last = frame.rfind_delimiter(chunk)
+
+        if last < 0:
+            self._pending += chunk
+            return []
+
+        view = memoryview(chunk)
+
+        if self._pending:
+            self._pending += view[: last + 1]
+            complete: bytearray | memoryview = self._pending
+            self._pending = bytearray()
+        else:
+            # Decode straight out of the chunk to avoid copying it
+            complete = view[: last + 1]
+
+        packets = list(Packet.iter_decode(complete, self.on_error))
+        self._pending += view[last + 1 :]
+
+        return packets
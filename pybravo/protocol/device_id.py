@@ -45,3 +45,30 @@ class DeviceID(Enum):
     ROTATE_BASE = 0x07
     ALL_JOINTS = 0xFF
     FORCE_TORQUE_SENSOR = 0x0D
+
+
+# The devices that make up the joints of the Bravo 7, ordered by device ID
+JOINTS = (
+    DeviceID.LINEAR_JAWS,
+    DeviceID.ROTATE_END_EFFECTOR,
+    DeviceID.BEND_FOREARM,
+    DeviceID.ROTATE_ELBOW,
+    DeviceID.BEND_ELBOW,
+    DeviceID.BEND_SHOULDER,
+    DeviceID.ROTATE_BASE,
+)
+
+
+def _make_lookup_table() -> tuple[DeviceID | int, ...]:
+    """Create a lookup table from each raw byte to its DeviceID.
+
+    Returns:
+        A 256-entry table. Bytes that don't correspond to a known device ID map to
+        themselves.
+    """
+    members = {device_id.value: device_id for device_id in DeviceID}
+    return tuple(members.get(value, value) for value in range(256))
+
+
+# Calling DeviceID(value) is comparatively slow, so decoding uses this table instead
+DEVICE_IDS = _make_lookup_table()
@@ -0,0 +1,281 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+r"""Framing for packets defined using the Reach serial protocol.
+
+Each packet sent over the wire consists of the packet data followed by a four byte
+trailer (packet ID, device ID, length, and CRC-8), COBS-encoded and terminated with a
+zero delimiter. Byte stuffing is delegated to the C ``cobs`` extension, which is faster
+than stuffing in Python. The CRC of the trailer is folded into the CRC of the data
+without building the trailer first, and received frames are checked against the
+constant CRC residue, so the CRC is computed in a single pass in both directions.
+
+Examples:
+    >>> encode(0x01, 0x60, bytes([0x03]))
+    b'\x06\x03`\x01\x05R\x00'
+    >>> decode_from(b'\x06\x03`\x01\x05R\x00')
+    (1, 96, b'\x03', 7)
+"""
+
+from __future__ import annotations
+
+from cobs import cobs
+
+from pybravo.protocol.crc8 import CRC8_TABLE, FINAL_XOR_VALUE, INIT_VALUE, RESIDUE
+
+TRAILER_SIZE = 4
+MAX_DATA_SIZE = 0xFF - TRAILER_SIZE
+
+# The longest run of non-zero bytes that can be described by a single COBS code
+_MAX_BLOCK_SIZE = 0xFE
+
+
+def max_frame_size(data_size: int) -> int:
+    """Get the largest possible size of an encoded frame.
+
+    Args:
+        data_size: The number of bytes in the packet data.
+
+    Returns:
+        The maximum number of bytes needed to encode a frame, including the delimiter.
+    """
+    length = data_size + TRAILER_SIZE
+    return length + length // _MAX_BLOCK_SIZE + 2
+
+
+def _frame(
+    device_id: int, packet_id: int, data: bytes | bytearray | memoryview
+) -> bytes:
+    """Append the trailer to the packet data.
+
+    Args:
+        device_id: The raw ID of the device that the packet is targeting.
+        packet_id: The raw ID of the packet.
+        data: The packet data.
+
+    Raises:
+        ValueError: The packet data is too large to be described by the length field.
+
+    Returns:
+        The unencoded frame.
+    """
+    size = len(data)
+
+    if size > MAX_DATA_SIZE:
+        raise ValueError(
+            f"The packet data must not exceed {MAX_DATA_SIZE} bytes, got {size}."
+        )
+
+    length = size + TRAILER_SIZE
+
+    table = CRC8_TABLE
+    crc = INIT_VALUE
+    for byte in data:
+        crc = table[crc ^ byte]
+    crc = table[table[table[crc ^ packet_id] ^ device_id] ^ length] ^ FINAL_XOR_VALUE
+
+    return bytes(data) + bytes((packet_id, device_id, length, crc))
+
+
+def encode_into(
+    buf: bytearray,
+    offset: int,
+    device_id: int,
+    packet_id: int,
+    data: bytes | bytearray | memoryview,
+) -> int:
+    """Encode a frame into a preallocated buffer.
+
+    Args:
+        buf: The buffer to write the encoded frame into. The buffer must have room for
+            at least ``max_frame_size(len(data))`` bytes after the offset.
+        offset: The index in the buffer at which to start writing the frame.
+        device_id: The raw ID of the device that the packet is targeting.
+        packet_id: The raw ID of the packet.
+        data: The packet data.
+
+    Raises:
+        ValueError: The packet data is too large to be described by the length field.
+
+    Returns:
+        The number of bytes written to the buffer, including the delimiter.
+    """
+    encoded = cobs.encode(_frame(device_id, packet_id, data))
+    end = offset + len(encoded)
+
+    buf[offset:end] = encoded
+    buf[end] = 0
+
+    return end + 1 - offset
+
+
+def encode(
+    device_id: int, packet_id: int, data: bytes | bytearray | memoryview
+) -> bytes:
+    """Encode a frame.
+
+    Args:
+        device_id: The raw ID of the device that the packet is targeting.
+        packet_id: The raw ID of the packet.
+        data: The packet data.
+
+    Raises:
+        ValueError: The packet data is too large to be described by the length field.
+
+    Returns:
+        The encoded frame, including the delimiter.
+    """
+    return cobs.encode(_frame(device_id, packet_id, data)) + b"\x00"
+
+
+def decode_from(
+    frame: bytes | bytearray | memoryview, offset: int = 0, end: int | None = None
+) -> tuple[int, int, bytes, int]:
+    """Decode the frame that starts at the given offset.
+
+    Decoding stops at the first zero delimiter after the offset, or at the end of the
+    buffer if the frame is not delimited. Bytes and bytearrays are decoded in place,
+    so a preallocated receive buffer can be decoded without copying the datagram.
+
+    Args:
+        frame: The buffer containing the encoded frame.
+        offset: The index in the buffer at which the frame starts.
+        end: The index in the buffer at which the received data ends. Defaults to the
+            length of the buffer.
+
+    Raises:
+        ValueError: The frame is empty
+        ValueError: The frame is not a valid COBS encoding
+        ValueError: Invalid CRC value
+        ValueError: The actual payload is not equal to the specified payload
+
+    Returns:
+        The raw device ID, the raw packet ID, the packet data, and the index in the
+        buffer immediately after the frame.
+    """
+    if end is None:
+        end = len(frame)
+
+    if isinstance(frame, memoryview):
+        # Memoryviews can't be searched, so search a copy of the rest of the frame
+        base = offset
+        frame = frame[offset:end].tobytes()
+        end -= offset
+        offset = 0
+    else:
+        base = 0
+
+    stop = frame.find(0, offset, end)
+    if stop == -1:
+        stop = end
+
+    if stop == offset:
+        raise ValueError("Cannot decode an empty byte array!")
+
+    try:
+        decoded = cobs.decode(frame[offset:stop])
+    except cobs.DecodeError as ex:
+        raise ValueError(f"The frame is not a valid COBS encoding: {ex}") from None
+
+    table = CRC8_TABLE
+    crc = INIT_VALUE
+    for byte in decoded:
+        crc = table[crc ^ byte]
+
+    if crc != RESIDUE:
+        raise ValueError("The expected and actual CRC values do not match.")
+
+    length = len(decoded)
+
+    if length < TRAILER_SIZE or decoded[-2] != length:
+        raise ValueError(
+            "The specified payload size is not equal to the actual payload size."
+        )
+
+    return decoded[-3], decoded[-4], decoded[:-TRAILER_SIZE], base + stop + 1
+
+
+def peek_ids(frame: bytes | bytearray | memoryview) -> tuple[int, int] | None:
+    """Read the IDs from the trailer of a frame without checking the frame.
+
+    This is intended for describing frames that failed to decode (e.g., due to a CRC
+    failure), so the IDs may themselves be corrupt.
+
+    Args:
+        frame: The encoded frame, without the delimiter.
+
+    Returns:
+        The raw device ID and packet ID, or None if the frame is too damaged to read
+        them.
+    """
+    try:
+        decoded = cobs.decode(bytes(frame))
+    except cobs.DecodeError:
+        return None
+
+    if len(decoded) < TRAILER_SIZE:
+        return None
+
+    return decoded[-3], decoded[-4]
+
+
+def find_delimiter(
+    buffer: bytes | bytearray | memoryview, offset: int = 0, end: int | None = None
+) -> int:
+    """Find the first frame delimiter at or after the given offset.
+
+    Args:
+        buffer: The buffer to search.
+        offset: The index at which to start searching.
+        end: The index at which to stop searching. Defaults to the length of the
+            buffer.
+
+    Returns:
+        The index of the delimiter, or the end of the search if there is none.
+    """
+    if end is None:
+        end = len(buffer)
+
+    if isinstance(buffer, memoryview):
+        while offset < end and buffer[offset] != 0:
+            offset += 1
+        return offset
+
+    index = buffer.find(0, offset, end)
+
+    return end if index == -1 else index
+
+
+def rfind_delimiter(buffer: bytes | bytearray | memoryview) -> int:
+    """Find the last frame delimiter in a buffer.
+
+    Args:
+        buffer: The buffer to search.
+
+    Returns:
+        The index of the last delimiter, or -1 if there is none.
+    """
+    if isinstance(buffer, memoryview):
+        index = len(buffer) - 1
+        while index >= 0 and buffer[index] != 0:
+            index -= 1
+        return index
+
+    return buffer.rfind(0)
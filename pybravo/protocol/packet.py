@@ -30,31 +30,45 @@ Examples:
 
 from __future__ import annotations
 
-import struct
+from enum import Enum
+from typing import Any, Callable, Iterable, Iterator
 
-from cobs import cobs
-from crc import Calculator, Configuration
+from pybravo.protocol import codec, frame
+from pybravo.protocol.device_id import DEVICE_IDS, DeviceID
+from pybravo.protocol.packet_id import PACKET_IDS, PacketID
 
-from pybravo.protocol.device_id import DeviceID
-from pybravo.protocol.packet_id import PacketID
-from pybravo.protocol.mode_id import ModeID
+# Marks packets whose value has not been decoded yet
+_UNDECODED: Any = object()
+
+# The largest UDP payload that fits in a standard 1500 byte Ethernet frame
+DEFAULT_MAX_DATAGRAM_SIZE = 1472
+
+
+def _raw_id(identifier: Enum | int) -> int:
+    """Get the raw value of a device or packet ID.
+
+    Args:
+        identifier: The ID, or the raw value of an unknown ID.
+
+    Returns:
+        The raw value of the ID.
+    """
+    return identifier if type(identifier) is int else identifier.value
 
 
 class Packet:
-    """A serial packet defined using the Reach serial specification."""
-
-    _crc_calculator = Calculator(
-        Configuration(
-            width=8,
-            polynomial=0x4D,
-            init_value=0x00,
-            final_xor_value=0xFF,
-            reverse_input=True,
-            reverse_output=True,
-        )
-    )
+    """A serial packet defined using the Reach serial specification.
+
+    Packets use ``__slots__`` to keep them small and cheap to create at high receive
+    rates. IDs that are not defined by ``DeviceID`` or ``PacketID`` (e.g., from newer
+    firmware) are stored as their raw integer values.
+    """
 
-    def __init__(self, device_id: DeviceID, packet_id: PacketID, data: bytes) -> None:
+    __slots__ = ("device_id", "packet_id", "data", "_value")
+
+    def __init__(
+        self, device_id: DeviceID | int, packet_id: PacketID | int, data: bytes
+    ) -> None:
         """Create a new serial packet.
 
         Args:
@@ -65,7 +79,48 @@ class Packet:
         self.device_id = device_id
         self.packet_id = packet_id
         self.data = data
-        self.value = None
+        self._value = _UNDECODED
+
+    @classmethod
+    def from_value(
+        cls, device_id: DeviceID | int, packet_id: PacketID, value: Any
+    ) -> Packet:
+        """Create a packet by encoding a value with the codec for the packet ID.
+
+        Args:
+            device_id: The device ID that the packet is targeting.
+            packet_id: The ID of the packet.
+            value: The value to encode as the packet data.
+
+        Raises:
+            ValueError: No codec is registered for the packet ID.
+            ValueError: The value could not be encoded.
+
+        Returns:
+            A packet whose data is the encoded value.
+        """
+        return cls(device_id, packet_id, codec.encode_value(packet_id, value))
+
+    @property
+    def value(self) -> Any:
+        """Get the typed value of the packet data.
+
+        The data is decoded the first time that the value is accessed using the codec
+        registered for the packet ID.
+
+        Raises:
+            ValueError: The data could not be decoded by the registered codec.
+
+        Returns:
+            The decoded value, or None if no codec is registered for the packet ID.
+        """
+        value = self._value
+
+        if value is _UNDECODED:
+            value = codec.decode_value(self.packet_id, self.data)
+            object.__setattr__(self, "_value", value)
+
+        return value
 
     def __str__(self) -> str:
         """Print the packet as a string.
@@ -78,25 +133,92 @@ class Packet:
             f" Data: {self.data!r})"
         )
 
+    def __reduce__(self) -> tuple:
+        """Support pickling by recreating the packet from its fields.
+
+        The decoded value is not pickled; it is decoded again when it is accessed.
+
+        Returns:
+            The information needed to recreate the packet.
+        """
+        return (self.__class__, (self.device_id, self.packet_id, self.data))
+
+    def __repr__(self) -> str:
+        """Represent the packet as a string.
+
+        Returns:
+            A string description of the packet.
+        """
+        return str(self)
+
     def encode(self) -> bytes:
         """Encode the serial data using the COBS encoding algorithm.
 
         Returns:
             The encoded serial data.
         """
-        data = self.data
-        data += struct.pack(
-            ">BBB",
-            self.packet_id.value,
-            self.device_id.value,
-            len(self.data) + 4,
+        return frame.encode(_raw_id(self.device_id), _raw_id(self.packet_id), self.data)
+
+    def encode_into(self, buf: bytearray, offset: int = 0) -> int:
+        """Encode the serial data into a preallocated buffer.
+
+        Args:
+            buf: The buffer to write the encoded data into.
+            offset: The index in the buffer at which to start writing.
+
+        Returns:
+            The number of bytes written to the buffer.
+        """
+        return frame.encode_into(
+            buf, offset, _raw_id(self.device_id), _raw_id(self.packet_id), self.data
         )
-        data += struct.pack(">B", self._crc_calculator.checksum(data))
 
-        return cobs.encode(data) + b"\x00"
+    @staticmethod
+    def encode_many(
+        packets: Iterable[Packet], max_size: int = DEFAULT_MAX_DATAGRAM_SIZE
+    ) -> list[bytes]:
+        """Encode multiple packets into as few datagrams as possible.
+
+        The packets are encoded back-to-back in the order provided. A new datagram is
+        started whenever the next packet would exceed the maximum datagram size.
+
+        Args:
+            packets: The packets to encode.
+            max_size: The maximum size of each datagram. Defaults to the largest UDP
+                payload that fits in a standard Ethernet frame.
+
+        Raises:
+            ValueError: A single packet is too large to fit in a datagram.
+
+        Returns:
+            The encoded datagrams.
+        """
+        datagrams = []
+        buf = bytearray(max_size)
+        used = 0
+
+        for packet in packets:
+            needed = frame.max_frame_size(len(packet.data))
+
+            if needed > max_size:
+                raise ValueError(
+                    f"The packet {packet} is too large to fit in a datagram of"
+                    f" {max_size} bytes."
+                )
+
+            if used + needed > max_size:
+                datagrams.append(bytes(buf[:used]))
+                used = 0
+
+            used += packet.encode_into(buf, used)
+
+        if used:
+            datagrams.append(bytes(buf[:used]))
+
+        return datagrams
 
     @classmethod
-    def decode(cls, data: bytes) -> Packet:
+    def decode(cls, data: bytes | bytearray | memoryview) -> Packet:
         """Decode the provided serial data.
 
         Args:
@@ -110,27 +232,138 @@ class Packet:
         Returns:
             A packet with decoded serial data.
         """
-        if len(data) <= 0:
-            raise ValueError("Cannot decode an empty byte array!")
+        device_id, packet_id, payload, _ = frame.decode_from(data)
+
+        return cls(DEVICE_IDS[device_id], PACKET_IDS[packet_id], payload)
+
+    @classmethod
+    def iter_decode(
+        cls,
+        data: bytes | bytearray | memoryview,
+        on_error: Callable[[bytes | bytearray | memoryview, Exception], None]
+        | None = None,
+        end: int | None = None,
+    ) -> Iterator[Packet]:
+        """Decode each of the zero-delimited frames in the provided serial data.
+
+        Frames that cannot be decoded are skipped so that a single corrupt frame does
+        not prevent the remaining frames from being decoded. Bytes and bytearrays are
+        decoded in place, so a datagram received into a preallocated buffer is never
+        copied as a whole.
+
+        Args:
+            data: The serial data containing one or more encoded frames.
+            on_error: An optional function to call with the raw frame and the exception
+                raised when a frame cannot be decoded.
+            end: The index at which the serial data ends (e.g., the number of bytes
+                received into a larger buffer). Defaults to the length of the data.
+
+        Yields:
+            The packets decoded from each valid frame, in the order they were received.
+        """
+        if end is None:
+            end = len(data)
+
+        # Searching for the delimiters requires bytes, so copy a view once up front
+        # rather than once per frame
+        if isinstance(data, memoryview):
+            data = data[:end].tobytes()
+
+        offset = 0
+
+        while offset < end:
+            # Skip empty frames (e.g., consecutive delimiters)
+            if data[offset] == 0:
+                offset += 1
+                continue
+
+            try:
+                device_id, packet_id, payload, next_offset = frame.decode_from(
+                    data, offset, end
+                )
+            except ValueError as ex:
+                next_offset = frame.find_delimiter(data, offset, end) + 1
+                if on_error is not None:
+                    on_error(data[offset : next_offset - 1], ex)
+            else:
+                yield cls(DEVICE_IDS[device_id], PACKET_IDS[packet_id], payload)
+
+            offset = next_offset
+
+
+class FrozenPacket(Packet):
+    """An immutable packet whose encoded serial data is computed once and cached.
+
+    Frozen packets are intended for packets that are sent repeatedly without
+    modification (e.g., requests sent by a high-rate poller), so that sending them
+    doesn't require recomputing the CRC and COBS encoding every time.
+    """
+
+    __slots__ = ("_encoded",)
+
+    def __init__(
+        self, device_id: DeviceID | int, packet_id: PacketID | int, data: bytes
+    ) -> None:
+        """Create a new frozen packet.
+
+        Args:
+            device_id: The device ID that the packet is targeting.
+            packet_id: The ID of the packet.
+            data: The packet data.
+        """
+        data = bytes(data)
 
-        if data[-1] == 0:
-            decoded = bytearray(cobs.decode(data[:-1]))
-        else:
-            decoded = bytearray(cobs.decode(data))
+        object.__setattr__(self, "device_id", device_id)
+        object.__setattr__(self, "packet_id", packet_id)
+        object.__setattr__(self, "data", data)
+        object.__setattr__(self, "_value", _UNDECODED)
+        object.__setattr__(
+            self,
+            "_encoded",
+            frame.encode(_raw_id(device_id), _raw_id(packet_id), data),
+        )
 
-        actual_crc = decoded.pop()
+    def __setattr__(self, name: str, value: object) -> None:
+        """Prevent the packet from being modified after it is created.
 
-        if not cls._crc_calculator.verify(decoded, actual_crc):
-            raise ValueError("The expected and actual CRC values do not match.")
+        Args:
+            name: The name of the attribute.
+            value: The new attribute value.
 
-        length = decoded.pop()
+        Raises:
+            AttributeError: Frozen packets cannot be modified.
+        """
+        raise AttributeError(f"Cannot set attribute {name!r} of a frozen packet.")
 
-        if len(decoded) + 2 != length:
-            raise ValueError(
-                "The specified payload size is not equal to the actual payload size."
-            )
+    def __delattr__(self, name: str) -> None:
+        """Prevent the packet attributes from being deleted.
 
-        device_id = decoded.pop()
-        packet_id = decoded.pop()
+        Args:
+            name: The name of the attribute.
 
-        return Packet(DeviceID(device_id), PacketID(packet_id), bytes(decoded))
+        Raises:
+            AttributeError: Frozen packets cannot be modified.
+        """
+        raise AttributeError(f"Cannot delete attribute {name!r} of a frozen packet.")
+
+    def encode(self) -> bytes:
+        """Get the cached encoded serial data.
+
+        Returns:
+            The encoded serial data.
+        """
+        return self._encoded
+
+    def encode_into(self, buf: bytearray, offset: int = 0) -> int:
+        """Copy the cached encoded serial data into a preallocated buffer.
+
+        Args:
+            buf: The buffer to write the encoded data into.
+            offset: The index in the buffer at which to start writing.
+
+        Returns:
+            The number of bytes written to the buffer.
+        """
+        size = len(self._encoded)
+        buf[offset : offset + size] = self._encoded
+        return size
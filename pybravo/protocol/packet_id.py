@@ -68,3 +68,18 @@ class PacketID(Enum):
     ATI_FT_READING = 0xD8
     BOOTLOADER = 0xFF
     VOLTAGE_THRESHOLD_PARAMETERS = 0x99
+
+
+def _make_lookup_table() -> tuple[PacketID | int, ...]:
+    """Create a lookup table from each raw byte to its PacketID.
+
+    Returns:
+        A 256-entry table. Bytes that don't correspond to a known packet ID map to
+        themselves.
+    """
+    members = {packet_id.value: packet_id for packet_id in PacketID}
+    return tuple(members.get(value, value) for value in range(256))
+
+
+# Calling PacketID(value) is comparatively slow, so decoding uses this table instead
+PACKET_IDS = _make_lookup_table()
@@ -0,0 +1,56 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+r"""Prebuilt request packets for every combination of device and packet ID.
+
+Requesting a value from the Bravo is done by sending a ``REQUEST`` packet whose data is
+the ID of the packet to request. These requests never change, so this module builds
+each of them once as a ``FrozenPacket`` whose encoded bytes are cached.
+
+Examples:
+    >>> bravo.send(REQUESTS[DeviceID.ALL_JOINTS, PacketID.POSITION])
+    >>> request_packet(DeviceID.BEND_ELBOW, PacketID.VELOCITY)
+    Packet(Packet ID: PacketID.REQUEST, Device ID: DeviceID.BEND_ELBOW, Data: b'\x02')
+"""
+
+from pybravo.protocol.device_id import DeviceID
+from pybravo.protocol.packet import FrozenPacket
+from pybravo.protocol.packet_id import PacketID
+
+REQUESTS: dict[tuple[DeviceID, PacketID], FrozenPacket] = {
+    (device_id, packet_id): FrozenPacket(
+        device_id, PacketID.REQUEST, bytes([packet_id.value])
+    )
+    for device_id in DeviceID
+    for packet_id in PacketID
+}
+
+
+def request_packet(device_id: DeviceID, packet_id: PacketID) -> FrozenPacket:
+    """Get the prebuilt request for a packet from a device.
+
+    Args:
+        device_id: The device to request the packet from.
+        packet_id: The ID of the packet to request.
+
+    Returns:
+        The prebuilt request packet.
+    """
+    return REQUESTS[device_id, packet_id]
@@ -0,0 +1,56 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Run a simulated Bravo 7 until interrupted.
+
+Run with ``python3 -m pybravo.sim --port 6789 --emission-rate 1000``, then connect a
+``BravoDriver`` to the printed address.
+"""
+
+import argparse
+import time
+
+from pybravo.sim import BravoSimulator
+
+
+def main() -> None:
+    """Run the simulator and periodically print the traffic counters."""
+    parser = argparse.ArgumentParser(description="Simulate a Reach Bravo 7.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6789)
+    parser.add_argument("--response-delay", type=float, default=0.0)
+    parser.add_argument("--emission-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with BravoSimulator(
+        args.host, args.port, args.response_delay, args.emission_rate
+    ) as sim:
+        print(f"Simulating a Bravo 7 at {sim.address[0]}:{sim.address[1]}")
+
+        try:
+            while True:
+                time.sleep(1.0)
+                print(sim.stats())
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
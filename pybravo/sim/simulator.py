@@ -0,0 +1,572 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""A local UDP simulator of the Reach Bravo 7 manipulator.
+
+The ``BravoSimulator`` binds a local UDP port and speaks the Reach serial protocol, so
+a ``BravoDriver`` can be connected to it in place of a physical arm. The simulator
+answers REQUEST packets for every ``PacketID``, integrates simple dynamics for the
+position, velocity, and current commands sent to each joint, streams the packets
+configured with HEARTBEAT_SET and HEARTBEAT_FREQUENCY, stores any other parameters that
+are set, and can be configured to delay its responses and to emit the joint state at a
+fixed rate.
+
+Examples:
+    >>> with BravoSimulator(emission_rate=1000.0) as sim:
+    ...     bravo = BravoDriver()
+    ...     bravo.connect(*sim.address)
+    ...     bravo.send(Packet.from_value(DeviceID.BEND_ELBOW, PacketID.POSITION, 1.0))
+"""
+
+from __future__ import annotations
+
+import heapq
+import selectors
+import socket
+import threading
+import time
+from typing import Iterable, NamedTuple
+
+from pybravo.protocol import JOINTS, DeviceID, ModeID, Packet, PacketID
+from pybravo.protocol.codec import CODECS, encode_value
+
+# The packets describing the joint state, which are computed from the joint dynamics
+_DYNAMIC_PACKET_IDS = frozenset(
+    (PacketID.MODE, PacketID.POSITION, PacketID.VELOCITY, PacketID.CURRENT)
+)
+
+# The values reported for the parameters that aren't zero by default
+_DEFAULT_VALUES = {
+    PacketID.TEMPERATURE: 25.0,
+    PacketID.VOLTAGE: 24.0,
+    PacketID.SOFTWARE_VERSION: "1.0.0",
+    PacketID.POSITION_LIMITS: (6.28, 0.0),
+    PacketID.VELOCITY_LIMITS: (0.5, -0.5),
+    PacketID.CURRENT_LIMITS: (2000.0, -2000.0),
+}
+
+
+class SimulatedJointState(NamedTuple):
+    """The state of a simulated joint."""
+
+    mode: ModeID
+    position: float
+    velocity: float
+    current: float
+
+
+class SimulatorStats(NamedTuple):
+    """The traffic exchanged with the simulator."""
+
+    datagrams_received: int
+    packets_received: int
+    datagrams_sent: int
+    packets_sent: int
+
+
+class _Joint:
+    """The dynamics of a single simulated joint."""
+
+    __slots__ = ("mode", "position", "velocity", "current", "target")
+
+    def __init__(self) -> None:
+        """Create a new joint at rest in standby."""
+        self.mode = ModeID.STANDBY
+        self.position = 0.0
+        self.velocity = 0.0
+        self.current = 0.0
+        self.target = 0.0
+
+    def advance(self, dt: float, max_velocity: float, current_gain: float) -> None:
+        """Integrate the joint dynamics.
+
+        Args:
+            dt: The amount of time to integrate over (s).
+            max_velocity: The speed at which the joint tracks a position command.
+            current_gain: The velocity produced by a unit of current.
+        """
+        if self.mode is ModeID.POSITION:
+            error = self.target - self.position
+            step = max_velocity * dt
+
+            if abs(error) <= step:
+                self.position = self.target
+                self.velocity = 0.0
+            else:
+                self.velocity = max_velocity if error > 0 else -max_velocity
+                self.position += self.velocity * dt
+
+            self.current = self.velocity / current_gain
+        elif self.mode is ModeID.VELOCITY:
+            self.position += self.velocity * dt
+            self.current = self.velocity / current_gain
+        elif self.mode is ModeID.CURRENT:
+            self.velocity = self.current * current_gain
+            self.position += self.velocity * dt
+        else:
+            self.velocity = 0.0
+            self.current = 0.0
+
+
+class BravoSimulator:
+    """A simulated Bravo 7 that communicates over a local UDP socket."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        response_delay: float = 0.0,
+        emission_rate: float = 0.0,
+        emitted_packets: Iterable[PacketID] = (PacketID.POSITION, PacketID.VELOCITY),
+    ) -> None:
+        """Create a new simulator.
+
+        Args:
+            host: The address to bind to. Defaults to "127.0.0.1".
+            port: The port to bind to. Defaults to 0, which binds to a free port.
+            response_delay: The time between receiving a request and sending the
+                response (s). Defaults to 0.
+            emission_rate: The rate at which the simulator sends the emitted packets of
+                every joint to the most recent client (Hz). Defaults to 0, which
+                disables the emission.
+            emitted_packets: The packets to send for each joint at the emission rate.
+                Defaults to the position and velocity.
+        """
+        if response_delay < 0 or emission_rate < 0:
+            raise ValueError("The response delay and emission rate can't be negative.")
+
+        self.response_delay = response_delay
+        self.emission_rate = emission_rate
+        self.emitted_packets = tuple(emitted_packets)
+
+        # The speed at which joints track position commands, and the joint velocity
+        # produced by a unit of current
+        self.max_velocity = 0.5
+        self.current_gain = 0.001
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+
+        self._joints = {device_id: _Joint() for device_id in JOINTS}
+        self._parameters = {
+            (device_id, packet_id): _default_data(packet_id)
+            for device_id in JOINTS
+            for packet_id in PacketID
+            if packet_id not in _DYNAMIC_PACKET_IDS
+        }
+        self._lock = threading.Lock()
+        self._last_advance = time.monotonic()
+
+        # Delayed responses are held in a heap ordered by the time that they are due
+        self._pending: list[tuple[float, int, bytes, tuple[str, int]]] = []
+        self._sequence = 0
+        self._client: tuple[str, int] | None = None
+
+        # The time at which each joint with an active heartbeat next streams its packets
+        self._heartbeats: dict[DeviceID, float] = {}
+
+        self._datagrams_received = 0
+        self._packets_received = 0
+        self._datagrams_sent = 0
+        self._packets_sent = 0
+
+        self._running = False
+        self._thread: threading.Thread | None = None
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """The address that the simulator is bound to."""
+        return self.sock.getsockname()
+
+    def __enter__(self) -> BravoSimulator:
+        """Start the simulator when entering a context.
+
+        Returns:
+            The running simulator.
+        """
+        self.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Stop the simulator when leaving the context."""
+        self.stop()
+
+    def start(self) -> None:
+        """Start serving requests on a background thread."""
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving requests and close the socket."""
+        if self._thread is not None:
+            self._running = False
+            self._wakeup_w.send(b"\x00")
+            self._thread.join()
+            self._thread = None
+
+        self.sock.close()
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+
+    def state(self, device_id: DeviceID) -> SimulatedJointState:
+        """Get the current state of a joint.
+
+        Args:
+            device_id: The joint to get the state of.
+
+        Returns:
+            The mode, position, velocity, and current of the joint.
+        """
+        with self._lock:
+            self._advance(time.monotonic())
+            joint = self._joints[device_id]
+            return SimulatedJointState(
+                joint.mode, joint.position, joint.velocity, joint.current
+            )
+
+    def stats(self) -> SimulatorStats:
+        """Get the number of datagrams and packets exchanged with the simulator.
+
+        Returns:
+            The traffic counters.
+        """
+        return SimulatorStats(
+            self._datagrams_received,
+            self._packets_received,
+            self._datagrams_sent,
+            self._packets_sent,
+        )
+
+    def _serve(self) -> None:
+        """Answer requests and emit the joint state until the simulator is stopped."""
+        selector = selectors.DefaultSelector()
+        selector.register(self.sock, selectors.EVENT_READ)
+        selector.register(self._wakeup_r, selectors.EVENT_READ)
+        next_emission = time.monotonic()
+
+        try:
+            while self._running:
+                # Sleep until a datagram arrives or the next response or emission is due
+                deadlines = []
+                if self._pending:
+                    deadlines.append(self._pending[0][0])
+                if self.emission_rate > 0 and self._client is not None:
+                    deadlines.append(next_emission)
+                if self._heartbeats and self._client is not None:
+                    deadlines.append(min(self._heartbeats.values()))
+
+                timeout = (
+                    max(min(deadlines) - time.monotonic(), 0) if deadlines else None
+                )
+
+                for key, _ in selector.select(timeout):
+                    if key.fileobj is self.sock:
+                        self._receive()
+
+                now = time.monotonic()
+
+                while self._pending and self._pending[0][0] <= now:
+                    _, _, datagram, address = heapq.heappop(self._pending)
+                    self._send(datagram, address)
+
+                if (
+                    self.emission_rate > 0
+                    and self._client is not None
+                    and next_emission <= now
+                ):
+                    self._emit(self._client)
+
+                    # Skip the missed emissions rather than sending a burst to catch up
+                    next_emission = max(next_emission + 1 / self.emission_rate, now)
+
+                if self._client is not None:
+                    self._emit_heartbeats(self._client, now)
+        finally:
+            selector.close()
+
+    def _receive(self) -> None:
+        """Handle every datagram waiting on the socket."""
+        while True:
+            try:
+                data, address = self.sock.recvfrom(2048)
+            except BlockingIOError:
+                return
+            except OSError:
+                # e.g., the ICMP error from sending to a client that has gone away
+                continue
+
+            self._datagrams_received += 1
+            self._client = address
+            responses: list[Packet] = []
+
+            with self._lock:
+                self._advance(time.monotonic())
+
+                for packet in Packet.iter_decode(data):
+                    self._packets_received += 1
+
+                    if packet.packet_id is PacketID.REQUEST:
+                        responses.extend(self._answer(packet))
+                    else:
+                        self._apply(packet)
+
+            for datagram in Packet.encode_many(responses):
+                if self.response_delay > 0:
+                    self._sequence += 1
+                    heapq.heappush(
+                        self._pending,
+                        (
+                            time.monotonic() + self.response_delay,
+                            self._sequence,
+                            datagram,
+                            address,
+                        ),
+                    )
+                else:
+                    self._send(datagram, address)
+
+    def _answer(self, request: Packet) -> list[Packet]:
+        """Create the responses to a REQUEST packet.
+
+        Args:
+            request: The REQUEST packet.
+
+        Returns:
+            The response from each targeted joint for each requested packet.
+        """
+        try:
+            packet_ids = request.value
+        except ValueError:
+            return []
+
+        return [
+            self._report(device_id, packet_id)
+            for device_id in self._targets(request.device_id)
+            for packet_id in packet_ids
+            if isinstance(packet_id, PacketID)
+        ]
+
+    def _apply(self, command: Packet) -> None:
+        """Apply a command or parameter update sent to the simulator.
+
+        Args:
+            command: The received packet.
+        """
+        try:
+            value = command.value
+        except ValueError:
+            return
+
+        for device_id in self._targets(command.device_id):
+            joint = self._joints[device_id]
+
+            if command.packet_id is PacketID.POSITION:
+                joint.mode = ModeID.POSITION
+                joint.target = value
+            elif command.packet_id is PacketID.VELOCITY:
+                joint.mode = ModeID.VELOCITY
+                joint.velocity = value
+            elif command.packet_id is PacketID.CURRENT:
+                joint.mode = ModeID.CURRENT
+                joint.current = value
+            elif command.packet_id is PacketID.MODE:
+                if isinstance(value, ModeID):
+                    joint.mode = value
+                    joint.target = joint.position
+            elif isinstance(command.packet_id, PacketID):
+                self._parameters[device_id, command.packet_id] = command.data
+
+                if command.packet_id in (
+                    PacketID.HEARTBEAT_SET,
+                    PacketID.HEARTBEAT_FREQUENCY,
+                ):
+                    self._schedule_heartbeat(device_id)
+
+    def _report(self, device_id: DeviceID, packet_id: PacketID) -> Packet:
+        """Create a packet reporting the current value of a joint field.
+
+        Args:
+            device_id: The joint to report.
+            packet_id: The field to report.
+
+        Returns:
+            The packet containing the value.
+        """
+        joint = self._joints[device_id]
+
+        if packet_id is PacketID.POSITION:
+            return Packet.from_value(device_id, packet_id, joint.position)
+        if packet_id is PacketID.VELOCITY:
+            return Packet.from_value(device_id, packet_id, joint.velocity)
+        if packet_id is PacketID.CURRENT:
+            return Packet.from_value(device_id, packet_id, joint.current)
+        if packet_id is PacketID.MODE:
+            return Packet.from_value(device_id, packet_id, joint.mode)
+
+        return Packet(device_id, packet_id, self._parameters[device_id, packet_id])
+
+    def _emit(self, address: tuple[str, int]) -> None:
+        """Send the emitted packets of every joint.
+
+        Args:
+            address: The address to send the packets to.
+        """
+        with self._lock:
+            self._advance(time.monotonic())
+            packets = [
+                self._report(device_id, packet_id)
+                for device_id in JOINTS
+                for packet_id in self.emitted_packets
+            ]
+
+        for datagram in Packet.encode_many(packets):
+            self._send(datagram, address)
+
+    def _heartbeat(self, device_id: DeviceID) -> tuple[list[PacketID], int]:
+        """Get the heartbeat configuration of a joint.
+
+        Args:
+            device_id: The joint to get the configuration of.
+
+        Returns:
+            The packets that the joint streams, and the frequency of the stream (Hz).
+        """
+        packet_ids = Packet(
+            device_id,
+            PacketID.HEARTBEAT_SET,
+            self._parameters[device_id, PacketID.HEARTBEAT_SET],
+        ).value
+        frequency = Packet(
+            device_id,
+            PacketID.HEARTBEAT_FREQUENCY,
+            self._parameters[device_id, PacketID.HEARTBEAT_FREQUENCY],
+        ).value
+
+        return [p for p in packet_ids if isinstance(p, PacketID)], frequency
+
+    def _schedule_heartbeat(self, device_id: DeviceID) -> None:
+        """Start or stop the heartbeat of a joint after its configuration changed.
+
+        Args:
+            device_id: The joint whose heartbeat was configured.
+        """
+        try:
+            packet_ids, frequency = self._heartbeat(device_id)
+        except ValueError:
+            packet_ids, frequency = [], 0
+
+        if packet_ids and frequency > 0:
+            self._heartbeats.setdefault(device_id, time.monotonic())
+        else:
+            self._heartbeats.pop(device_id, None)
+
+    def _emit_heartbeats(self, address: tuple[str, int], now: float) -> None:
+        """Send the heartbeat packets of every joint whose heartbeat is due.
+
+        The packets from all of the joints that are due are sent together.
+
+        Args:
+            address: The address to send the packets to.
+            now: The current time, as reported by ``time.monotonic``.
+        """
+        due = [device_id for device_id, t in self._heartbeats.items() if t <= now]
+
+        if not due:
+            return
+
+        packets = []
+
+        with self._lock:
+            self._advance(now)
+
+            for device_id in due:
+                packet_ids, frequency = self._heartbeat(device_id)
+                packets.extend(self._report(device_id, p) for p in packet_ids)
+
+                # Skip the missed beats rather than sending a burst to catch up
+                self._heartbeats[device_id] = max(
+                    self._heartbeats[device_id] + 1 / frequency, now
+                )
+
+        for datagram in Packet.encode_many(packets):
+            self._send(datagram, address)
+
+    def _send(self, datagram: bytes, address: tuple[str, int]) -> None:
+        """Send a datagram to a client.
+
+        Args:
+            datagram: The datagram to send.
+            address: The address of the client.
+        """
+        try:
+            self.sock.sendto(datagram, address)
+        except OSError:
+            return
+
+        # Every frame ends with the only zero byte in the frame
+        self._datagrams_sent += 1
+        self._packets_sent += datagram.count(0)
+
+    def _advance(self, now: float) -> None:
+        """Integrate the dynamics of every joint up to the current time.
+
+        The caller must hold the state lock.
+
+        Args:
+            now: The current time, as reported by ``time.monotonic``.
+        """
+        dt = now - self._last_advance
+        self._last_advance = now
+
+        for joint in self._joints.values():
+            joint.advance(dt, self.max_velocity, self.current_gain)
+
+    @staticmethod
+    def _targets(device_id: DeviceID | int) -> tuple[DeviceID, ...]:
+        """Get the joints targeted by a packet.
+
+        Args:
+            device_id: The device ID of the packet.
+
+        Returns:
+            The targeted joints, which is empty if the device isn't a joint.
+        """
+        if device_id is DeviceID.ALL_JOINTS:
+            return JOINTS
+
+        return (device_id,) if device_id in JOINTS else ()  # type: ignore
+
+
+def _default_data(packet_id: PacketID) -> bytes:
+    """Get the data reported for a parameter that hasn't been set.
+
+    Args:
+        packet_id: The ID of the parameter.
+
+    Returns:
+        The encoded default value, or zeros if the parameter has no default value.
+    """
+    if packet_id in _DEFAULT_VALUES:
+        return encode_value(packet_id, _DEFAULT_VALUES[packet_id])
+
+    return bytes(getattr(CODECS.get(packet_id), "size", 0))
@@ -0,0 +1,234 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Keeps the most recent state of every joint on the Bravo 7.
+
+The ``JointStateCache`` stores the latest position, velocity, current, temperature, and
+mode of each joint in preallocated NumPy arrays, along with the time at which each
+value was received. Every ``BravoDriver`` keeps its joint state in a cache, exposed as
+``BravoDriver.state``, which is updated by the driver's receiving thread and can be
+read from any other thread: ``snapshot()`` uses a sequence counter (seqlock) to return
+a consistent copy of the full arm state without blocking the writer.
+
+Examples:
+    >>> bravo = BravoDriver()
+    >>> bravo.connect()
+    >>> state = bravo.state.snapshot()
+    >>> state.position[JointStateCache.index(DeviceID.BEND_ELBOW)]
+    1.5707963705062866
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from pybravo.protocol import JOINTS, DeviceID, Packet, PacketID
+
+# The fields stored by the cache, in the order of the rows of the value arrays
+FIELDS = (
+    PacketID.POSITION,
+    PacketID.VELOCITY,
+    PacketID.CURRENT,
+    PacketID.TEMPERATURE,
+    PacketID.MODE,
+)
+
+_FIELD_INDEX = {packet_id: row for row, packet_id in enumerate(FIELDS)}
+_JOINT_INDEX = {device_id: column for column, device_id in enumerate(JOINTS)}
+_MODE_ROW = _FIELD_INDEX[PacketID.MODE]
+_COLUMNS = len(JOINTS)
+
+# The mode reported for a joint that has not yet sent a MODE packet
+UNKNOWN_MODE = -1
+
+# The layout of the state in the buffer that backs a cache: the sequence counter,
+# followed by the values, the timestamps, and the modes of each joint
+_SEQUENCE_OFFSET = 0
+_VALUES_SHAPE = (len(FIELDS) - 1, len(JOINTS))
+_VALUES_OFFSET = _SEQUENCE_OFFSET + 8
+_TIMESTAMPS_SHAPE = (len(FIELDS), len(JOINTS))
+_TIMESTAMPS_OFFSET = _VALUES_OFFSET + 8 * _VALUES_SHAPE[0] * _VALUES_SHAPE[1]
+_MODES_OFFSET = _TIMESTAMPS_OFFSET + 8 * _TIMESTAMPS_SHAPE[0] * _TIMESTAMPS_SHAPE[1]
+
+# The number of bytes needed to store the state of every joint
+STATE_SIZE = _MODES_OFFSET + 2 * len(JOINTS)
+
+
+class JointState(NamedTuple):
+    """A consistent copy of the state of every joint.
+
+    Each array has one entry per joint, ordered by device ID. Values that have not been
+    received yet are NaN (or ``UNKNOWN_MODE`` for the mode).
+    """
+
+    sequence: int
+    position: np.ndarray
+    velocity: np.ndarray
+    current: np.ndarray
+    temperature: np.ndarray
+    mode: np.ndarray
+
+    # The time at which each value was received, as reported by ``time.monotonic``.
+    # This has one row per field in ``FIELDS`` and one column per joint.
+    timestamps: np.ndarray
+
+
+class JointStateCache:
+    """A thread-safe cache of the latest value of each joint field."""
+
+    def __init__(
+        self,
+        buffer: bytearray | memoryview | None = None,
+        initialize: bool = True,
+    ) -> None:
+        """Create a new joint state cache.
+
+        Args:
+            buffer: The buffer to store the state in, which must hold at least
+                ``STATE_SIZE`` bytes (e.g., shared memory that other processes can
+                read). Defaults to a new buffer.
+            initialize: Whether to reset the state stored in the buffer. Set this to
+                False to attach to a buffer that already holds the state of a cache.
+                Defaults to True.
+        """
+        if buffer is None:
+            buffer = bytearray(STATE_SIZE)
+
+        if len(buffer) < STATE_SIZE:
+            raise ValueError(f"The buffer must hold at least {STATE_SIZE} bytes.")
+
+        # The sequence counter is odd while an update is in progress. Readers retry
+        # if the counter was odd or changed while they were copying the arrays.
+        self._sequence = np.ndarray((1,), np.uint64, buffer, _SEQUENCE_OFFSET)
+        self._values = np.ndarray(_VALUES_SHAPE, np.float64, buffer, _VALUES_OFFSET)
+        self._timestamps = np.ndarray(
+            _TIMESTAMPS_SHAPE, np.float64, buffer, _TIMESTAMPS_OFFSET
+        )
+        self._modes = np.ndarray((len(JOINTS),), np.int16, buffer, _MODES_OFFSET)
+
+        # Assigning single items through NumPy is comparatively slow, so the writer
+        # updates the same memory through typed memoryviews instead
+        view = memoryview(buffer).cast("B")
+        self._sequence_w = view[_SEQUENCE_OFFSET:_VALUES_OFFSET].cast("Q")
+        self._values_w = view[_VALUES_OFFSET:_TIMESTAMPS_OFFSET].cast("d")
+        self._timestamps_w = view[_TIMESTAMPS_OFFSET:_MODES_OFFSET].cast("d")
+        self._modes_w = view[_MODES_OFFSET:STATE_SIZE].cast("h")
+
+        if initialize:
+            self._sequence[0] = 0
+            self._values.fill(np.nan)
+            self._timestamps.fill(np.nan)
+            self._modes.fill(UNKNOWN_MODE)
+
+        # Writers are serialized so that the cache may be shared by multiple drivers
+        self._write_lock = threading.Lock()
+
+    @staticmethod
+    def index(device_id: DeviceID) -> int:
+        """Get the index of a joint in the state arrays.
+
+        Args:
+            device_id: The joint to get the index of.
+
+        Returns:
+            The column of the joint in the state arrays.
+        """
+        return _JOINT_INDEX[device_id]
+
+    @property
+    def sequence(self) -> int:
+        """The number of updates applied to the cache so far."""
+        return int(self._sequence[0]) // 2
+
+    def update(self, packet: Packet) -> bool:
+        """Store the value of a packet if it describes the state of a joint.
+
+        Args:
+            packet: The received packet.
+
+        Returns:
+            Whether or not the packet was stored.
+        """
+        row = _FIELD_INDEX.get(packet.packet_id)  # type: ignore
+        column = _JOINT_INDEX.get(packet.device_id)  # type: ignore
+
+        if row is None or column is None:
+            return False
+
+        # Decode before entering the critical section to keep it as short as possible
+        try:
+            value = packet.value
+        except ValueError:
+            return False
+
+        now = time.monotonic()
+        sequence = self._sequence_w
+
+        with self._write_lock:
+            sequence[0] += 1
+
+            if row == _MODE_ROW:
+                self._modes_w[column] = getattr(value, "value", value)
+            else:
+                self._values_w[row * _COLUMNS + column] = value
+
+            self._timestamps_w[row * _COLUMNS + column] = now
+            sequence[0] += 1
+
+        return True
+
+    def snapshot(self) -> JointState:
+        """Get a consistent copy of the current state of every joint.
+
+        Returns:
+            The latest state of each joint.
+        """
+        while True:
+            start = int(self._sequence[0])
+
+            if start & 1:
+                # An update is in progress; let the writer finish
+                time.sleep(0)
+                continue
+
+            values = self._values.copy()
+            modes = self._modes.copy()
+            timestamps = self._timestamps.copy()
+
+            if self._sequence[0] == start:
+                break
+
+        return JointState(start // 2, *values, modes, timestamps)
+
+    def view(self) -> JointState:
+        """Get the state of every joint without copying it.
+
+        The arrays are views of the buffer that backs the cache, so they always hold
+        the latest values, but may change (or be partially updated) while they are
+        being read. Use ``snapshot`` to get a consistent copy.
+
+        Returns:
+            Views of the state of each joint.
+        """
+        return JointState(self.sequence, *self._values, self._modes, self._timestamps)
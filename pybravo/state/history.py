@@ -0,0 +1,299 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Keeps a fixed-length history of the telemetry received from the Bravo 7.
+
+A ``TimeSeriesBuffer`` stores (timestamp, value) samples in preallocated NumPy arrays
+that are overwritten in a ring, so appending is O(1) and the memory used never grows
+with the length of a run. A ``TelemetryHistory`` maintains one buffer for each
+(device ID, packet ID) pair that it tracks and is fed by the driver's receiving thread.
+
+Examples:
+    >>> history = TelemetryHistory(capacity=2000)
+    >>> bravo = BravoDriver()
+    >>> bravo.attach_listener(history.update)
+    >>> elbow = history[DeviceID.BEND_ELBOW, PacketID.POSITION]
+    >>> times, positions = elbow.last(0.5)
+    >>> grid, positions = elbow.resample(0.5, period=0.01)
+    >>> elbow.rate()
+    99.8
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from enum import Enum
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+
+from pybravo.protocol import DeviceID, Packet, PacketID
+
+# The packets tracked by a TelemetryHistory by default
+DEFAULT_PACKET_IDS = (
+    PacketID.POSITION,
+    PacketID.VELOCITY,
+    PacketID.CURRENT,
+    PacketID.TEMPERATURE,
+)
+
+
+class TimeSeriesBuffer:
+    """A fixed-capacity ring of timestamped samples."""
+
+    def __init__(self, capacity: int, width: int = 1) -> None:
+        """Create a new time-series buffer.
+
+        Args:
+            capacity: The maximum number of samples to keep. Once the buffer is full,
+                each new sample overwrites the oldest one.
+            width: The number of values in each sample. Defaults to 1.
+        """
+        if capacity < 1 or width < 1:
+            raise ValueError("The buffer capacity and width must be positive.")
+
+        self._times = np.zeros(capacity)
+        self._values = np.zeros((capacity, width))
+        self._head = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Get the number of samples in the buffer.
+
+        Returns:
+            The number of samples stored.
+        """
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        """The maximum number of samples that the buffer can hold."""
+        return len(self._times)
+
+    @property
+    def width(self) -> int:
+        """The number of values in each sample."""
+        return self._values.shape[1]
+
+    def append(self, timestamp: float, value: Any) -> None:
+        """Add a sample to the buffer.
+
+        Samples must be appended in order of increasing timestamp.
+
+        Args:
+            timestamp: The time at which the sample was received (s).
+            value: The sample value, or a sequence of ``width`` values.
+        """
+        with self._lock:
+            self._times[self._head] = timestamp
+            self._values[self._head] = value
+            self._head = (self._head + 1) % len(self._times)
+            self._size = min(self._size + 1, len(self._times))
+
+    def last(
+        self, seconds: float, now: float | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Get the samples received within a window ending now.
+
+        Args:
+            seconds: The length of the window (s).
+            now: The end of the window. Defaults to the current ``time.monotonic``.
+
+        Returns:
+            The timestamps and values of the samples in the window, oldest first. The
+            values are one-dimensional if the buffer width is 1.
+        """
+        if now is None:
+            now = time.monotonic()
+
+        with self._lock:
+            times, values = self._window(now - seconds)
+
+        return times, values[:, 0] if values.shape[1] == 1 else values
+
+    def resample(
+        self, seconds: float, period: float, now: float | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Linearly interpolate the samples in a window onto a uniform grid.
+
+        Args:
+            seconds: The length of the window (s).
+            period: The spacing of the grid (s).
+            now: The end of the window. Defaults to the current ``time.monotonic``.
+
+        Returns:
+            The grid timestamps and the interpolated values. The grid spans the samples
+            in the window, so it is empty if fewer than two samples were received.
+        """
+        times, values = self.last(seconds, now)
+
+        if len(times) <= 1:
+            return np.empty(0), np.empty((0,) + values.shape[1:])
+
+        grid = np.arange(times[0], times[-1], period)
+
+        if values.ndim == 1:
+            return grid, np.interp(grid, times, values)
+
+        return grid, np.column_stack(
+            [np.interp(grid, times, column) for column in values.T]
+        )
+
+    def rate(self, seconds: float | None = None, now: float | None = None) -> float:
+        """Estimate the rate at which samples were received.
+
+        Args:
+            seconds: The length of the window to estimate the rate over (s). If None,
+                every sample in the buffer is used.
+            now: The end of the window. Defaults to the current ``time.monotonic``.
+
+        Returns:
+            The mean sample rate (Hz), or 0 if fewer than two samples were received.
+        """
+        if seconds is None:
+            with self._lock:
+                times, _ = self._window(-np.inf)
+        else:
+            times, _ = self.last(seconds, now)
+
+        if len(times) <= 1 or times[-1] == times[0]:
+            return 0.0
+
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    def _window(self, start: float) -> tuple[np.ndarray, np.ndarray]:
+        """Copy the samples received at or after a given time.
+
+        The caller must hold the buffer lock.
+
+        Args:
+            start: The earliest timestamp to include.
+
+        Returns:
+            The timestamps and values of the samples, oldest first.
+        """
+        # The samples are ordered within each of the two segments of the ring, so each
+        # segment can be searched without first unwrapping the ring
+        if self._size < len(self._times):
+            segments = [slice(0, self._size)]
+        else:
+            segments = [slice(self._head, None), slice(0, self._head)]
+
+        times = []
+        values = []
+
+        for segment in segments:
+            segment_times = self._times[segment]
+            first = np.searchsorted(segment_times, start)
+            times.append(segment_times[first:])
+            values.append(self._values[segment][first:])
+
+        return np.concatenate(times), np.concatenate(values)
+
+
+class TelemetryHistory:
+    """A collection of time-series buffers for each tracked device and packet."""
+
+    def __init__(
+        self,
+        capacity: int = 1000,
+        packet_ids: Iterable[PacketID] = DEFAULT_PACKET_IDS,
+    ) -> None:
+        """Create a new telemetry history.
+
+        Args:
+            capacity: The number of samples to keep for each (device ID, packet ID)
+                pair. Defaults to 1000.
+            packet_ids: The packets to keep a history of. Defaults to the position,
+                velocity, current, and temperature.
+        """
+        self.capacity = capacity
+        self.packet_ids = frozenset(packet_ids)
+        self._buffers: dict[tuple[DeviceID, PacketID], TimeSeriesBuffer] = {}
+
+    def __getitem__(self, key: tuple[DeviceID, PacketID]) -> TimeSeriesBuffer:
+        """Get the buffer for a device and packet.
+
+        Args:
+            key: The (device ID, packet ID) pair to get the buffer of.
+
+        Raises:
+            KeyError: No packets have been received for the pair.
+
+        Returns:
+            The buffer of the samples received.
+        """
+        return self._buffers[key]
+
+    def __contains__(self, key: object) -> bool:
+        """Check whether any packets have been received for a device and packet.
+
+        Args:
+            key: The (device ID, packet ID) pair to check.
+
+        Returns:
+            Whether or not the pair has a buffer.
+        """
+        return key in self._buffers
+
+    def __iter__(self) -> Iterator[tuple[DeviceID, PacketID]]:
+        """Iterate over the (device ID, packet ID) pairs that have a buffer.
+
+        Returns:
+            An iterator over the pairs.
+        """
+        return iter(list(self._buffers))
+
+    def update(self, packet: Packet) -> bool:
+        """Add the value of a packet to its history.
+
+        Args:
+            packet: The received packet.
+
+        Returns:
+            Whether or not the packet was stored.
+        """
+        if packet.packet_id not in self.packet_ids:
+            return False
+
+        try:
+            value = packet.value
+        except ValueError:
+            return False
+
+        if value is None:
+            return False
+
+        if isinstance(value, Enum):
+            value = value.value
+
+        key = (packet.device_id, packet.packet_id)
+        buffer = self._buffers.get(key)  # type: ignore
+
+        if buffer is None:
+            # Allocate the buffer on the first sample, when its width is known
+            buffer = TimeSeriesBuffer(self.capacity, np.size(value))
+            self._buffers[key] = buffer  # type: ignore
+
+        buffer.append(time.monotonic(), value)
+
+        return True
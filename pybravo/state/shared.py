@@ -0,0 +1,177 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Publishes the joint state to other processes through shared memory.
+
+A ``SharedStatePublisher`` stores the latest state of every joint in a
+``multiprocessing.shared_memory`` block with a fixed layout: a short header, a sequence
+counter, the position, velocity, current, and temperature of each joint, the time at
+which each value was received, and the mode of each joint. Any number of processes on
+the same machine can attach a ``SharedStateReader`` to the block by name and read the
+state through NumPy views of the shared memory, without a driver of their own.
+
+Examples:
+    >>> publisher = SharedStatePublisher("bravo_state")
+    >>> bravo = BravoDriver()
+    >>> bravo.attach_listener(publisher.update)
+
+    In another process:
+
+    >>> reader = SharedStateReader("bravo_state")
+    >>> reader.snapshot().position
+    array([0.01, 3.14, 1.57, 0.  , 1.57, 0.  , 3.14])
+"""
+
+from __future__ import annotations
+
+import struct
+from multiprocessing import resource_tracker, shared_memory
+
+from pybravo.protocol import Packet
+from pybravo.state.cache import STATE_SIZE, JointState, JointStateCache
+
+# The header identifies the block as joint state with a compatible layout
+MAGIC = b"BRVS"
+VERSION = 1
+_HEADER = struct.Struct("<4sI")
+
+# The size of the shared memory block
+SHARED_STATE_SIZE = _HEADER.size + STATE_SIZE
+
+
+class SharedStatePublisher:
+    """Writes the joint state to a shared memory block."""
+
+    def __init__(self, name: str | None = None) -> None:
+        """Create a new shared memory block for the joint state.
+
+        Args:
+            name: The name of the block, which readers use to attach to it. Defaults
+                to a unique name chosen by the system.
+
+        Raises:
+            FileExistsError: A block with the given name already exists.
+        """
+        self._shm = shared_memory.SharedMemory(
+            name, create=True, size=SHARED_STATE_SIZE
+        )
+        _HEADER.pack_into(self._shm.buf, 0, MAGIC, VERSION)
+        self._cache: JointStateCache | None = JointStateCache(
+            self._shm.buf[_HEADER.size :]
+        )
+
+    @property
+    def name(self) -> str:
+        """The name of the shared memory block."""
+        return self._shm.name
+
+    def update(self, packet: Packet) -> bool:
+        """Publish the value of a packet if it describes the state of a joint.
+
+        Args:
+            packet: The received packet.
+
+        Returns:
+            Whether or not the packet was published.
+        """
+        return self._cache.update(packet)  # type: ignore
+
+    def close(self, unlink: bool = True) -> None:
+        """Stop publishing the joint state.
+
+        Args:
+            unlink: Whether to destroy the shared memory block. Readers that are still
+                attached can continue to read the last published state. Defaults to
+                True.
+        """
+        # The arrays must be released before the memory can be closed
+        self._cache = None
+        self._shm.close()
+
+        if unlink:
+            self._shm.unlink()
+
+
+class SharedStateReader:
+    """Reads the joint state from a shared memory block."""
+
+    def __init__(self, name: str) -> None:
+        """Attach to the shared memory block of a publisher.
+
+        Args:
+            name: The name of the block.
+
+        Raises:
+            FileNotFoundError: No block with the given name exists.
+            ValueError: The block doesn't hold joint state with a compatible layout.
+        """
+        try:
+            self._shm = shared_memory.SharedMemory(name, track=False)  # type: ignore
+        except TypeError:
+            # Before Python 3.13, attaching to a block always registers it with the
+            # resource tracker, which would destroy the block when this process exits
+            self._shm = shared_memory.SharedMemory(name)
+            resource_tracker.unregister(self._shm._name, "shared_memory")  # type: ignore
+
+        if self._shm.size < SHARED_STATE_SIZE:
+            self._shm.close()
+            raise ValueError(f"The shared memory block {name!r} is too small.")
+
+        magic, version = _HEADER.unpack_from(self._shm.buf, 0)
+
+        if magic != MAGIC or version != VERSION:
+            self._shm.close()
+            raise ValueError(
+                f"The shared memory block {name!r} doesn't hold compatible joint state."
+            )
+
+        self._cache: JointStateCache | None = JointStateCache(
+            self._shm.buf[_HEADER.size :], initialize=False
+        )
+
+    @property
+    def sequence(self) -> int:
+        """The number of updates that have been published."""
+        return self._cache.sequence  # type: ignore
+
+    def snapshot(self) -> JointState:
+        """Get a consistent copy of the current state of every joint.
+
+        Returns:
+            The latest state of each joint.
+        """
+        return self._cache.snapshot()  # type: ignore
+
+    def view(self) -> JointState:
+        """Get the state of every joint without copying it.
+
+        The arrays are views of the shared memory, so they always hold the latest
+        published values, but may change while they are being read. The views must be
+        released before the reader is closed.
+
+        Returns:
+            Views of the state of each joint.
+        """
+        return self._cache.view()  # type: ignore
+
+    def close(self) -> None:
+        """Detach from the shared memory block."""
+        self._cache = None
+        self._shm.close()
@@ -0,0 +1,244 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import socket
+from pathlib import Path
+
+import pytest
+
+from pybravo import BravoDriver, DeviceID, Packet, PacketID
+from pybravo.capture import CaptureReader, CaptureReplay, CaptureWriter, Direction
+from pybravo.driver.dispatch import CallbackDispatcher
+
+# Index every few records so that the time range tests use the sparse index
+INDEX_STRIDE = 4
+
+
+def test_capture_round_trip(tmp_path: Path) -> None:
+    """Test that the records written to a capture can be read back."""
+    path = tmp_path / "capture.bravo"
+    packet = Packet(DeviceID.BEND_ELBOW, PacketID.POSITION, bytes(4))
+
+    with CaptureWriter(path) as writer:
+        writer.write(Direction.SENT, packet.encode(), timestamp_ns=10)
+        writer.write(Direction.RECEIVED, memoryview(packet.encode()), timestamp_ns=20)
+
+    # Appending to an existing capture keeps the earlier records
+    with CaptureWriter(path) as writer:
+        writer.write(Direction.RECEIVED, b"", timestamp_ns=30)
+
+    with CaptureReader(path) as reader:
+        records = list(reader)
+
+    assert [(r.timestamp_ns, r.direction) for r in records] == [
+        (10, Direction.SENT),
+        (20, Direction.RECEIVED),
+        (30, Direction.RECEIVED),
+    ]
+    assert [p.encode() for p in records[1].packets()] == [packet.encode()]
+
+
+def test_capture_time_range(tmp_path: Path) -> None:
+    """Test that the records in a time range are found using the sparse index."""
+    path = tmp_path / "capture.bravo"
+    count = INDEX_STRIDE * 3 + 10
+
+    with CaptureWriter(path) as writer:
+        for i in range(count):
+            writer.write(Direction.RECEIVED, i.to_bytes(2, "little"), timestamp_ns=i)
+
+    with CaptureReader(path, INDEX_STRIDE) as reader:
+        start = INDEX_STRIDE * 2 + 5
+        records = list(reader.between(start, start + 3))
+        assert [r.timestamp_ns for r in records] == list(range(start, start + 4))
+        end = INDEX_STRIDE * 2 + 1
+        assert len(list(reader.between(end_ns=end))) == end + 1
+
+
+def test_capture_time_range_per_session(tmp_path: Path) -> None:
+    """Test that time ranges are found in sessions whose clocks restarted."""
+    path = tmp_path / "capture.bravo"
+    count = INDEX_STRIDE * 2 + 10
+    offset = 1_000_000
+
+    # The second session's clock is behind the first's (e.g., after a reboot)
+    starts = (offset, 0)
+    for first in starts:
+        with CaptureWriter(path) as writer:
+            for i in range(count):
+                writer.write(Direction.RECEIVED, b"", timestamp_ns=first + i)
+
+    with CaptureReader(path, INDEX_STRIDE) as reader:
+        assert len(reader.sessions) == len(starts)
+        assert [r.session for r in reader] == [0] * count + [1] * count
+
+        start = INDEX_STRIDE + 5
+        records = list(reader.between(start, start + 3))
+        assert [(r.session, r.timestamp_ns) for r in records] == [
+            (1, t) for t in range(start, start + 4)
+        ]
+
+        records = list(reader.between(offset + start, offset + start + 3))
+        assert [(r.session, r.timestamp_ns) for r in records] == [
+            (0, t) for t in range(offset + start, offset + start + 4)
+        ]
+
+        assert [r.timestamp_ns for r in reader.between(end_ns=9)] == list(range(10))
+
+
+def test_capture_ignores_truncated_record(tmp_path: Path) -> None:
+    """Test that a partially written record at the end of a capture is skipped."""
+    path = tmp_path / "capture.bravo"
+
+    with CaptureWriter(path) as writer:
+        writer.write(Direction.SENT, b"\x01\x02\x03", timestamp_ns=1)
+        writer.write(Direction.SENT, b"\x04\x05\x06", timestamp_ns=2)
+
+    path.write_bytes(path.read_bytes()[:-1])
+
+    with CaptureReader(path) as reader:
+        assert [r.data for r in reader] == [b"\x01\x02\x03"]
+
+
+def test_capture_rejects_other_files(tmp_path: Path) -> None:
+    """Test that files without the capture header are rejected."""
+    path = tmp_path / "capture.bravo"
+    path.write_bytes(b"not a capture")
+
+    with pytest.raises(ValueError):
+        CaptureReader(path)
+
+    with pytest.raises(ValueError):
+        CaptureWriter(path)
+
+
+def test_driver_records_datagrams(tmp_path: Path) -> None:
+    """Test that the driver records the datagrams that it sends and receives."""
+    path = tmp_path / "capture.bravo"
+    arm = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    arm.bind(("127.0.0.1", 0))
+    arm.settimeout(2.0)
+
+    request = Packet(
+        DeviceID.BEND_ELBOW, PacketID.REQUEST, bytes([PacketID.MODE.value])
+    )
+    response = Packet(DeviceID.BEND_ELBOW, PacketID.MODE, bytes([0]))
+
+    with CaptureWriter(path) as writer:
+        driver = BravoDriver(recorder=writer)
+        driver.attach_callback(PacketID.MODE, lambda _: None)
+        driver.connect("127.0.0.1", arm.getsockname()[1])
+
+        try:
+            future = driver.request(DeviceID.BEND_ELBOW, PacketID.MODE, timeout=2.0)
+            _, address = arm.recvfrom(256)
+            arm.sendto(response.encode(), address)
+            future.result(2.0)
+        finally:
+            driver.disconnect()
+            arm.close()
+
+    with CaptureReader(path) as reader:
+        records = list(reader)
+
+    assert [r.direction for r in records] == [Direction.SENT, Direction.RECEIVED]
+    assert [r.data for r in records] == [request.encode(), response.encode()]
+    assert records[0].timestamp_ns <= records[1].timestamp_ns
+
+
+def test_driver_survives_closed_recorder(tmp_path: Path) -> None:
+    """Test that closing the recorder doesn't stop the driver from receiving."""
+    writer = CaptureWriter(tmp_path / "capture.bravo")
+    driver = BravoDriver(recorder=writer)
+    arm = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    arm.bind(("127.0.0.1", 0))
+    arm.settimeout(2.0)
+    response = Packet(DeviceID.BEND_ELBOW, PacketID.MODE, bytes([0]))
+
+    driver.connect("127.0.0.1", arm.getsockname()[1])
+
+    try:
+        writer.close()
+
+        for _ in range(2):
+            future = driver.request(DeviceID.BEND_ELBOW, PacketID.MODE, timeout=2.0)
+            _, address = arm.recvfrom(256)
+            arm.sendto(response.encode(), address)
+
+            assert future.result(2.0).value is not None
+
+        assert driver._poll_t.is_alive()
+        assert driver.recorder is None
+    finally:
+        driver.disconnect()
+        arm.close()
+
+
+def write_position_capture(path: Path, datagrams: int, period_ns: int) -> None:
+    """Write a capture of position responses from the elbow joint.
+
+    Args:
+        path: The path to write the capture to.
+        datagrams: The number of datagrams to write.
+        period_ns: The time between the datagrams (ns).
+    """
+    with CaptureWriter(path) as writer:
+        for i in range(datagrams):
+            packet = Packet.from_value(DeviceID.BEND_ELBOW, PacketID.POSITION, float(i))
+            writer.write(Direction.SENT, b"\x00", timestamp_ns=i * period_ns)
+            writer.write(
+                Direction.RECEIVED, packet.encode(), timestamp_ns=i * period_ns
+            )
+
+
+def test_replay_drives_callbacks(tmp_path: Path) -> None:
+    """Test that the received datagrams are replayed through the driver callbacks."""
+    path = tmp_path / "capture.bravo"
+    datagrams = 100
+    write_position_capture(path, datagrams, 1_000_000)
+
+    positions: list[float] = []
+    driver = BravoDriver(dispatcher=CallbackDispatcher())
+    driver.attach_callback(PacketID.POSITION, lambda p: positions.append(p.value))
+
+    with CaptureReader(path) as reader:
+        stats = CaptureReplay(driver, speed=None).run(reader)
+
+    assert stats.datagrams == stats.packets == len(positions) == datagrams
+    assert positions == [float(i) for i in range(datagrams)]
+    assert stats.packets_per_second > 0
+
+
+def test_replay_paces_datagrams(tmp_path: Path) -> None:
+    """Test that the replay preserves the timing of the capture at the given speed."""
+    path = tmp_path / "capture.bravo"
+    datagrams, period_ns, speed = 11, 20_000_000, 2.0
+    write_position_capture(path, datagrams, period_ns)
+
+    driver = BravoDriver()
+    driver.attach_callback(PacketID.POSITION, lambda _: None)
+
+    with CaptureReader(path) as reader:
+        stats = CaptureReplay(driver, speed=speed).run(reader)
+
+    # The capture spans 0.2 s, so replaying it at twice the speed takes 0.1 s
+    duration = (datagrams - 1) * period_ns / 1e9
+    assert stats.datagrams == datagrams
+    assert duration / speed <= stats.elapsed < duration
@@ -0,0 +1,135 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import time
+
+import pytest
+
+from pybravo import BravoDriver, DeviceID, Packet, PacketID
+from pybravo.driver.channel import CommandChannel
+from pybravo.sim import BravoSimulator
+
+
+def velocity(device_id: DeviceID, value: float) -> Packet:
+    """Create a velocity setpoint.
+
+    Args:
+        device_id: The device to command.
+        value: The velocity setpoint.
+
+    Returns:
+        The setpoint packet.
+    """
+    return Packet.from_value(device_id, PacketID.VELOCITY, value)
+
+
+def test_channel_sends_latest_setpoint_at_rate() -> None:
+    """Test that only the newest setpoint of each slot is sent at the fixed rate."""
+    rate, duration = 50.0, 0.5
+    slots = (DeviceID.BEND_ELBOW, DeviceID.ROTATE_BASE)
+    batches: list[list[Packet]] = []
+    channel = CommandChannel(batches.append, rate=rate)
+    channel.start()
+
+    start = time.monotonic()
+    written = 0
+    while time.monotonic() - start < duration:
+        for device_id in slots:
+            channel.write(velocity(device_id, float(written)))
+        written += 1
+        time.sleep(0.0005)
+
+    channel.flush()
+    channel.stop()
+    stats = channel.stats()
+
+    # Each flush sends one setpoint per slot, and the last one is the newest
+    assert all(len(batch) == len(slots) for batch in batches)
+    assert [p.value for p in batches[-1]] == [written - 1.0] * len(slots)
+    assert len(batches) == stats.flushes == pytest.approx(duration * rate, abs=3)
+    assert stats.written == len(slots) * written
+    assert stats.sent + stats.superseded == stats.written
+
+
+def test_channel_sends_immediately_when_idle() -> None:
+    """Test that a write to an idle channel isn't delayed until the next period."""
+    sent: list[float] = []
+    channel = CommandChannel(lambda _: sent.append(time.monotonic()), rate=1.0)
+    channel.start()
+
+    delay = 0.05
+    time.sleep(delay)
+    written = time.monotonic()
+    channel.write(velocity(DeviceID.BEND_ELBOW, 1.0))
+    time.sleep(delay)
+
+    # A second write has to wait for the next period
+    channel.write(velocity(DeviceID.BEND_ELBOW, 2.0))
+    time.sleep(delay)
+    channel.stop()
+
+    assert len(sent) == 1
+    assert sent[0] - written < delay / 2
+    assert channel.stats().discarded == 1
+
+
+def test_driver_command_channel() -> None:
+    """Test that the driver sends the commands written to its channel."""
+    driver = BravoDriver()
+    driver.commands.rate = 200.0
+
+    with BravoSimulator() as sim:
+        driver.connect(*sim.address)
+
+        writes = 100
+        for i in range(writes):
+            driver.commands.write(velocity(DeviceID.BEND_ELBOW, i / writes))
+
+        time.sleep(0.05)
+        state = sim.state(DeviceID.BEND_ELBOW)
+        stats = sim.stats()
+        driver.disconnect()
+
+    assert state.velocity == pytest.approx(0.99)
+    assert stats.packets_received < writes
+
+
+def test_channel_never_sends_stale_setpoints() -> None:
+    """Test that setpoints written before a connection are never sent."""
+    driver = BravoDriver()
+
+    with BravoSimulator() as sim:
+        driver.connect(*sim.address)
+        driver.commands.write(velocity(DeviceID.BEND_ELBOW, 0.2))
+        driver.disconnect()
+
+        with pytest.raises(RuntimeError):
+            driver.commands.write(velocity(DeviceID.BEND_ELBOW, 0.4))
+
+        received = sim.stats().packets_received
+        driver.connect(*sim.address)
+        time.sleep(0.05)
+        stats = sim.stats()
+        state = sim.state(DeviceID.BEND_ELBOW)
+        driver.disconnect()
+
+    assert stats.packets_received == received
+    assert state.velocity != pytest.approx(0.4)
+    assert driver.commands.stats().pending == 0
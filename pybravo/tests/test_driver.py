@@ -0,0 +1,438 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import concurrent.futures
+import contextlib
+import socket
+import threading
+import time
+from typing import Callable
+
+import pytest
+
+from pybravo import AsyncBravoDriver, BravoDriver, DeviceID, Packet, PacketID
+from pybravo.driver.dispatch import CallbackDispatcher, DropPolicy
+from pybravo.driver.receive import ReceiveRing
+from pybravo.driver.requests import RequestTracker
+from pybravo.protocol import JOINTS
+
+
+class RespondingArm:
+    """A fake arm that answers position requests with the ID of the device."""
+
+    def __init__(self) -> None:
+        """Create a new fake arm bound to an ephemeral loopback port."""
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(0.05)
+        self.port = self.sock.getsockname()[1]
+        self.datagrams_received = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self) -> None:
+        """Answer requests until the arm is closed."""
+        while self._running:
+            try:
+                data, address = self.sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+
+            self.datagrams_received += 1
+            responses = [
+                Packet.from_value(request.device_id, packet_id, request.device_id.value)
+                for request in Packet.iter_decode(data)
+                for packet_id in request.value
+                if packet_id is PacketID.POSITION
+            ]
+            for datagram in Packet.encode_many(responses):
+                self.sock.sendto(datagram, address)
+
+    def close(self) -> None:
+        """Stop answering requests."""
+        self._running = False
+        self._thread.join()
+        self.sock.close()
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 2.0) -> bool:
+    """Wait for a condition to become true.
+
+    Args:
+        condition: The condition to wait for.
+        timeout: The maximum amount of time to wait (s).
+
+    Returns:
+        Whether or not the condition became true before the timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+def test_driver_decodes_all_frames_in_datagram() -> None:
+    """Test that the driver dispatches every packet in a multi-frame datagram."""
+    arm = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    arm.bind(("127.0.0.1", 0))
+    arm.settimeout(2.0)
+
+    received: list[Packet] = []
+    driver = BravoDriver()
+    driver.attach_callback(PacketID.POSITION, received.append)
+    driver.connect("127.0.0.1", arm.getsockname()[1])
+
+    try:
+        driver.send(
+            Packet(
+                DeviceID.ALL_JOINTS, PacketID.REQUEST, bytes([PacketID.POSITION.value])
+            )
+        )
+        _, address = arm.recvfrom(256)
+
+        arm.sendto(
+            b"".join(
+                Packet(joint, PacketID.POSITION, bytes(4)).encode() for joint in JOINTS
+            ),
+            address,
+        )
+
+        assert wait_for(lambda: len(received) == len(JOINTS))
+        assert [p.device_id for p in received] == list(JOINTS)
+    finally:
+        driver.disconnect()
+        arm.close()
+
+
+def test_receive_loop_drains_datagrams_from_the_arm() -> None:
+    """Test that the receive loop handles every datagram sent by the connected arm."""
+    shutdown_time = 0.5
+    arm = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    arm.bind(("127.0.0.1", 0))
+    arm.settimeout(2.0)
+    stranger = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    received: list[Packet] = []
+    driver = BravoDriver()
+    driver.attach_callback(PacketID.POSITION, received.append)
+    driver.connect("127.0.0.1", arm.getsockname()[1])
+
+    try:
+        driver.send(Packet(DeviceID.LINEAR_JAWS, PacketID.POSITION, bytes(4)))
+        _, address = arm.recvfrom(256)
+
+        # Datagrams from anything other than the arm are filtered by the socket
+        stranger.sendto(
+            Packet(DeviceID.LINEAR_JAWS, PacketID.POSITION, bytes(4)).encode(), address
+        )
+        for joint in JOINTS:
+            arm.sendto(Packet(joint, PacketID.POSITION, bytes(4)).encode(), address)
+
+        assert wait_for(lambda: len(received) == len(JOINTS))
+
+        stats = driver.receive_stats()
+        assert stats.datagrams == len(JOINTS)
+        assert 1 <= stats.max_datagrams_per_wakeup <= len(JOINTS)
+        assert stats.datagrams_per_wakeup >= 1
+    finally:
+        start = time.monotonic()
+        driver.disconnect()
+        arm.close()
+        stranger.close()
+
+    # The receive thread is woken to shut down rather than waiting on a timeout
+    assert time.monotonic() - start < shutdown_time
+
+
+def test_receive_ring_reuses_slots() -> None:
+    """Test that the receive ring cycles through its preallocated buffers."""
+    size = 16
+    ring = ReceiveRing(slots=2, size=size)
+    first, second, third = ring.next(), ring.next(), ring.next()
+
+    assert len(first) == size
+    assert first is not second
+    assert third is first
+
+
+def test_receive_loop_decodes_datagrams_in_place() -> None:
+    """Test that datagrams are decoded from the receive ring without being copied."""
+    arm = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    arm.bind(("127.0.0.1", 0))
+    arm.settimeout(2.0)
+
+    handled: list[tuple[object, int | None]] = []
+    received: list[Packet] = []
+    driver = BravoDriver()
+    driver.attach_listener(received.append)
+    handle_datagram = driver._handle_datagram
+
+    def spy(data: bytes | bytearray | memoryview, size: int | None = None) -> int:
+        handled.append((data, size))
+        return handle_datagram(data, size)
+
+    driver._handle_datagram = spy  # type: ignore
+    driver.connect("127.0.0.1", arm.getsockname()[1])
+
+    try:
+        driver.send(Packet(DeviceID.ALL_JOINTS, PacketID.HEARTBEAT_FREQUENCY, b"\x00"))
+        _, address = arm.recvfrom(256)
+
+        datagram = b"".join(
+            Packet(joint, PacketID.POSITION, bytes(4)).encode() for joint in JOINTS
+        )
+        arm.sendto(datagram, address)
+
+        assert wait_for(lambda: len(received) == len(JOINTS))
+    finally:
+        driver.disconnect()
+        arm.close()
+
+    # The decoder is handed the ring's own buffer and the size of the datagram
+    (data, size), *_ = handled
+    assert any(data is slot for slot in driver._ring._slots)
+    assert size == len(datagram)
+
+
+def test_send_many_batches_into_one_datagram() -> None:
+    """Test that sending multiple packets results in a single datagram."""
+    arm = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    arm.bind(("127.0.0.1", 0))
+    arm.settimeout(2.0)
+
+    driver = BravoDriver()
+    driver.connect("127.0.0.1", arm.getsockname()[1])
+
+    packets = [Packet(joint, PacketID.POSITION, bytes(4)) for joint in JOINTS]
+
+    try:
+        driver.send_many(packets)
+        datagram, _ = arm.recvfrom(2048)
+
+        assert [p.device_id for p in Packet.iter_decode(datagram)] == list(JOINTS)
+    finally:
+        driver.disconnect()
+        arm.close()
+
+
+def test_async_driver_packet_stream() -> None:
+    """Test that the asyncio driver delivers packets through packet streams."""
+    arm = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    arm.bind(("127.0.0.1", 0))
+    arm.settimeout(2.0)
+
+    def respond() -> None:
+        _, address = arm.recvfrom(256)
+        arm.sendto(
+            b"".join(
+                Packet(joint, PacketID.POSITION, bytes(4)).encode() for joint in JOINTS
+            ),
+            address,
+        )
+
+    async def run() -> list[Packet]:
+        driver = AsyncBravoDriver()
+        await driver.connect("127.0.0.1", arm.getsockname()[1])
+        received: list[Packet] = []
+
+        async def consume() -> None:
+            async for packet in driver.packets(PacketID.POSITION):
+                received.append(packet)
+                if len(received) == len(JOINTS):
+                    return
+
+        consumer = asyncio.create_task(consume())
+        await asyncio.sleep(0)
+
+        try:
+            await driver.send(
+                Packet(
+                    DeviceID.ALL_JOINTS,
+                    PacketID.REQUEST,
+                    bytes([PacketID.POSITION.value]),
+                )
+            )
+            await asyncio.wait_for(consumer, 2.0)
+
+            # Cancelling a stream should unsubscribe it from the driver
+            cancelled = asyncio.create_task(consume())
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await cancelled
+            assert not driver._streams[PacketID.POSITION]
+        finally:
+            await driver.disconnect()
+
+        return received
+
+    responder = threading.Thread(target=respond)
+    responder.start()
+
+    try:
+        received = asyncio.run(run())
+    finally:
+        responder.join()
+        arm.close()
+
+    assert [p.device_id for p in received] == list(JOINTS)
+
+
+def test_request_many_resolves_futures() -> None:
+    """Test that pipelined requests resolve in a single round trip."""
+    arm = RespondingArm()
+    driver = BravoDriver()
+    driver.connect("127.0.0.1", arm.port)
+
+    try:
+        futures = driver.request_many(
+            [(joint, PacketID.POSITION) for joint in JOINTS], timeout=2.0
+        )
+
+        assert [f.result(2.0).value for f in futures] == [j.value for j in JOINTS]
+        assert arm.datagrams_received == 1
+    finally:
+        driver.disconnect()
+        arm.close()
+
+
+def test_request_times_out_individually() -> None:
+    """Test that requests that are never answered time out."""
+    arm = RespondingArm()
+    driver = BravoDriver()
+    driver.connect("127.0.0.1", arm.port)
+
+    try:
+        unanswered = driver.request(
+            DeviceID.BEND_ELBOW, PacketID.VELOCITY, timeout=0.05
+        )
+        answered = driver.request(DeviceID.BEND_ELBOW, PacketID.POSITION, timeout=2.0)
+
+        with pytest.raises(concurrent.futures.TimeoutError):
+            unanswered.result(1.0)
+
+        assert answered.result(2.0).device_id is DeviceID.BEND_ELBOW
+
+        with pytest.raises(ValueError):
+            driver.request(DeviceID.ALL_JOINTS, PacketID.POSITION)
+    finally:
+        driver.disconnect()
+        arm.close()
+
+
+def test_cancelled_requests_are_forgotten() -> None:
+    """Test that cancelled requests are no longer tracked."""
+    tracker = RequestTracker()
+    cancelled = tracker.add(DeviceID.BEND_ELBOW, PacketID.POSITION)
+    answered = tracker.add(DeviceID.BEND_ELBOW, PacketID.POSITION)
+    expiring = tracker.add(DeviceID.ROTATE_BASE, PacketID.POSITION, timeout=60.0)
+
+    assert cancelled.cancel()
+    assert expiring.cancel()
+    assert len(tracker) == 1
+
+    assert tracker.resolve(
+        Packet.from_value(DeviceID.BEND_ELBOW, PacketID.POSITION, 1.0)
+    )
+    assert answered.result(0).value == 1.0
+    assert len(tracker) == 0
+    assert not tracker._pending
+    assert not tracker._sent
+
+
+@pytest.mark.parametrize(
+    "policy, expected",
+    [
+        (DropPolicy.DROP_OLDEST, [2.0, 3.0, 4.0]),
+        (DropPolicy.LATEST_PER_KEY, [4.0, 3.0]),
+    ],
+)
+def test_dispatcher_drop_policies(policy: DropPolicy, expected: list[float]) -> None:
+    """Test that a full dispatch queue drops packets according to its policy."""
+    dispatcher = CallbackDispatcher(max_size=3, policy=policy)
+    devices = [DeviceID.BEND_ELBOW, DeviceID.ROTATE_BASE]
+
+    submitted = 5
+    for i in range(submitted):
+        dispatcher.submit(
+            Packet.from_value(devices[i % len(devices)], PacketID.POSITION, float(i))
+        )
+
+    received: list[float] = []
+    dispatcher.start(lambda _: [lambda p: received.append(p.value)], print)
+    dispatcher.stop()
+
+    stats = dispatcher.stats()
+
+    assert received == expected
+    assert stats.submitted == submitted
+    assert stats.dropped == submitted - len(expected)
+    assert stats.dispatched == len(expected)
+    assert stats.depth == 0
+
+
+def test_dispatcher_runs_callbacks_off_receive_thread() -> None:
+    """Test that callbacks are executed by the dispatcher worker threads."""
+    arm = RespondingArm()
+    dispatcher = CallbackDispatcher(workers=2)
+    driver = BravoDriver(dispatcher=dispatcher)
+    threads: set[str] = set()
+
+    driver.attach_callback(
+        PacketID.POSITION, lambda _: threads.add(threading.current_thread().name)
+    )
+    driver.connect("127.0.0.1", arm.port)
+
+    try:
+        futures = driver.request_many(
+            [(joint, PacketID.POSITION) for joint in JOINTS], timeout=2.0
+        )
+        for future in futures:
+            future.result(2.0)
+
+        assert wait_for(lambda: dispatcher.stats().dispatched == len(JOINTS))
+        assert driver._poll_t.name not in threads
+    finally:
+        driver.disconnect()
+        arm.close()
+
+
+def test_driver_updates_state_cache() -> None:
+    """Test that the driver's state cache tracks the joint positions."""
+    arm = RespondingArm()
+    driver = BravoDriver()
+    cache = driver.state
+    driver.connect("127.0.0.1", arm.port)
+
+    try:
+        for future in driver.request_many(
+            [(joint, PacketID.POSITION) for joint in JOINTS], timeout=2.0
+        ):
+            future.result(2.0)
+
+        # The fake arm reports the ID of each joint as its position
+        assert list(cache.snapshot().position) == [j.value for j in JOINTS]
+    finally:
+        driver.disconnect()
+        arm.close()
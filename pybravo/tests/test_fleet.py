@@ -0,0 +1,157 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import contextlib
+import threading
+import time
+
+import pytest
+
+from pybravo import BravoFleet, DeviceID, ModeID, Packet, PacketID
+from pybravo.sim import BravoSimulator
+
+# The supply voltage reported by the simulated joints
+VOLTAGE = 24.0
+
+
+def test_fleet_multiplexes_arms_on_shared_threads() -> None:
+    """Test that many arms are received on a fixed number of threads."""
+    arms = 20
+    received: dict[str, int] = {}
+    lock = threading.Lock()
+
+    def count(arm: str, _: Packet) -> None:
+        with lock:
+            received[arm] = received.get(arm, 0) + 1
+
+    with contextlib.ExitStack() as stack:
+        sims = [
+            stack.enter_context(
+                BravoSimulator(
+                    emission_rate=100.0, emitted_packets=(PacketID.POSITION,)
+                )
+            )
+            for _ in range(arms)
+        ]
+
+        fleet = BravoFleet(threads=2)
+        fleet.attach_callback(PacketID.POSITION, count)
+
+        for i, sim in enumerate(sims):
+            fleet.add_arm(f"arm{i}", *sim.address)
+
+        threads = threading.active_count()
+
+        with fleet:
+            assert threading.active_count() == threads + 2
+
+            # The simulators stream to the most recent client
+            for name in fleet:
+                fleet[name].send(
+                    Packet.from_value(
+                        DeviceID.ALL_JOINTS, PacketID.MODE, ModeID.STANDBY
+                    )
+                )
+
+            time.sleep(0.2)
+
+            # Each arm's driver can still be used to make requests
+            futures = [
+                fleet[name].request(DeviceID.BEND_ELBOW, PacketID.VOLTAGE, 2.0)
+                for name in fleet
+            ]
+            assert all(f.result(2.0).value == VOLTAGE for f in futures)
+
+    assert set(received) == {f"arm{i}" for i in range(arms)}
+    assert all(count > 7 * 5 for count in received.values())
+
+
+def test_fleet_adds_and_removes_arms_while_connected() -> None:
+    """Test that arms can join and leave a connected fleet."""
+    with BravoSimulator() as first, BravoSimulator() as second:
+        fleet = BravoFleet()
+        fleet.add_arm("first", *first.address)
+
+        with fleet:
+            second_driver = fleet.add_arm("second", *second.address)
+            response = second_driver.request(DeviceID.BEND_ELBOW, PacketID.MODE, 2.0)
+            assert response.result(2.0).value is ModeID.STANDBY
+
+            removed = fleet.remove_arm("first")
+            assert removed.address is None
+            assert list(fleet) == ["second"]
+
+            with pytest.raises(ValueError):
+                fleet.add_arm("second", *second.address)
+
+        assert second_driver.address is None
+
+
+def test_fleet_detaches_removed_arms() -> None:
+    """Test that the fleet stops handling the packets of a removed arm."""
+    received: list[str] = []
+
+    with BravoSimulator() as sim:
+        fleet = BravoFleet()
+        fleet.attach_callback(PacketID.MODE, lambda arm, _: received.append(arm))
+        fleet.add_arm("arm", *sim.address)
+
+        with fleet:
+            removed = fleet.remove_arm("arm")
+            assert not removed.listeners
+
+            # The driver can still be used on its own after leaving the fleet
+            removed.connect(*sim.address)
+            response = removed.request(DeviceID.BEND_ELBOW, PacketID.MODE, 2.0)
+            assert response.result(2.0).value is ModeID.STANDBY
+            removed.disconnect()
+
+    assert not received
+
+
+def test_fleet_removes_arms_from_callbacks() -> None:
+    """Test that a fleet callback can remove an arm without blocking its thread."""
+    removed: list[object] = []
+    timeout, latency = 2.0, 0.5
+
+    with BravoSimulator() as first, BravoSimulator() as second:
+        fleet = BravoFleet()
+        fleet.attach_callback(
+            PacketID.MODE,
+            lambda arm, _: removed.append(fleet.remove_arm(arm))
+            if arm in fleet
+            else None,
+        )
+        fleet.add_arm("first", *first.address)
+        fleet.add_arm("second", *second.address)
+
+        with fleet:
+            start = time.monotonic()
+            fleet["first"].request(DeviceID.BEND_ELBOW, PacketID.MODE)
+
+            while not removed and time.monotonic() - start < timeout:
+                time.sleep(0.01)
+
+            assert time.monotonic() - start < latency
+            assert list(fleet) == ["second"]
+
+            # The shard thread is still receiving the remaining arm
+            response = fleet["second"].request(DeviceID.BEND_ELBOW, PacketID.VOLTAGE)
+            assert response.result(2.0).value == VOLTAGE
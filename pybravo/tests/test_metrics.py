@@ -0,0 +1,153 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import random
+import threading
+import urllib.request
+
+import pytest
+
+from pybravo import BravoDriver, DeviceID, Packet, PacketID
+from pybravo.driver.dispatch import CallbackDispatcher
+from pybravo.driver.metrics import (
+    LatencyHistogram,
+    MetricsExporter,
+    format_prometheus,
+)
+from pybravo.sim import BravoSimulator
+
+
+def test_histogram_quantiles_are_within_bounds() -> None:
+    """Test that the histogram quantiles are within the relative error bound."""
+    histogram = LatencyHistogram()
+    values = sorted(random.randint(1_000, 10_000_000) for _ in range(10_000))
+
+    for value in values:
+        histogram.record(value)
+
+    snapshot = histogram.snapshot()
+
+    assert snapshot.count == len(values)
+    assert snapshot.min == values[0] / 1e9
+    assert snapshot.max == values[-1] / 1e9
+    assert snapshot.p50 == pytest.approx(values[len(values) // 2] / 1e9, rel=0.05)
+    assert snapshot.p99 == pytest.approx(
+        values[int(len(values) * 0.99)] / 1e9, rel=0.05
+    )
+
+
+def test_empty_histogram() -> None:
+    """Test that an empty histogram reports zeros."""
+    snapshot = LatencyHistogram().snapshot()
+
+    assert snapshot.count == 0
+    assert snapshot.p99 == 0.0
+
+
+def test_driver_counts_traffic(driver: BravoDriver) -> None:
+    """Test that the driver counts packets, round trip times and callbacks."""
+    requests = 10
+
+    with BravoSimulator() as sim:
+        driver.connect(*sim.address)
+        driver.attach_callback(PacketID.POSITION, lambda _: None)
+
+        for _ in range(requests):
+            future = driver.request(DeviceID.BEND_ELBOW, PacketID.POSITION, timeout=2)
+            future.result(2.0)
+
+    # Handle a corrupt frame and a packet with an unknown packet ID
+    encoded = bytearray(Packet(DeviceID.BEND_ELBOW, PacketID.POSITION, b"").encode())
+    encoded[-3] ^= 0xFF
+    driver._handle_datagram(bytes(encoded))
+    driver._handle_datagram(b"\x01\x00")
+    driver._handle_datagram(Packet(DeviceID.BEND_ELBOW, 0xEE, b"").encode())
+
+    stats = driver.stats()
+
+    assert stats.tx_packets[PacketID.REQUEST] == requests
+    assert stats.tx_devices[DeviceID.BEND_ELBOW] == requests
+    assert stats.rx_packets[PacketID.POSITION] == requests
+    assert stats.rx_packets[0xEE] == 1
+    assert stats.rx_datagrams == requests
+    assert stats.decode_errors == {
+        (DeviceID.BEND_ELBOW, PacketID.POSITION): 1,
+        (None, None): 1,
+    }
+    assert stats.unknown_ids == 1
+    assert stats.request_rtt.count == requests
+    assert 0 < stats.request_rtt.p50 <= stats.request_rtt.max
+    assert stats.callback_time.count == requests
+
+
+def test_driver_counts_dropped_packets() -> None:
+    """Test that the packets dropped by the dispatcher are counted by ID."""
+    entered = threading.Event()
+    release = threading.Event()
+
+    def block(_: Packet) -> None:
+        entered.set()
+        release.wait(2.0)
+
+    driver = BravoDriver(dispatcher=CallbackDispatcher(max_size=1))
+    driver.attach_callback(PacketID.POSITION, block)
+    driver._start_dispatcher()
+
+    try:
+        # Hold the worker in a callback so that the queue fills up
+        driver._handle_datagram(
+            Packet(DeviceID.BEND_ELBOW, PacketID.POSITION, bytes(4)).encode()
+        )
+        assert entered.wait(2.0)
+
+        for device_id in (DeviceID.ROTATE_BASE, DeviceID.BEND_ELBOW):
+            driver._handle_datagram(
+                Packet(device_id, PacketID.POSITION, bytes(4)).encode()
+            )
+    finally:
+        release.set()
+        driver.dispatcher.stop()  # type: ignore
+
+    assert driver.stats().dropped == {(DeviceID.ROTATE_BASE, PacketID.POSITION): 1}
+    assert (
+        'bravo_dropped_packets_total{device_id="ROTATE_BASE",packet_id="POSITION"} 1'
+        in format_prometheus(driver.stats())
+    )
+
+
+def test_exporter_serves_prometheus_text(driver: BravoDriver) -> None:
+    """Test that the exporter serves the driver metrics over HTTP."""
+    driver._handle_datagram(
+        Packet(DeviceID.BEND_ELBOW, PacketID.POSITION, b"\x00\x00\x00\x00").encode()
+    )
+
+    exporter = MetricsExporter(driver.stats, port=0)
+    exporter.start()
+
+    try:
+        host, port = exporter.address
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as response:
+            body = response.read().decode()
+    finally:
+        exporter.stop()
+
+    assert 'bravo_rx_packets_total{packet_id="POSITION"} 1' in body
+    assert 'bravo_rx_device_packets_total{device_id="BEND_ELBOW"} 1' in body
+    assert "bravo_request_rtt_seconds_count 0" in body
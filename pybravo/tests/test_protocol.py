@@ -18,9 +18,29 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import pytest  # noqa
+import pickle
+import random
 
-from pybravo.protocol import DeviceID, Packet, PacketID  # noqa
+import pytest
+from cobs import cobs
+from crc import Calculator, Configuration
+
+from pybravo.protocol import (
+    JOINTS,
+    REQUESTS,
+    DeviceID,
+    FrameDecoder,
+    FrozenPacket,
+    JointCommandEncoder,
+    ModeID,
+    Packet,
+    PacketID,
+    StructCodec,
+    codec,
+    crc8,
+    frame,
+    register_codec,
+)
 
 
 def test_packet_encoding() -> None:
@@ -40,3 +60,246 @@ def test_data_decoding() -> None:
     decoded_data = bytes([0x01, 0x02, 0x03, 0x04])
 
     assert decoded_data == Packet.decode(encoded_data).data
+
+
+@pytest.mark.parametrize("size", [0, 1, 4, 8, 16, 32, 255])
+def test_crc8_matches_reference_calculator(size: int) -> None:
+    """Test that the table-driven CRC-8 matches the generic CRC calculator."""
+    calculator = Calculator(
+        Configuration(
+            width=8,
+            polynomial=0x4D,
+            init_value=0x00,
+            final_xor_value=0xFF,
+            reverse_input=True,
+            reverse_output=True,
+        )
+    )
+    data = bytes(random.Random(size).getrandbits(8) for _ in range(size))
+
+    expected = calculator.checksum(data)
+
+    assert crc8.checksum(data) == expected
+    assert crc8.checksum(bytearray(data)) == expected
+    assert crc8.checksum(memoryview(data)) == expected
+    assert crc8.verify(memoryview(data), expected)
+
+
+@pytest.mark.parametrize("size", [0, 1, 4, 32, 249, 250, 251])
+@pytest.mark.parametrize("zeros", [True, False])
+def test_frame_codec_matches_reference_cobs(size: int, zeros: bool) -> None:
+    """Test that the frame codec is wire-compatible with a generic COBS encoder."""
+    rng = random.Random(size)
+    low = 0 if zeros else 1
+    data = bytes(rng.randint(low, 0xFF) for _ in range(size))
+
+    raw = data + bytes([PacketID.POSITION.value, DeviceID.BEND_ELBOW.value, size + 4])
+    expected = cobs.encode(raw + bytes([crc8.checksum(raw)])) + b"\x00"
+
+    encoded = frame.encode(DeviceID.BEND_ELBOW.value, PacketID.POSITION.value, data)
+
+    assert encoded == expected
+    assert frame.decode_from(memoryview(expected)) == (
+        DeviceID.BEND_ELBOW.value,
+        PacketID.POSITION.value,
+        data,
+        len(expected),
+    )
+
+
+def test_frame_encode_into_offset() -> None:
+    """Test that frames can be encoded back-to-back into a preallocated buffer."""
+    buf = bytearray(2 * frame.max_frame_size(1))
+
+    first = frame.encode_into(buf, 0, 0x01, 0x60, bytes([0x03]))
+    second = frame.encode_into(buf, first, 0x02, 0x60, bytes([0x03]))
+
+    assert bytes(buf[:first]) == bytes([0x06, 0x03, 0x60, 0x01, 0x05, 0x52, 0x00])
+    assert frame.decode_from(buf, first)[:3] == (0x02, 0x60, bytes([0x03]))
+    assert first + second <= len(buf)
+
+
+def test_frame_decode_rejects_corrupt_crc() -> None:
+    """Test that frames with an invalid CRC are rejected."""
+    with pytest.raises(ValueError):
+        frame.decode_from(bytes([0x06, 0x03, 0x60, 0x01, 0x05, 0x53, 0x00]))
+
+
+def test_iter_decode_multiple_frames() -> None:
+    """Test that every frame in a datagram is decoded, skipping corrupt frames."""
+    packets = [
+        Packet(device_id, PacketID.POSITION, bytes([0x00, 0x00, 0x80, 0x3F]))
+        for device_id in (DeviceID.LINEAR_JAWS, DeviceID.BEND_ELBOW)
+    ]
+    corrupt = bytes([0x06, 0x03, 0x60, 0x01, 0x05, 0x53, 0x00])
+    datagram = packets[0].encode() + corrupt + b"\x00" + packets[1].encode()
+    errors = []
+
+    decoded = list(
+        Packet.iter_decode(memoryview(datagram), lambda *args: errors.append(args))
+    )
+
+    assert [(p.device_id, p.data) for p in decoded] == [
+        (p.device_id, p.data) for p in packets
+    ]
+    assert len(errors) == 1
+    assert bytes(errors[0][0]) == corrupt[:-1]
+
+
+def test_iter_decode_stops_at_end_of_buffer() -> None:
+    """Test that a partially filled receive buffer is decoded up to its end."""
+    packets = [
+        Packet(device_id, PacketID.POSITION, bytes([0x00, 0x00, 0x80, 0x3F]))
+        for device_id in (DeviceID.LINEAR_JAWS, DeviceID.BEND_ELBOW)
+    ]
+    datagram = b"".join(p.encode() for p in packets)
+
+    # Stale bytes from an earlier, longer datagram follow the received data
+    buffer = bytearray(datagram + packets[0].encode() + bytes([0x06, 0x03]))
+    errors = []
+
+    decoded = list(
+        Packet.iter_decode(buffer, lambda *args: errors.append(args), len(datagram))
+    )
+
+    assert [p.device_id for p in decoded] == [p.device_id for p in packets]
+    assert not errors
+
+    # A frame is cut off at the end of the received data
+    with pytest.raises(ValueError):
+        frame.decode_from(buffer, len(packets[0].encode()), len(datagram) - 2)
+
+
+def test_frame_decoder_split_frames() -> None:
+    """Test that the frame decoder holds incomplete frames between chunks."""
+    encoded = Packet(
+        DeviceID.ROTATE_BASE, PacketID.VELOCITY, bytes([0x01, 0x00, 0x02, 0x00])
+    ).encode()
+    frames = 3
+    stream = encoded * frames
+    decoder = FrameDecoder()
+
+    packets = []
+    for i in range(0, len(stream), 5):
+        packets.extend(decoder.feed(stream[i : i + 5]))
+
+    assert len(packets) == frames
+    assert all(p.data == bytes([0x01, 0x00, 0x02, 0x00]) for p in packets)
+    assert decoder.pending == 0
+
+
+def test_encode_many_respects_max_size() -> None:
+    """Test that packets are batched into datagrams no larger than the maximum."""
+    packets = [Packet(joint, PacketID.POSITION, bytes(4)) for joint in DeviceID]
+    frame_size = len(packets[0].encode())
+
+    datagrams = Packet.encode_many(packets, max_size=frame_size * 4)
+
+    assert [len(d) for d in datagrams] == [frame_size * 4, frame_size * 4, frame_size]
+    assert b"".join(datagrams) == b"".join(p.encode() for p in packets)
+
+
+def test_decode_unknown_ids() -> None:
+    """Test that unknown device and packet IDs are decoded as raw integers."""
+    device_id, packet_id = 0x42, 0xEE
+    encoded = frame.encode(device_id, packet_id, bytes([0x01]))
+
+    packet = Packet.decode(encoded)
+
+    assert packet.device_id == device_id
+    assert packet.packet_id == packet_id
+    assert packet.encode() == encoded
+
+
+def test_decode_uses_enum_members() -> None:
+    """Test that known IDs are decoded to the enum members."""
+    packet = Packet.decode(
+        Packet(
+            DeviceID.FORCE_TORQUE_SENSOR, PacketID.ATI_FT_READING, bytes(24)
+        ).encode()
+    )
+
+    assert packet.device_id is DeviceID.FORCE_TORQUE_SENSOR
+    assert packet.packet_id is PacketID.ATI_FT_READING
+    assert not hasattr(packet, "__dict__")
+
+
+def test_frozen_packet_caches_encoding() -> None:
+    """Test that frozen packets encode identically and cannot be modified."""
+    packet = FrozenPacket(
+        DeviceID.LINEAR_JAWS, PacketID.REQUEST, bytes([PacketID.POSITION.value])
+    )
+    buf = bytearray(16)
+
+    assert packet.encode() is packet.encode()
+    assert packet.encode() == bytes([0x06, 0x03, 0x60, 0x01, 0x05, 0x52, 0x00])
+    assert bytes(buf[: packet.encode_into(buf)]) == packet.encode()
+    assert pickle.loads(pickle.dumps(packet)).encode() == packet.encode()
+
+    with pytest.raises(AttributeError):
+        packet.data = b"\x01"
+
+
+def test_request_table_covers_all_ids() -> None:
+    """Test that a prebuilt request exists for every device and packet ID."""
+    assert len(REQUESTS) == len(DeviceID) * len(PacketID)
+
+    request = REQUESTS[DeviceID.BEND_ELBOW, PacketID.VELOCITY]
+
+    assert request.packet_id is PacketID.REQUEST
+    assert request.encode() == (
+        Packet(DeviceID.BEND_ELBOW, PacketID.REQUEST, bytes([0x02])).encode()
+    )
+
+
+def test_packet_value_is_decoded_with_codec() -> None:
+    """Test that packet values are decoded using the registered codecs."""
+    position = Packet(DeviceID.BEND_ELBOW, PacketID.POSITION, bytes([0, 0, 0x80, 0x3F]))
+    mode = Packet(DeviceID.BEND_ELBOW, PacketID.MODE, bytes([ModeID.VELOCITY.value]))
+    version = Packet(DeviceID.BEND_ELBOW, PacketID.SOFTWARE_VERSION, bytes([0, 2, 1]))
+
+    assert position.value == 1.0
+    assert mode.value is ModeID.VELOCITY
+    assert version.value == "0.2.1"
+    assert REQUESTS[DeviceID.ALL_JOINTS, PacketID.MODE].value == (PacketID.MODE,)
+    assert Packet(DeviceID.BEND_ELBOW, 0xEE, b"").value is None
+
+
+def test_packet_from_value_round_trip() -> None:
+    """Test that packets created from a value decode to the same value."""
+    packet = Packet.from_value(DeviceID.ROTATE_BASE, PacketID.POSITION_LIMITS, (3, -3))
+
+    assert packet.data == bytes([0, 0, 0x40, 0x40, 0, 0, 0x40, 0xC0])
+    assert Packet.decode(packet.encode()).value == (3.0, -3.0)
+
+    with pytest.raises(ValueError):
+        Packet.from_value(DeviceID.ROTATE_BASE, PacketID.POSITION, "not a float")
+
+
+def test_register_codec() -> None:
+    """Test that custom codecs can be registered for a packet ID."""
+    original = codec.CODECS.get(PacketID.SAVE)
+
+    try:
+        register_codec(PacketID.SAVE, StructCodec("<B"))
+        assert Packet.from_value(DeviceID.ALL_JOINTS, PacketID.SAVE, 1).value == 1
+    finally:
+        if original is None:
+            del codec.CODECS[PacketID.SAVE]
+        else:
+            register_codec(PacketID.SAVE, original)
+
+
+@pytest.mark.parametrize("packet_id", [PacketID.POSITION, PacketID.CURRENT])
+def test_joint_command_encoder_matches_packets(packet_id: PacketID) -> None:
+    """Test that the command encoder produces the same datagram as encode_many."""
+    encoder = JointCommandEncoder(packet_id)
+
+    # Zeros in the data or the CRC exercise the byte stuffing
+    for values in ([0.0] * 7, [1.5, -2.0, 0.25, 3.0, 1e-45, 256.0, -0.5]):
+        packets = [
+            Packet.from_value(device_id, packet_id, value)
+            for device_id, value in zip(JOINTS, values, strict=True)
+        ]
+
+        assert [bytes(encoder.encode(values))] == Packet.encode_many(packets)
@@ -0,0 +1,93 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import time
+
+import pytest
+
+from pybravo import BravoDriver, DeviceID, PacketID
+from pybravo.driver.scheduler import PollScheduler
+from pybravo.sim import BravoSimulator
+
+
+def test_scheduler_coalesces_due_requests() -> None:
+    """Test that requests due in the same tick are sent in one batch."""
+    rate = 100.0
+    batches: list[list[tuple[DeviceID, PacketID]]] = []
+    scheduler = PollScheduler(batches.append)
+
+    scheduler.subscribe(PacketID.POSITION, DeviceID.ALL_JOINTS, rate)
+    scheduler.subscribe(PacketID.VELOCITY, DeviceID.ALL_JOINTS, rate / 2)
+    scheduler.start()
+    time.sleep(0.5)
+    scheduler.stop()
+
+    position, velocity = scheduler.stats()
+
+    # Every velocity request is due at the same time as a position request
+    assert len(batches) == position.sent
+    assert sum(len(b) for b in batches) == position.sent + velocity.sent
+    assert position.achieved_rate == pytest.approx(rate, rel=0.1)
+    assert velocity.achieved_rate == pytest.approx(rate / 2, rel=0.1)
+    assert position.jitter < 0.5 / rate
+
+
+def test_scheduler_skips_missed_periods() -> None:
+    """Test that a slow send skips the missed periods instead of bursting."""
+    sent: list[float] = []
+    send_time = 0.05
+
+    def slow_send(_: list) -> None:
+        sent.append(time.monotonic())
+        time.sleep(send_time)
+
+    scheduler = PollScheduler(slow_send)
+    subscription = scheduler.subscribe(PacketID.POSITION, DeviceID.BEND_ELBOW, 100.0)
+    scheduler.start()
+    time.sleep(0.3)
+    scheduler.stop()
+
+    stats = subscription.stats()
+
+    assert stats.missed > 0
+    intervals = [b - a for a, b in zip(sent[:-1], sent[1:], strict=True)]
+    assert min(intervals) >= send_time * 0.9
+
+
+def test_driver_polls_subscriptions_while_connected() -> None:
+    """Test that the driver's scheduler requests packets from the arm."""
+    driver = BravoDriver()
+    received = []
+    driver.attach_callback(PacketID.POSITION, received.append)
+    subscription = driver.scheduler.subscribe(
+        PacketID.POSITION, DeviceID.ALL_JOINTS, 100.0
+    )
+
+    with BravoSimulator() as sim:
+        driver.connect(*sim.address)
+        time.sleep(0.2)
+        driver.scheduler.unsubscribe(subscription)
+        time.sleep(0.05)
+        count = len(received)
+        time.sleep(0.05)
+        driver.disconnect()
+
+    assert count == len(received) > 7 * 10
+    assert driver.scheduler.stats() == []
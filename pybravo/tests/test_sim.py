@@ -0,0 +1,234 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import time
+
+import numpy as np
+import pytest
+
+from pybravo import BravoDriver, DeviceID, ModeID, Packet, PacketID
+from pybravo.protocol import JOINTS
+from pybravo.sim import BravoSimulator
+
+# The supply voltage reported by the simulated joints
+VOLTAGE = 24.0
+
+
+def test_simulator_answers_every_request(driver: BravoDriver) -> None:
+    """Test that the simulator responds to requests for every packet ID."""
+    with BravoSimulator() as sim:
+        driver.connect(*sim.address)
+
+        futures = driver.request_many(
+            [(DeviceID.BEND_ELBOW, packet_id) for packet_id in PacketID], timeout=2.0
+        )
+        responses = [future.result(2.0) for future in futures]
+
+    assert [r.packet_id for r in responses] == list(PacketID)
+    assert responses[list(PacketID).index(PacketID.VOLTAGE)].value == VOLTAGE
+
+
+def test_simulator_tracks_commands(driver: BravoDriver) -> None:
+    """Test that the simulated joints move in response to commands."""
+    with BravoSimulator() as sim:
+        sim.max_velocity = 10.0
+        driver.connect(*sim.address)
+
+        position, velocity, duration = 0.5, -1.0, 0.1
+        driver.send(Packet.from_value(DeviceID.BEND_ELBOW, PacketID.POSITION, position))
+        driver.send(Packet.from_value(DeviceID.ALL_JOINTS, PacketID.VELOCITY, velocity))
+        driver.send(Packet.from_value(DeviceID.BEND_ELBOW, PacketID.POSITION, position))
+        time.sleep(duration)
+
+        elbow = sim.state(DeviceID.BEND_ELBOW)
+        base = sim.state(DeviceID.ROTATE_BASE)
+        reported = driver.request(DeviceID.BEND_ELBOW, PacketID.POSITION, 2.0)
+
+        assert elbow.mode is ModeID.POSITION
+        assert elbow.position == pytest.approx(position)
+        assert reported.result(2.0).value == pytest.approx(position)
+        assert base.mode is ModeID.VELOCITY
+        # The base has moved for at least half of the time it was commanded
+        assert base.position < velocity * duration / 2
+
+        # Parameters that are set are reported back when requested
+        driver.send(
+            Packet.from_value(DeviceID.BEND_ELBOW, PacketID.POSITION_LIMITS, (1, -1))
+        )
+        limits = driver.request(DeviceID.BEND_ELBOW, PacketID.POSITION_LIMITS, 2.0)
+        assert limits.result(2.0).value == (1.0, -1.0)
+
+
+def test_command_joints(driver: BravoDriver) -> None:
+    """Test that a setpoint is sent to every joint in a single datagram."""
+    with BravoSimulator() as sim:
+        sim.max_velocity = 10.0
+        driver.connect(*sim.address)
+
+        positions = np.linspace(0.1, 0.7, len(JOINTS))
+        driver.command_joints(ModeID.POSITION, positions)
+        time.sleep(0.1)
+
+        for device_id, position in zip(JOINTS, positions, strict=True):
+            state = sim.state(device_id)
+
+            assert state.mode is ModeID.POSITION
+            assert state.position == pytest.approx(position)
+
+        stats = sim.stats()
+
+    assert stats.datagrams_received == 1
+    assert stats.packets_received == len(JOINTS)
+
+
+def test_command_joints_checks_limits(driver: BravoDriver) -> None:
+    """Test that setpoints outside of the loaded joint limits are rejected."""
+    with BravoSimulator() as sim:
+        driver.connect(*sim.address)
+
+        # Without limits, only values that can't be sent are rejected
+        with pytest.raises(ValueError, match="ROTATE_BASE"):
+            driver.command_joints(ModeID.VELOCITY, [0.0] * 6 + [float("nan")])
+
+        driver.command_joints(ModeID.VELOCITY, [1.0] * len(JOINTS))
+        driver.load_joint_limits(timeout=2.0)
+
+        with pytest.raises(ValueError, match="LINEAR_JAWS"):
+            driver.command_joints(ModeID.VELOCITY, [1.0] + [0.0] * 6)
+
+        with pytest.raises(ValueError, match="setpoint is required"):
+            driver.command_joints(ModeID.POSITION, [0.0] * 6)
+
+        with pytest.raises(ValueError, match="STANDBY"):
+            driver.command_joints(ModeID.STANDBY, [0.0] * len(JOINTS))
+
+        driver.command_joints(ModeID.VELOCITY, [0.5] + [0.0] * 6)
+
+
+def test_simulator_delays_responses(driver: BravoDriver) -> None:
+    """Test that responses are sent after the configured delay."""
+    delay = 0.05
+
+    with BravoSimulator(response_delay=delay) as sim:
+        driver.connect(*sim.address)
+
+        start = time.monotonic()
+        driver.request(DeviceID.BEND_ELBOW, PacketID.MODE, timeout=2.0).result(2.0)
+
+        assert time.monotonic() - start >= delay
+
+
+def test_simulator_emits_joint_state(driver: BravoDriver) -> None:
+    """Test that the simulator emits the state of every joint at the emission rate."""
+    received: list[Packet] = []
+    driver.attach_callback(PacketID.POSITION, received.append)
+
+    with BravoSimulator(
+        emission_rate=500.0, emitted_packets=(PacketID.POSITION,)
+    ) as sim:
+        driver.connect(*sim.address)
+
+        # The simulator emits to the most recent client
+        driver.send(
+            Packet.from_value(DeviceID.BEND_ELBOW, PacketID.MODE, ModeID.STANDBY)
+        )
+        time.sleep(0.2)
+        stats = sim.stats()
+
+    assert {p.device_id for p in received} == set(JOINTS)
+    assert 20 * len(JOINTS) < stats.packets_sent < 150 * len(JOINTS)
+    assert stats.datagrams_sent * len(JOINTS) == stats.packets_sent
+
+
+def test_heartbeat_streams_packets(driver: BravoDriver) -> None:
+    """Test that the configured heartbeat packets are streamed to the driver."""
+    cache = driver.state
+
+    with BravoSimulator() as sim:
+        driver.connect(*sim.address)
+        driver.configure_heartbeat([PacketID.POSITION, PacketID.MODE], 100)
+        time.sleep(0.1)
+
+        sequence = cache.sequence
+        assert sequence > 2 * len(JOINTS)
+
+        driver.configure_heartbeat([], 0)
+        time.sleep(0.05)
+        stopped = cache.sequence
+        time.sleep(0.05)
+
+        assert cache.sequence == stopped
+
+    state = cache.snapshot()
+    assert all(mode == ModeID.STANDBY.value for mode in state.mode)
+
+
+def test_heartbeat_rejects_invalid_configuration(driver: BravoDriver) -> None:
+    """Test that configurations that can't be sent to the arm are rejected."""
+    with BravoSimulator() as sim:
+        driver.connect(*sim.address)
+
+        with pytest.raises(ValueError):
+            driver.configure_heartbeat([PacketID.POSITION], 256)
+
+        with pytest.raises(ValueError):
+            driver.configure_heartbeat(list(PacketID)[:11], 10)
+
+
+def datagrams_per_sample(driver: BravoDriver, sim: BravoSimulator) -> float:
+    """Measure the datagrams exchanged for each sample of the joint positions.
+
+    Args:
+        driver: The driver receiving the positions.
+        sim: The simulator sending the positions.
+
+    Returns:
+        The number of datagrams sent in either direction for each position received
+        from every joint.
+    """
+    samples = driver.state.sequence
+    before = sim.stats()
+
+    time.sleep(0.5)
+
+    after = sim.stats()
+    samples = (driver.state.sequence - samples) / len(JOINTS)
+    datagrams = (after.datagrams_sent - before.datagrams_sent) + (
+        after.datagrams_received - before.datagrams_received
+    )
+    return datagrams / samples
+
+
+def test_heartbeat_halves_datagrams(driver: BravoDriver) -> None:
+    """Test that streaming needs half as many datagrams as polling at the same rate."""
+    with BravoSimulator() as sim:
+        driver.connect(*sim.address)
+
+        subscription = driver.scheduler.subscribe(
+            PacketID.POSITION, DeviceID.ALL_JOINTS, 50.0
+        )
+        polled = datagrams_per_sample(driver, sim)
+        driver.scheduler.unsubscribe(subscription)
+
+        driver.configure_heartbeat([PacketID.POSITION], 50)
+        streamed = datagrams_per_sample(driver, sim)
+
+    assert polled == pytest.approx(2.0, rel=0.1)
+    assert streamed == pytest.approx(1.0, rel=0.1)
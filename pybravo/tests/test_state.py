@@ -0,0 +1,217 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import math
+import multiprocessing
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from pybravo import DeviceID, ModeID, Packet, PacketID
+from pybravo.protocol import JOINTS
+from pybravo.state import (
+    JointStateCache,
+    SharedStatePublisher,
+    SharedStateReader,
+    TelemetryHistory,
+    TimeSeriesBuffer,
+)
+
+
+def test_cache_stores_joint_state() -> None:
+    """Test that joint packets are stored at the index of their joint."""
+    cache = JointStateCache()
+    elbow = cache.index(DeviceID.BEND_ELBOW)
+    position = 1.5
+    stored = [
+        Packet.from_value(DeviceID.BEND_ELBOW, PacketID.POSITION, position),
+        Packet.from_value(DeviceID.BEND_ELBOW, PacketID.MODE, ModeID.VELOCITY),
+    ]
+
+    assert all([cache.update(packet) for packet in stored])
+
+    # Packets that don't describe a joint field are ignored
+    assert not cache.update(
+        Packet.from_value(DeviceID.FORCE_TORQUE_SENSOR, PacketID.POSITION, 1.0)
+    )
+    assert not cache.update(
+        Packet.from_value(DeviceID.BEND_ELBOW, PacketID.HEARTBEAT_FREQUENCY, 10)
+    )
+
+    state = cache.snapshot()
+
+    assert state.sequence == cache.sequence == len(stored)
+    assert state.position[elbow] == position
+    assert state.mode[elbow] == ModeID.VELOCITY.value
+    assert math.isnan(state.velocity[elbow])
+    assert not math.isnan(state.timestamps[0, elbow])
+    assert math.isnan(state.timestamps[1, elbow])
+
+
+def test_snapshot_is_a_copy() -> None:
+    """Test that modifying a snapshot doesn't modify the cache."""
+    cache = JointStateCache()
+    position = 2.0
+    cache.update(Packet.from_value(DeviceID.LINEAR_JAWS, PacketID.POSITION, position))
+
+    cache.snapshot().position[0] = 0.0
+
+    assert cache.snapshot().position[0] == position
+
+
+def test_snapshot_is_consistent_during_updates() -> None:
+    """Test that snapshots never observe a partially applied update."""
+    cache = JointStateCache()
+    updates = 20000
+    done = threading.Event()
+
+    def write() -> None:
+        # Each update writes the number of the update to the joint that it targets
+        for i in range(1, updates + 1):
+            joint = JOINTS[i % len(JOINTS)]
+            cache.update(Packet.from_value(joint, PacketID.POSITION, float(i)))
+        done.set()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+
+    while not done.is_set():
+        state = cache.snapshot()
+
+        # The largest value stored is always the number of the last applied update
+        if state.sequence:
+            assert max(p for p in state.position if not math.isnan(p)) == state.sequence
+
+    writer.join()
+    assert cache.snapshot().sequence == updates
+
+
+def test_buffer_keeps_newest_samples() -> None:
+    """Test that a full buffer overwrites its oldest samples."""
+    buffer = TimeSeriesBuffer(capacity=4)
+
+    for i in range(10):
+        buffer.append(float(i), i * 10.0)
+
+    times, values = buffer.last(100.0, now=9.0)
+
+    assert len(buffer) == buffer.capacity
+    assert list(times) == [6.0, 7.0, 8.0, 9.0]
+    assert list(values) == [60.0, 70.0, 80.0, 90.0]
+
+    # Windows that only cover part of the wrapped ring are handled
+    assert list(buffer.last(1.5, now=9.0)[0]) == [8.0, 9.0]
+
+
+def test_buffer_resamples_and_estimates_rate() -> None:
+    """Test that samples are interpolated onto a uniform grid."""
+    buffer = TimeSeriesBuffer(capacity=8, width=2)
+
+    for t in (0.0, 0.2, 0.4, 0.6):
+        buffer.append(t, (t, -t))
+
+    grid, values = buffer.resample(1.0, period=0.1, now=0.6)
+
+    assert np.allclose(grid, [0.0, 0.1, 0.2, 0.3, 0.4, 0.5])
+    assert np.allclose(values[:, 0], grid)
+    assert np.allclose(values[:, 1], -grid)
+    assert buffer.rate() == pytest.approx(5.0)
+
+
+def test_history_tracks_packets_by_device_and_packet() -> None:
+    """Test that packets are stored in the buffer for their device and packet."""
+    history = TelemetryHistory(capacity=16)
+
+    assert history.update(
+        Packet.from_value(DeviceID.BEND_ELBOW, PacketID.POSITION, 1.0)
+    )
+    assert not history.update(
+        Packet.from_value(DeviceID.BEND_ELBOW, PacketID.MODE, ModeID.STANDBY)
+    )
+
+    assert (DeviceID.BEND_ELBOW, PacketID.MODE) not in history
+    assert list(history) == [(DeviceID.BEND_ELBOW, PacketID.POSITION)]
+
+    _, values = history[DeviceID.BEND_ELBOW, PacketID.POSITION].last(60.0)
+    assert list(values) == [1.0]
+
+
+def read_shared_state(name: str, results: multiprocessing.Queue) -> None:
+    """Read the shared joint state from another process.
+
+    Args:
+        name: The name of the shared memory block.
+        results: The queue to put the sequence and positions into.
+    """
+    reader = SharedStateReader(name)
+    state = reader.snapshot()
+    results.put((state.sequence, list(state.position)))
+    reader.close()
+
+
+def test_shared_state_is_readable_from_other_processes() -> None:
+    """Test that the published joint state can be read by another process."""
+    publisher = SharedStatePublisher()
+    elbow, jaws = 1.5, 2.0
+
+    try:
+        publisher.update(
+            Packet.from_value(DeviceID.BEND_ELBOW, PacketID.POSITION, elbow)
+        )
+
+        # The reader's views reflect new updates without being refreshed
+        reader = SharedStateReader(publisher.name)
+        view = reader.view()
+        publisher.update(
+            Packet.from_value(DeviceID.LINEAR_JAWS, PacketID.POSITION, jaws)
+        )
+        assert view.position[0] == jaws
+        published = reader.sequence
+        del view
+        reader.close()
+
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        process = context.Process(
+            target=read_shared_state, args=(publisher.name, results)
+        )
+        process.start()
+        sequence, positions = results.get(timeout=30)
+        process.join()
+
+        assert sequence == published
+        assert positions[0] == jaws
+        assert positions[JointStateCache.index(DeviceID.BEND_ELBOW)] == elbow
+    finally:
+        publisher.close()
+
+
+def test_shared_state_reader_rejects_other_blocks() -> None:
+    """Test that readers only attach to blocks created by a publisher."""
+    block = shared_memory.SharedMemory(create=True, size=1024)
+
+    try:
+        with pytest.raises(ValueError):
+            SharedStateReader(block.name)
+    finally:
+        block.close()
+        block.unlink()
@@ -0,0 +1,119 @@
+# Copyright (c) 2023 Evan Palmer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from pybravo import BravoDriver, DeviceID, Packet, PacketID
+from pybravo.driver.dispatch import CallbackDispatcher
+from pybravo.driver.tracing import DriverTracer
+from pybravo.sim import BravoSimulator
+
+# The time taken by the slow callback, which is over the tracer budget (s)
+SLOW_CALLBACK_TIME = 0.005
+
+
+def slow_callback(_: Packet) -> None:
+    """Take longer than the tracer budget."""
+    time.sleep(SLOW_CALLBACK_TIME)
+
+
+def test_tracer_flags_slow_callbacks(caplog: pytest.LogCaptureFixture) -> None:
+    """Test that callbacks over the budget are flagged with their qualified name."""
+    tracer = DriverTracer(budget=0.002)
+    driver = BravoDriver(tracer=tracer)
+    driver.attach_callback(PacketID.POSITION, slow_callback)
+    driver.attach_callback(PacketID.POSITION, lambda _: None)
+
+    driver._handle_datagram(
+        Packet.from_value(DeviceID.BEND_ELBOW, PacketID.POSITION, 1.0).encode()
+    )
+
+    assert len(tracer.slow_callbacks) == 1
+
+    slow = tracer.slow_callbacks[0]
+
+    assert slow.name == f"{__name__}.slow_callback"
+    assert slow.packet_id is PacketID.POSITION
+    assert slow.device_id is DeviceID.BEND_ELBOW
+    assert slow.elapsed >= SLOW_CALLBACK_TIME
+    assert f"{__name__}.slow_callback" in caplog.text
+
+
+def test_tracer_flags_dispatched_callbacks() -> None:
+    """Test that callbacks executed by a dispatcher are also checked."""
+    tracer = DriverTracer(budget=0.002)
+    dispatcher = CallbackDispatcher()
+    driver = BravoDriver(dispatcher=dispatcher, tracer=tracer)
+    driver.attach_callback(PacketID.POSITION, slow_callback)
+
+    dispatcher.start(
+        driver._callbacks_for, driver._on_callback_error, driver._on_callback_executed
+    )
+    driver._handle_datagram(
+        Packet.from_value(DeviceID.BEND_ELBOW, PacketID.POSITION, 1.0).encode()
+    )
+    dispatcher.stop()
+
+    assert [slow.name for slow in tracer.slow_callbacks] == [
+        f"{__name__}.slow_callback"
+    ]
+
+
+def test_tracer_exports_chrome_trace(tmp_path: Path) -> None:
+    """Test that each stage of the receive path is exported as a trace event."""
+    tracer = DriverTracer()
+    driver = BravoDriver(tracer=tracer)
+    driver.attach_callback(PacketID.POSITION, lambda _: None)
+
+    with BravoSimulator() as sim:
+        driver.connect(*sim.address)
+        driver.request(DeviceID.BEND_ELBOW, PacketID.POSITION, timeout=2.0).result(2.0)
+        driver.disconnect()
+
+    path = tmp_path / "trace.json"
+    tracer.dump(path)
+
+    with open(path) as f:
+        events = json.load(f)["traceEvents"]
+
+    assert {event["cat"] for event in events} == {"socket", "protocol", "callback"}
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
+
+    decode = next(event for event in events if event["name"] == "decode")
+    assert decode["args"] == {"packets": 1}
+
+
+def test_tracer_samples_datagrams() -> None:
+    """Test that only every n-th datagram is recorded."""
+    sample_every, datagrams = 4, 8
+    tracer = DriverTracer(sample_every=sample_every)
+    driver = BravoDriver(tracer=tracer)
+    driver.attach_callback(PacketID.POSITION, lambda _: None)
+    datagram = Packet.from_value(DeviceID.BEND_ELBOW, PacketID.POSITION, 1.0).encode()
+
+    for _ in range(datagrams):
+        driver._handle_datagram(datagram)
+
+    # Each sampled datagram has a decode event and a callback event
+    assert len(tracer) == datagrams // sample_every * 2